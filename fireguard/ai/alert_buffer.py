@@ -0,0 +1,285 @@
+"""
+Alert Buffer - Almacenamiento circular de alertas
+
+Buffer de capacidad fija para las alertas retenidas en memoria. Al
+llenarse, cada alerta nueva sustituye a la más antigua sin copiar la
+lista, y los contadores por severidad y tipo se actualizan en cada
+inserción y expulsión, de modo que añadir y resumir son O(1).
+
+Cada alerta recibe un número de secuencia creciente. Los índices
+secundarios (severidad, tipo, origen) guardan, por valor, las
+secuencias en orden de llegada; como la alerta expulsada es siempre la
+más antigua, basta con retirarla del principio de sus índices. El
+índice temporal es el propio orden de llegada: la marca de tiempo de
+cada alerta se registra de forma no decreciente y las consultas por
+rango se resuelven con búsqueda binaria.
+"""
+
+import bisect
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Union
+
+# Campos con índice secundario
+INDEXED_FIELDS = ("severity", "type", "source")
+
+TimeBound = Union[None, float, str, datetime]
+
+
+def to_epoch(value: TimeBound) -> Optional[float]:
+    """
+    Convierte una marca de tiempo (epoch, ISO 8601 o datetime) a epoch.
+    
+    Args:
+        value: Marca de tiempo
+    
+    Returns:
+        Segundos desde epoch o None si no se puede interpretar
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value.timestamp()
+
+
+class _SeqIndex:
+    """Lista ordenada de secuencias con retirada O(1) por el principio"""
+    
+    __slots__ = ("seqs", "head")
+    
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.head = 0
+    
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+    
+    def append(self, seq: int):
+        self.seqs.append(seq)
+    
+    def popleft(self):
+        self.head += 1
+        # Compactar cuando la mitad de la lista son huecos
+        if self.head > 64 and self.head * 2 > len(self.seqs):
+            del self.seqs[:self.head]
+            self.head = 0
+    
+    def since(self, first_seq: int) -> List[int]:
+        """Secuencias mayores o iguales que first_seq"""
+        start = bisect.bisect_left(self.seqs, first_seq, self.head)
+        return self.seqs[start:]
+
+
+class _RingView:
+    """Vista de un array circular indexada por número de secuencia"""
+    
+    __slots__ = ("values", "capacity")
+    
+    def __init__(self, values: List[float], capacity: int):
+        self.values = values
+        self.capacity = capacity
+    
+    def __getitem__(self, seq: int) -> float:
+        return self.values[seq % self.capacity]
+
+
+class AlertBuffer:
+    """
+    Buffer circular de alertas con contadores e índices incrementales.
+    
+    Las alertas se recorren de la más antigua a la más reciente.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        """
+        Inicializa el buffer.
+        
+        Args:
+            capacity: Número máximo de alertas retenidas
+        """
+        if capacity < 1:
+            raise ValueError("La capacidad del buffer de alertas debe ser positiva")
+        
+        self.capacity = capacity
+        self.clear()
+    
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        slots = self._slots
+        capacity = self.capacity
+        for seq in range(self._first_seq, self._next_seq):
+            yield slots[seq % capacity]
+    
+    @property
+    def by_severity(self) -> Dict[str, int]:
+        """Número de alertas retenidas por severidad"""
+        return {key: len(index) for key, index in self._indexes["severity"].items()}
+    
+    @property
+    def by_type(self) -> Dict[str, int]:
+        """Número de alertas retenidas por tipo"""
+        return {key: len(index) for key, index in self._indexes["type"].items()}
+    
+    def append(self, alert: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Añade una alerta, expulsando la más antigua si el buffer está lleno.
+        
+        Args:
+            alert: Alerta a añadir
+        
+        Returns:
+            La alerta expulsada o None
+        """
+        evicted = None
+        if len(self) == self.capacity:
+            evicted = self._evict()
+        
+        seq = self._next_seq
+        self._next_seq += 1
+        slot = seq % self.capacity
+        
+        timestamp = to_epoch(alert.get("timestamp"))
+        if timestamp is None:
+            timestamp = time.time()
+        # El índice temporal debe ser no decreciente para la búsqueda binaria
+        self._last_time = max(self._last_time, timestamp)
+        
+        keys = tuple(alert.get(field, "unknown") for field in INDEXED_FIELDS)
+        self._slots[slot] = alert
+        self._times[slot] = self._last_time
+        self._keys[slot] = keys
+        
+        for field, key in zip(INDEXED_FIELDS, keys):
+            index = self._indexes[field].get(key)
+            if index is None:
+                index = self._indexes[field][key] = _SeqIndex()
+            index.append(seq)
+        
+        return evicted
+    
+    def last(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Obtiene las alertas más recientes.
+        
+        Args:
+            count: Número de alertas
+        
+        Returns:
+            Lista de alertas en orden cronológico
+        """
+        count = min(count, len(self))
+        slots = self._slots
+        capacity = self.capacity
+        return [slots[seq % capacity] for seq in range(self._next_seq - count, self._next_seq)]
+    
+    def query(
+        self,
+        severity: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        source: Optional[str] = None,
+        since: TimeBound = None,
+        until: TimeBound = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca alertas usando los índices.
+        
+        Se recorre solo el índice más selectivo de los filtros dados,
+        empezando en la primera alerta del rango temporal. El rango se
+        aplica sobre el orden de llegada: una alerta que llega con una
+        marca de tiempo anterior a la última registrada se indexa con esta.
+        
+        Args:
+            severity: Severidad exacta
+            alert_type: Tipo de alerta exacto
+            source: Origen (sensor) exacto
+            since: Inicio del rango temporal (incluido)
+            until: Fin del rango temporal (incluido)
+            limit: Número máximo de alertas (las más recientes)
+        
+        Returns:
+            Lista de alertas en orden cronológico
+        """
+        first_seq = self._first_seq
+        last_seq = self._next_seq
+        since = to_epoch(since)
+        until = to_epoch(until)
+        
+        # Rango de secuencias del intervalo temporal
+        if since is not None:
+            first_seq = self._seq_at(since, bisect.bisect_left)
+        if until is not None:
+            last_seq = self._seq_at(until, bisect.bisect_right)
+        
+        filters = [
+            (position, value)
+            for position, value in enumerate((severity, alert_type, source))
+            if value is not None
+        ]
+        
+        if filters:
+            indexes = []
+            for position, value in filters:
+                index = self._indexes[INDEXED_FIELDS[position]].get(value)
+                if index is None:
+                    return []
+                indexes.append(index)
+            seqs = min(indexes, key=len).since(first_seq)
+        else:
+            seqs = range(first_seq, last_seq)
+        
+        slots = self._slots
+        keys = self._keys
+        capacity = self.capacity
+        results = []
+        
+        for seq in seqs:
+            if seq >= last_seq:
+                break
+            slot = seq % capacity
+            if all(keys[slot][position] == value for position, value in filters):
+                results.append(slots[slot])
+        
+        if limit:
+            results = results[-limit:]
+        
+        return results
+    
+    def clear(self):
+        """Vacía el buffer, los contadores y los índices"""
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._times: List[float] = [0.0] * self.capacity
+        self._keys: List[Optional[tuple]] = [None] * self.capacity
+        self._first_seq = 0
+        self._next_seq = 0
+        self._last_time = float("-inf")
+        self._indexes: Dict[str, Dict[Any, _SeqIndex]] = {field: {} for field in INDEXED_FIELDS}
+    
+    def _evict(self) -> Dict[str, Any]:
+        """Expulsa la alerta más antigua y la retira de los índices"""
+        slot = self._first_seq % self.capacity
+        alert = self._slots[slot]
+        self._slots[slot] = None
+        self._first_seq += 1
+        
+        # Se usan las claves con las que se indexó, aunque la alerta haya cambiado
+        for field, key in zip(INDEXED_FIELDS, self._keys[slot]):
+            index = self._indexes[field][key]
+            index.popleft()
+            if not index:
+                del self._indexes[field][key]
+        
+        return alert
+    
+    def _seq_at(self, timestamp: float, bisect_fn) -> int:
+        """Búsqueda binaria de la secuencia correspondiente a una marca de tiempo"""
+        view = _RingView(self._times, self.capacity)
+        return bisect_fn(view, timestamp, self._first_seq, self._next_seq)
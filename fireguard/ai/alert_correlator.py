@@ -0,0 +1,344 @@
+"""
+Alert Correlator - Correlación de alertas entre sensores
+
+Etapa en flujo entre los sensores y AlertSystem. Cada alerta se
+relaciona con las anteriores por sus claves de unión (PID, IP remota y
+usuario) dentro de una ventana de tiempo; las alertas que comparten
+alguna clave forman un grupo. Cuando un grupo reúne alertas de varios
+sensores (p. ej. un puerto nuevo, un proceso sospechoso con el mismo PID
+y fallos de autenticación desde la misma IP) se emite un único
+incidente y las alertas siguientes del grupo se pliegan en él en lugar
+de notificarse por separado.
+
+La memoria está acotada: los índices de claves y de grupos expiran por
+ventana y, además, tienen un tamaño máximo (se descartan los menos
+recientes).
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+SEVERITY_LEVELS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+SEVERITY_NAMES = {level: name for name, level in SEVERITY_LEVELS.items()}
+
+# Campos de 'details' de los que se extrae cada clave de unión
+JOIN_FIELDS = {
+    "pid": ("pid",),
+    "ip": ("remote_addr", "remote_ip", "ip"),
+    "user": ("username", "user"),
+}
+
+# Valores demasiado comunes para relacionar alertas entre sí
+DEFAULT_IGNORED_VALUES = (
+    "", "N/A", "*", "0.0.0.0", "::", "127.0.0.1", "::1",
+    "root", "SYSTEM", "nobody", "unknown",
+)
+
+# IP y usuario dentro de líneas de log de autenticación
+_LOG_IP = re.compile(r"(?:\bfrom\s+|\brhost=)(\d{1,3}(?:\.\d{1,3}){3}|[0-9a-fA-F]*:[0-9a-fA-F:]+)")
+_LOG_USER = re.compile(
+    r"(?:\bpassword for (?:invalid user )?|\bfor (?:invalid )?user |\binvalid user |\b(?:r?user)=(?=\S))"
+    r"([\w.@-]+)",
+    re.IGNORECASE
+)
+
+
+class _Cluster:
+    """Grupo de alertas relacionadas"""
+    
+    __slots__ = (
+        "id", "keys", "sources", "types", "count", "level",
+        "first_seen", "last_seen", "samples", "incident"
+    )
+    
+    def __init__(self, cluster_id: int, now: float):
+        self.id = cluster_id
+        self.keys: set = set()
+        self.sources: set = set()
+        self.types: set = set()
+        self.count = 0
+        self.level = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.samples: List[Dict[str, Any]] = []
+        self.incident: Optional[Dict[str, Any]] = None
+
+
+class AlertCorrelator:
+    """
+    Agrupación en flujo de alertas relacionadas.
+    
+    process() recibe las alertas de los sensores y devuelve las que hay
+    que pasar a AlertSystem: las que no se relacionan con nada, las de
+    grupos que aún no son incidente, y el incidente al formarse.
+    """
+    
+    def __init__(
+        self,
+        window: float = 60.0,
+        min_sources: int = 2,
+        join_keys: Iterable[str] = ("pid", "ip", "user"),
+        ignored_values: Iterable[str] = DEFAULT_IGNORED_VALUES,
+        max_keys: int = 50000,
+        max_clusters: int = 10000,
+        max_keys_per_cluster: int = 32,
+        max_samples: int = 10
+    ):
+        """
+        Inicializa el correlador.
+        
+        Args:
+            window: Segundos sin actividad tras los que un grupo se cierra
+            min_sources: Sensores distintos necesarios para emitir incidente
+            join_keys: Claves de unión activas (pid, ip, user)
+            ignored_values: Valores que no relacionan alertas
+            max_keys: Máximo de claves indexadas
+            max_clusters: Máximo de grupos abiertos
+            max_keys_per_cluster: Máximo de claves que aporta un grupo al índice
+            max_samples: Alertas de ejemplo guardadas en cada incidente
+        """
+        self.window = window
+        self.min_sources = max(1, int(min_sources))
+        self.join_keys = tuple(k for k in join_keys if k in JOIN_FIELDS)
+        self.ignored_values = set(ignored_values)
+        self.max_keys = max_keys
+        self.max_clusters = max_clusters
+        self.max_keys_per_cluster = max_keys_per_cluster
+        self.max_samples = max_samples
+        
+        # Clave -> grupo; grupo -> registro. Ambos ordenados por última actividad
+        self._index: "OrderedDict[Tuple[str, str], _Cluster]" = OrderedDict()
+        self._clusters: "OrderedDict[int, _Cluster]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        
+        # Métricas
+        self.processed = 0
+        self.folded = 0
+        self.incidents = 0
+        self.evicted = 0
+    
+    def extract_keys(self, alert: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """
+        Obtiene las claves de unión de una alerta.
+        
+        Args:
+            alert: Alerta
+        
+        Returns:
+            Lista de claves (nombre, valor)
+        """
+        details = alert.get("details")
+        if not isinstance(details, dict):
+            return []
+        
+        keys = []
+        for name in self.join_keys:
+            for field in JOIN_FIELDS[name]:
+                value = details.get(field)
+                if value is not None and value != 0:
+                    keys.append((name, str(value)))
+                    break
+        
+        # Las líneas de log solo traen el texto: extraer IP y usuario
+        content = details.get("content")
+        if isinstance(content, str):
+            if "ip" in self.join_keys:
+                match = _LOG_IP.search(content)
+                if match:
+                    keys.append(("ip", match.group(1)))
+            if "user" in self.join_keys:
+                match = _LOG_USER.search(content)
+                if match:
+                    keys.append(("user", match.group(1)))
+        
+        return [key for key in dict.fromkeys(keys) if key[1] not in self.ignored_values]
+    
+    def process(self, alerts: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Correlaciona un lote de alertas.
+        
+        Args:
+            alerts: Alertas de un sensor
+            now: Instante de recepción (por defecto time.time())
+        
+        Returns:
+            Alertas que deben pasar a AlertSystem
+        """
+        now = time.time() if now is None else now
+        output = []
+        with self._lock:
+            self._expire(now)
+            for alert in alerts:
+                output.extend(self._correlate(alert, now))
+        return output
+    
+    def get_incidents(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene los incidentes abiertos.
+        
+        Returns:
+            Lista de incidentes emitidos cuyos grupos siguen activos
+        """
+        with self._lock:
+            return [c.incident for c in self._clusters.values() if c.incident is not None]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del correlador.
+        
+        Returns:
+            Dict con alertas procesadas y plegadas, incidentes y tamaño
+            de los índices
+        """
+        with self._lock:
+            return {
+                "processed": self.processed,
+                "folded": self.folded,
+                "incidents": self.incidents,
+                "open_clusters": len(self._clusters),
+                "indexed_keys": len(self._index),
+                "evicted": self.evicted,
+            }
+    
+    def clear(self):
+        """Olvida todos los grupos"""
+        with self._lock:
+            self._index.clear()
+            self._clusters.clear()
+    
+    def _correlate(self, alert: Dict[str, Any], now: float) -> List[Dict[str, Any]]:
+        """Correlaciona una alerta (con el lock tomado)"""
+        self.processed += 1
+        keys = self.extract_keys(alert)
+        if not keys:
+            return [alert]
+        
+        # Grupos que comparten alguna clave; si son varios se fusionan
+        matches = []
+        for key in keys:
+            cluster = self._index.get(key)
+            if cluster is not None and cluster not in matches:
+                matches.append(cluster)
+        
+        if matches:
+            cluster = max(matches, key=lambda c: (c.incident is not None, c.count))
+            for other in matches:
+                if other is not cluster:
+                    self._merge(other, cluster)
+        else:
+            cluster = _Cluster(self._next_id, now)
+            self._next_id += 1
+            self._clusters[cluster.id] = cluster
+            if len(self._clusters) > self.max_clusters:
+                self._drop_cluster(next(iter(self._clusters.values())))
+                self.evicted += 1
+        
+        self._add(cluster, alert, keys, now)
+        
+        if cluster.incident is not None:
+            self._update_incident(cluster)
+            self.folded += 1
+            return []
+        
+        if len(cluster.sources) >= self.min_sources and cluster.count > 1:
+            cluster.incident = self._build_incident(cluster)
+            self.incidents += 1
+            return [alert, cluster.incident]
+        
+        return [alert]
+    
+    def _add(self, cluster: _Cluster, alert: Dict[str, Any], keys: List[Tuple[str, str]], now: float):
+        """Añade una alerta a un grupo y refresca sus claves"""
+        cluster.count += 1
+        cluster.last_seen = now
+        cluster.sources.add(alert.get("source", "unknown"))
+        cluster.types.add(alert.get("type", "unknown"))
+        cluster.level = max(cluster.level, SEVERITY_LEVELS.get(alert.get("severity"), 1))
+        if len(cluster.samples) < self.max_samples:
+            cluster.samples.append(alert)
+        self._clusters.move_to_end(cluster.id)
+        
+        for key in keys:
+            if key not in cluster.keys:
+                if len(cluster.keys) >= self.max_keys_per_cluster:
+                    continue
+                cluster.keys.add(key)
+            self._index[key] = cluster
+            self._index.move_to_end(key)
+        
+        while len(self._index) > self.max_keys:
+            key, owner = self._index.popitem(last=False)
+            owner.keys.discard(key)
+            self.evicted += 1
+    
+    def _merge(self, source: _Cluster, target: _Cluster):
+        """Fusiona un grupo en otro"""
+        target.count += source.count
+        target.sources |= source.sources
+        target.types |= source.types
+        target.level = max(target.level, source.level)
+        target.first_seen = min(target.first_seen, source.first_seen)
+        room = self.max_samples - len(target.samples)
+        target.samples.extend(source.samples[:max(0, room)])
+        
+        for key in source.keys:
+            if len(target.keys) < self.max_keys_per_cluster:
+                target.keys.add(key)
+                self._index[key] = target
+            else:
+                self._index.pop(key, None)
+        source.keys = set()
+        
+        if source.incident is not None:
+            source.incident["details"]["merged_into"] = target.id
+        self._clusters.pop(source.id, None)
+    
+    def _build_incident(self, cluster: _Cluster) -> Dict[str, Any]:
+        """Crea la alerta de incidente de un grupo"""
+        incident = {
+            "severity": SEVERITY_NAMES[min(4, cluster.level + 1)],
+            "type": "correlated_incident",
+            "source": "AlertCorrelator",
+            "timestamp": datetime.fromtimestamp(cluster.last_seen).isoformat(),
+            "details": {"incident_id": cluster.id, "alerts": cluster.samples},
+        }
+        self._update_incident(cluster, incident)
+        return incident
+    
+    def _update_incident(self, cluster: _Cluster, incident: Optional[Dict[str, Any]] = None):
+        """Actualiza el incidente con el estado del grupo"""
+        incident = incident or cluster.incident
+        keys = sorted(f"{name}={value}" for name, value in cluster.keys)
+        incident["message"] = (
+            f"Incidente correlacionado: {cluster.count} alertas de "
+            f"{', '.join(sorted(cluster.sources))} ({', '.join(keys[:5])})"
+        )
+        incident["details"].update({
+            "alert_count": cluster.count,
+            "sources": sorted(cluster.sources),
+            "types": sorted(cluster.types),
+            "keys": keys,
+            "first_seen": datetime.fromtimestamp(cluster.first_seen).isoformat(),
+            "last_seen": datetime.fromtimestamp(cluster.last_seen).isoformat(),
+        })
+    
+    def _drop_cluster(self, cluster: _Cluster):
+        """Retira un grupo y sus claves de los índices"""
+        for key in cluster.keys:
+            if self._index.get(key) is cluster:
+                del self._index[key]
+        self._clusters.pop(cluster.id, None)
+    
+    def _expire(self, now: float):
+        """Cierra los grupos sin actividad dentro de la ventana"""
+        limit = now - self.window
+        while self._clusters:
+            cluster = next(iter(self._clusters.values()))
+            if cluster.last_seen > limit:
+                break
+            self._drop_cluster(cluster)
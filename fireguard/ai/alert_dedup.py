@@ -0,0 +1,175 @@
+"""
+Alert Dedup - Deduplicación de alertas por huella
+
+Agrupa las alertas repetidas de una misma condición (p. ej. el mismo
+puerto peligroso abierto en cada escaneo) en un único registro con
+número de apariciones, primera y última vez vistas. La huella se
+calcula con el tipo, el origen y los campos identificativos de los
+detalles, ignorando los valores que cambian entre escaneos (CPU,
+memoria, porcentajes...).
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple, Iterable
+
+# Campos de 'details' que identifican la condición de una alerta
+DEFAULT_FINGERPRINT_FIELDS = (
+    "pid", "name", "port", "address", "local_port", "remote_addr", "remote_port",
+    "mountpoint", "device", "path", "source", "pattern_matched", "content",
+    "incident_id", "metric",
+)
+
+SEVERITY_LEVELS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+
+class AlertDeduplicator:
+    """
+    Plegado de alertas repetidas dentro de una ventana de supresión.
+    
+    Una alerta cuya huella se vio hace menos de window segundos se
+    pliega en el registro existente. Solo se consideran alertas nuevas
+    la primera aparición, la que llega tras expirar la ventana y la que
+    sube de severidad (escalado). Como mucho se guardan max_records
+    huellas: al llenarse se olvida la vista hace más tiempo.
+    """
+    
+    def __init__(
+        self,
+        window: float = 300.0,
+        fields: Iterable[str] = DEFAULT_FINGERPRINT_FIELDS,
+        type_fields: Optional[Dict[str, Iterable[str]]] = None,
+        max_records: int = 10000
+    ):
+        """
+        Inicializa el deduplicador.
+        
+        Args:
+            window: Ventana de supresión en segundos (0 desactiva el plegado)
+            fields: Campos identificativos por defecto en 'details'
+            type_fields: Campos identificativos por tipo de alerta
+            max_records: Huellas recordadas como máximo (p. ej. durante
+                una avalancha de líneas de log distintas)
+        """
+        self.window = window
+        self.fields = tuple(fields)
+        self.type_fields = {t: tuple(f) for t, f in (type_fields or {}).items()}
+        self.max_records = max(1, int(max_records))
+        # Huella -> (registro, última aparición); ordenado por última aparición
+        self._records: "OrderedDict[Tuple, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.suppressed = 0
+        self.evicted = 0
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def fingerprint(self, alert: Dict[str, Any]) -> Tuple:
+        """
+        Calcula la huella de una alerta.
+        
+        Args:
+            alert: Alerta
+        
+        Returns:
+            Tupla (tipo, origen, campos identificativos)
+        """
+        alert_type = alert.get("type", "unknown")
+        details = alert.get("details")
+        
+        if isinstance(details, dict):
+            fields = self.type_fields.get(alert_type, self.fields)
+            identity = tuple((f, str(details[f])) for f in fields if f in details)
+        else:
+            # Sin detalles, el mensaje es lo único que identifica la condición
+            identity = (("message", alert.get("message")),)
+        
+        return (alert_type, alert.get("source"), identity)
+    
+    def fold(self, alert: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """
+        Registra una alerta, plegándola si repite una condición reciente.
+        
+        A las alertas nuevas se les añaden 'fingerprint', 'occurrences',
+        'first_seen' y 'last_seen'; al plegar, se actualizan estos campos
+        en el registro existente.
+        
+        Args:
+            alert: Alerta recibida
+            now: Instante de recepción (por defecto time.time())
+        
+        Returns:
+            bool: True si la alerta es nueva (primera aparición, ventana
+                expirada o escalado) y False si se ha plegado
+        """
+        now = time.time() if now is None else now
+        timestamp = alert.get("timestamp") or datetime.fromtimestamp(now).isoformat()
+        
+        if self.window <= 0:
+            alert.setdefault("occurrences", 1)
+            return True
+        
+        self._expire(now)
+        key = self.fingerprint(alert)
+        previous = self._records.get(key)
+        
+        if previous is not None:
+            record = previous[0]
+            escalated = (
+                SEVERITY_LEVELS.get(alert.get("severity"), 1) >
+                SEVERITY_LEVELS.get(record.get("severity"), 1)
+            )
+            if not escalated:
+                record["occurrences"] += 1
+                record["last_seen"] = timestamp
+                self._records[key] = (record, now)
+                self._records.move_to_end(key)
+                self.suppressed += 1
+                return False
+            
+            # Escalado: nuevo registro que conserva la historia del anterior
+            alert["occurrences"] = record["occurrences"] + 1
+            alert["first_seen"] = record["first_seen"]
+            alert["escalated_from"] = record.get("severity")
+        else:
+            alert["occurrences"] = 1
+            alert["first_seen"] = timestamp
+        
+        alert["fingerprint"] = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+        alert["last_seen"] = timestamp
+        self._records[key] = (alert, now)
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_records:
+            self._records.popitem(last=False)
+            self.evicted += 1
+        return True
+    
+    def record(self, alert: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el registro vigente con la huella de una alerta.
+        
+        Args:
+            alert: Alerta (p. ej. una recién plegada)
+        
+        Returns:
+            Registro en el que se pliegan sus repeticiones, o None
+        """
+        entry = self._records.get(self.fingerprint(alert))
+        return entry[0] if entry is not None else None
+    
+    def clear(self):
+        """Olvida todas las huellas"""
+        self._records.clear()
+        self.suppressed = 0
+        self.evicted = 0
+    
+    def _expire(self, now: float):
+        """Descarta las huellas sin apariciones dentro de la ventana"""
+        records = self._records
+        limit = now - self.window
+        while records:
+            key, (_, last_seen) = next(iter(records.items()))
+            if last_seen > limit:
+                break
+            del records[key]
@@ -0,0 +1,485 @@
+"""
+Alert Dispatcher - Entrega asíncrona de alertas a los callbacks
+
+Los callbacks de alertas se ejecutan fuera del hilo que genera la
+alerta: add_alert() solo encola y un hilo despachador reparte cada
+alerta a los callbacks registrados. Cada callback tiene su propio hilo,
+su propia cola (acotada a 'backlog' alertas) y su propio timeout, de
+modo que uno lento o colgado no retrasa a los demás ni al sensor que
+originó la alerta: el despachador avanza en cuanto algún callback está
+libre, y un callback que supera el timeout deja de recibir alertas
+(se cuentan como omitidas) hasta que termina.
+
+Las alertas se entregan por prioridad: primero las de mayor severidad
+y, dentro de una severidad, por orden de llegada. Para que las de
+severidad baja no esperen indefinidamente durante una avalancha, cada
+alerta gana un nivel de prioridad por cada 'aging' segundos en cola.
+
+La cola está acotada y, al llenarse, aplica una política configurable:
+
+- drop_oldest: se descarta la alerta más antigua de la cola.
+- drop_lowest: se descarta la alerta más antigua de menor severidad
+  (o la nueva, si es la de menor severidad).
+- block: el productor espera hasta que haya hueco (como mucho
+  block_timeout segundos; después se descarta la alerta nueva).
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Callable, Optional
+from fireguard.core.logger import Logger
+
+# Severidades de AlertSystem y niveles de AlertLevel en una misma escala
+SEVERITY_LEVELS = {
+    "low": 1, "info": 1,
+    "medium": 2, "warning": 2,
+    "high": 3,
+    "critical": 4,
+    "emergency": 5,
+}
+MAX_LEVEL = max(SEVERITY_LEVELS.values())
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_lowest", "block")
+
+
+class _CallbackRunner:
+    """
+    Callback con su propio hilo de ejecución, su cola y estadísticas.
+    
+    Comparte el lock del despachador. El hilo es daemon para que un
+    callback colgado no impida cerrar el proceso.
+    """
+    
+    def __init__(self, callback: Callable, dispatcher: "AlertDispatcher"):
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        self.dispatcher = dispatcher
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.stuck = False
+        self._backlog: deque = deque()
+        self._current: Optional[list] = None
+        self._started: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._overflowing = False
+    
+    @property
+    def idle(self) -> bool:
+        """No ejecuta nada ni tiene alertas pendientes (con el lock tomado)"""
+        return self._started is None and not self._backlog
+    
+    def submit(self, delivery: list) -> bool:
+        """
+        Encola una entrega (con el lock tomado).
+        
+        Returns:
+            bool: False si se omite (callback colgado o cola llena)
+        """
+        if self.stuck:
+            self.skipped += 1
+            return False
+        
+        if len(self._backlog) >= self.dispatcher.backlog:
+            self.skipped += 1
+            if not self._overflowing:
+                self._overflowing = True
+                self.dispatcher.logger.warning(
+                    f"Callback de alerta {self.name} con {len(self._backlog)} alertas "
+                    f"pendientes: se omiten las nuevas",
+                    module="AlertDispatcher"
+                )
+            return False
+        
+        self._overflowing = False
+        self._backlog.append(delivery)
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="fireguard-alert-callback", daemon=True
+            )
+            self._thread.start()
+        return True
+    
+    def check_timeout(self, now: float, timeout: float) -> List[list]:
+        """
+        Marca el callback como colgado si supera el timeout (con el lock tomado).
+        
+        Returns:
+            Entregas abandonadas: la alerta en curso y las pendientes
+        """
+        if self._started is None or self.stuck or now - self._started <= timeout:
+            return []
+        
+        self.stuck = True
+        self.timeouts += 1
+        abandoned = list(self._backlog)
+        self._backlog.clear()
+        self.skipped += len(abandoned)
+        if self._current is not None:
+            abandoned.append(self._current)
+            self._current = None
+        return abandoned
+    
+    def stop(self):
+        """Detiene el hilo cuando termine lo pendiente (con el lock tomado)"""
+        self._stopped = True
+        self.dispatcher._cond.notify_all()
+    
+    def _run(self):
+        cond = self.dispatcher._cond
+        while True:
+            with cond:
+                cond.wait_for(lambda: self._backlog or self._stopped)
+                if not self._backlog:
+                    self._thread = None
+                    return
+                delivery = self._current = self._backlog.popleft()
+                self._started = time.perf_counter()
+                self.calls += 1
+            
+            error = None
+            try:
+                self.callback(delivery[2])
+            except Exception as e:
+                error = e
+            
+            with cond:
+                if self.stuck:
+                    self.dispatcher.logger.info(
+                        f"Callback de alerta {self.name} ha terminado tras superar el timeout",
+                        module="AlertDispatcher"
+                    )
+                self.stuck = False
+                self._started = None
+                if error is not None:
+                    self.errors += 1
+                if self._current is not None:
+                    self._current = None
+                    self.dispatcher._finish(delivery)
+                cond.notify_all()
+            
+            if error is not None:
+                self.dispatcher.logger.error(
+                    f"Error en callback de alerta: {error}",
+                    module="AlertDispatcher"
+                )
+
+
+class AlertDispatcher:
+    """
+    Despachador de alertas con cola de prioridad acotada.
+    
+    Las estadísticas de get_stats() incluyen la profundidad de la cola y
+    la latencia de entrega (desde que se encola hasta que terminan los
+    callbacks), global y por severidad.
+    """
+    
+    def __init__(
+        self,
+        max_queue: int = 1000,
+        timeout: float = 5.0,
+        overflow: str = "drop_oldest",
+        block_timeout: float = 1.0,
+        aging: float = 5.0,
+        backlog: int = 100
+    ):
+        """
+        Inicializa el despachador.
+        
+        Args:
+            max_queue: Número máximo de alertas en cola
+            timeout: Tiempo máximo de cada callback por alerta (segundos)
+            overflow: Política al llenarse la cola (drop_oldest,
+                drop_lowest o block)
+            block_timeout: Espera máxima del productor con la política block
+            aging: Segundos en cola por cada nivel de prioridad ganado
+                (0 = entrega en orden de llegada)
+            backlog: Alertas pendientes como máximo por callback; con la
+                cola de un callback llena, las nuevas se omiten para él
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento desconocida: {overflow}")
+        
+        self.logger = Logger()
+        self.max_queue = max(1, int(max_queue))
+        self.timeout = timeout
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.aging = aging
+        self.backlog = max(1, int(backlog))
+        
+        self.callbacks: List[Callable] = []
+        self._runners: List[_CallbackRunner] = []
+        
+        # Una cola por severidad; el orden de llegada lo da la secuencia
+        self._queues: Dict[int, deque] = {level: deque() for level in range(MAX_LEVEL + 1)}
+        self._size = 0
+        self._seq = 0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        
+        # Métricas
+        self.enqueued = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = 0.0
+        self._latency_by_severity: Dict[str, list] = {}
+    
+    def register(self, callback: Callable):
+        """
+        Registra un callback.
+        
+        Args:
+            callback: Función que recibe cada alerta
+        """
+        with self._cond:
+            self.callbacks.append(callback)
+            self._runners.append(_CallbackRunner(callback, self))
+    
+    def submit(self, alert: Dict[str, Any]) -> bool:
+        """
+        Encola una alerta para entregarla a los callbacks.
+        
+        Args:
+            alert: Alerta a entregar
+        
+        Returns:
+            bool: True si la alerta se encoló, False si se descartó
+        """
+        level = SEVERITY_LEVELS.get(alert.get("severity"), 0)
+        
+        with self._cond:
+            if not self._runners:
+                return True
+            
+            self._ensure_thread()
+            
+            if self._size >= self.max_queue and not self._make_room(level):
+                self.dropped += 1
+                return False
+            
+            self._queues[level].append((self._seq, time.perf_counter(), alert))
+            self._seq += 1
+            self._size += 1
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self._size)
+            self._cond.notify_all()
+        
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se entreguen todas las alertas encoladas.
+        
+        Args:
+            timeout: Espera máxima en segundos (None = sin límite)
+        
+        Returns:
+            bool: True si la cola quedó vacía
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._size == 0 and self._in_flight == 0, timeout
+            )
+    
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Entrega las alertas pendientes y detiene el despachador.
+        
+        Args:
+            timeout: Espera máxima para vaciar la cola
+        """
+        self.flush(timeout)
+        
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        
+        if thread:
+            thread.join(timeout)
+        
+        with self._cond:
+            for runner in self._runners:
+                runner.stop()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del despachador.
+        
+        Returns:
+            Dict con profundidad de cola, contadores y latencias
+        """
+        with self._cond:
+            return {
+                "queue_depth": self._size,
+                "max_depth": self.max_depth,
+                "max_queue": self.max_queue,
+                "overflow": self.overflow,
+                "enqueued": self.enqueued,
+                "dispatched": self.dispatched,
+                "dropped": self.dropped,
+                "latency_avg": self._latency_total / self.dispatched if self.dispatched else 0.0,
+                "latency_max": self._latency_max,
+                "latency_last": self._latency_last,
+                "latency_by_severity": {
+                    severity: {"count": count, "avg": total / count, "max": worst}
+                    for severity, (count, total, worst) in self._latency_by_severity.items()
+                },
+                "callbacks": {
+                    runner.name: {
+                        "calls": runner.calls,
+                        "errors": runner.errors,
+                        "timeouts": runner.timeouts,
+                        "skipped": runner.skipped,
+                    }
+                    for runner in self._runners
+                },
+            }
+    
+    def _ensure_thread(self):
+        """Arranca el hilo despachador si no está en marcha (con el lock tomado)"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._dispatch_loop,
+                name="fireguard-alert-dispatcher",
+                daemon=True
+            )
+            self._thread.start()
+    
+    def _make_room(self, level: int) -> bool:
+        """
+        Aplica la política de desbordamiento (con el lock tomado).
+        
+        Returns:
+            bool: True si hay hueco para la alerta nueva
+        """
+        if self.overflow == "block":
+            deadline = time.monotonic() + self.block_timeout
+            while self._size >= self.max_queue and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self._size < self.max_queue
+        
+        if self.overflow == "drop_lowest":
+            lowest = min(lvl for lvl, queue in self._queues.items() if queue)
+            if level <= lowest:
+                return False
+            self._queues[lowest].popleft()
+        else:
+            self._pop_oldest()
+        
+        self._size -= 1
+        self.dropped += 1
+        return True
+    
+    def _pop_oldest(self):
+        """Saca la alerta más antigua de la cola (con el lock tomado)"""
+        queue = min((q for q in self._queues.values() if q), key=lambda q: q[0][0])
+        return queue.popleft()
+    
+    def _pop_next(self):
+        """
+        Saca la alerta de mayor prioridad (con el lock tomado).
+        
+        La prioridad es la severidad más un nivel por cada 'aging'
+        segundos en cola; a igual prioridad, la más antigua.
+        """
+        if self.aging <= 0:
+            return self._pop_oldest()
+        
+        now = time.perf_counter()
+        best, best_key = None, None
+        for level, queue in self._queues.items():
+            if not queue:
+                continue
+            seq, enqueued_at, _ = queue[0]
+            key = (level + (now - enqueued_at) / self.aging, -seq)
+            if best_key is None or key > best_key:
+                best, best_key = queue, key
+        return best.popleft()
+    
+    def _dispatch_loop(self):
+        """
+        Bucle del hilo despachador.
+        
+        Saca una alerta cuando algún callback puede recibirla (libre o
+        colgado, para el que se omite) y la reparte a todos; los callbacks
+        ocupados la reciben en su cola.
+        """
+        with self._cond:
+            while True:
+                self._check_timeouts()
+                runners = self._runners
+                ready = not runners or any(runner.idle or runner.stuck for runner in runners)
+                
+                if self._size and ready:
+                    _, enqueued_at, alert = self._pop_next()
+                    self._size -= 1
+                    self._in_flight += 1
+                    delivery = [len(runners) or 1, enqueued_at, alert]
+                    if not runners:
+                        self._finish(delivery)
+                    for runner in runners:
+                        if not runner.submit(delivery):
+                            self._finish(delivery)
+                    self._cond.notify_all()
+                    continue
+                
+                if not self._running and (self._size == 0 or not ready):
+                    return
+                
+                # Revisar los timeouts mientras haya callbacks ejecutándose
+                busy = any(not runner.idle and not runner.stuck for runner in runners)
+                self._cond.wait(self.timeout / 2 if busy else None)
+    
+    def _check_timeouts(self):
+        """Da por terminadas las entregas de los callbacks colgados (con el lock tomado)"""
+        now = time.perf_counter()
+        for runner in self._runners:
+            abandoned = runner.check_timeout(now, self.timeout)
+            if not abandoned:
+                continue
+            self.logger.warning(
+                f"Callback de alerta {runner.name} superó el timeout de {self.timeout}s; "
+                f"se omiten sus alertas hasta que termine ({len(abandoned) - 1} pendientes descartadas)",
+                module="AlertDispatcher"
+            )
+            for delivery in abandoned:
+                self._finish(delivery)
+    
+    def _finish(self, delivery: list):
+        """
+        Registra que un callback ha terminado (u omitido) una entrega;
+        con el último, la alerta cuenta como despachada (con el lock tomado).
+        """
+        delivery[0] -= 1
+        if delivery[0] > 0:
+            return
+        
+        _, enqueued_at, alert = delivery
+        latency = time.perf_counter() - enqueued_at
+        self._in_flight -= 1
+        self.dispatched += 1
+        self._latency_total += latency
+        self._latency_max = max(self._latency_max, latency)
+        self._latency_last = latency
+        severity = alert.get("severity", "unknown")
+        stats = self._latency_by_severity.get(severity)
+        if stats is None:
+            stats = self._latency_by_severity[severity] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += latency
+        stats[2] = max(stats[2], latency)
+        self._cond.notify_all()
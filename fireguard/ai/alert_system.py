@@ -2,10 +2,15 @@
 Alert System - Sistema de gestión de alertas
 """
 
+import sys
+import threading
 from typing import Dict, Any, List, Callable, Optional
 from datetime import datetime
 from fireguard.core.logger import Logger
 from fireguard.core.config_manager import ConfigManager
+from fireguard.ai.alert_buffer import AlertBuffer, TimeBound
+from fireguard.ai.alert_dedup import AlertDeduplicator, DEFAULT_FINGERPRINT_FIELDS
+from fireguard.ai.alert_dispatcher import AlertDispatcher
 
 
 class AlertSystem:
@@ -36,12 +41,43 @@ class AlertSystem:
             "critical": 4
         }
         
-        # Almacenamiento de alertas
-        self.alerts: List[Dict[str, Any]] = []
-        self.max_alerts = 1000
+        # Almacenamiento de alertas: buffer circular con contadores
+        self.max_alerts = int(self.config.get("alerts.max_alerts", 1000))
+        self.alerts = AlertBuffer(self.max_alerts)
+        # Los sensores pueden añadir alertas desde varios hilos
+        self._lock = threading.Lock()
         
-        # Callbacks para notificaciones
-        self.alert_callbacks: List[Callable] = []
+        # Plegado de alertas repetidas dentro de la ventana de supresión
+        self.dedup = AlertDeduplicator(
+            window=float(self.config.get("alerts.suppression_window", 300)),
+            fields=self.config.get("alerts.fingerprint_fields", DEFAULT_FINGERPRINT_FIELDS),
+            type_fields=self.config.get("alerts.fingerprint_fields_by_type", {}),
+            max_records=int(self.config.get("alerts.suppression_max_records", 10000))
+        )
+        
+        # Callbacks para notificaciones: se ejecutan de forma asíncrona
+        # desde una cola acotada para no bloquear a los sensores
+        self.dispatcher = AlertDispatcher(
+            max_queue=int(self.config.get("alerts.dispatch.queue_size", 1000)),
+            timeout=float(self.config.get("alerts.dispatch.timeout", 5.0)),
+            overflow=self.config.get("alerts.dispatch.overflow", "drop_oldest"),
+            block_timeout=float(self.config.get("alerts.dispatch.block_timeout", 1.0)),
+            aging=float(self.config.get("alerts.dispatch.aging", 5.0)),
+            backlog=int(self.config.get("alerts.dispatch.backlog", 100))
+        )
+        self.alert_callbacks: List[Callable] = self.dispatcher.callbacks
+        
+        # Histórico persistente en SQLite (opcional)
+        self.store = None
+        store_path = self.config.get("alerts.store.path")
+        if store_path:
+            # Importación diferida: fireguard.alerts depende de este paquete
+            from fireguard.alerts.alert_store import AlertStore
+            self.store = AlertStore(
+                store_path,
+                flush_interval=float(self.config.get("alerts.store.flush_interval", 0.5)),
+                batch_size=int(self.config.get("alerts.store.batch_size", 5000))
+            )
         
         self.logger.info(
             f"AlertSystem inicializado (threshold={self.threshold})",
@@ -70,12 +106,28 @@ class AlertSystem:
         if "timestamp" not in alert:
             alert["timestamp"] = datetime.now().isoformat()
         
-        # Añadir la alerta
-        self.alerts.append(alert)
+        # Internar los campos repetidos para que las alertas retenidas
+        # compartan la misma cadena en lugar de una copia por alerta
+        for field in ("severity", "type", "source"):
+            value = alert.get(field)
+            if type(value) is str:
+                alert[field] = sys.intern(value)
+        
+        with self._lock:
+            # Las repeticiones de una condición reciente solo actualizan
+            # el registro existente (también en el histórico): sin log
+            # ni callbacks
+            if not self.dedup.fold(alert):
+                record = self.dedup.record(alert)
+                if self.store and record is not None:
+                    self.store.add(record)
+                return
+            
+            # Añadir la alerta (la más antigua se descarta si el buffer está lleno)
+            self.alerts.append(alert)
         
-        # Mantener límite de alertas
-        if len(self.alerts) > self.max_alerts:
-            self.alerts = self.alerts[-self.max_alerts:]
+        if self.store:
+            self.store.add(alert)
         
         # Log de la alerta
         severity = alert.get("severity", "unknown")
@@ -105,51 +157,101 @@ class AlertSystem:
         Args:
             callback: Función a llamar cuando hay una nueva alerta
         """
-        self.alert_callbacks.append(callback)
+        self.dispatcher.register(callback)
         self.logger.info("Callback de alerta registrado", module="AlertSystem")
     
     def _notify_callbacks(self, alert: Dict[str, Any]):
         """
-        Notifica a los callbacks registrados.
+        Encola la alerta para los callbacks registrados.
         
         Args:
             alert: Alerta a notificar
         """
-        for callback in self.alert_callbacks:
-            try:
-                callback(alert)
-            except Exception as e:
-                self.logger.error(
-                    f"Error en callback de alerta: {e}",
-                    module="AlertSystem"
-                )
+        if not self.dispatcher.submit(alert):
+            self.logger.debug(
+                "Cola de callbacks llena: alerta descartada",
+                module="AlertSystem"
+            )
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que los callbacks hayan recibido las alertas pendientes.
+        
+        Args:
+            timeout: Espera máxima en segundos (None = sin límite)
+            
+        Returns:
+            bool: True si no quedan alertas pendientes
+        """
+        return self.dispatcher.flush(timeout)
+    
+    def close(self):
+        """Entrega las alertas pendientes, detiene el despachador y cierra el histórico"""
+        self.dispatcher.close()
+        if self.store:
+            self.store.close()
+    
+    def get_dispatch_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas de entrega a callbacks.
+        
+        Returns:
+            Dict con profundidad de cola, descartes y latencias
+        """
+        return self.dispatcher.get_stats()
     
     def get_alerts(
         self,
         severity: Optional[str] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        alert_type: Optional[str] = None,
+        source: Optional[str] = None,
+        since: TimeBound = None,
+        until: TimeBound = None,
+        history: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Obtiene alertas del sistema.
         
+        Los filtros se resuelven con los índices del buffer, sin recorrer
+        todas las alertas retenidas. Con history=True la consulta se hace
+        sobre el histórico persistente, si está configurado.
+        
         Args:
             severity: Filtrar por severidad (opcional)
             limit: Límite de alertas a retornar (opcional)
+            alert_type: Filtrar por tipo de alerta (opcional)
+            source: Filtrar por sensor de origen (opcional)
+            since: Solo alertas desde este instante (datetime, ISO o epoch)
+            until: Solo alertas hasta este instante (datetime, ISO o epoch)
+            history: Consultar el histórico persistente
             
         Returns:
             Lista de alertas
         """
-        alerts = self.alerts
-        
-        # Filtrar por severidad si se especifica
-        if severity:
-            alerts = [a for a in alerts if a.get("severity") == severity]
-        
-        # Aplicar límite si se especifica
-        if limit:
-            alerts = alerts[-limit:]
+        if history and self.store:
+            self.store.flush()
+            return self.store.query(
+                severity=severity,
+                alert_type=alert_type,
+                source=source,
+                since=since,
+                until=until,
+                limit=limit
+            )
         
-        return alerts
+        with self._lock:
+            if not (severity or alert_type or source or since or until):
+                return self.alerts.last(limit) if limit else list(self.alerts)
+            
+            return self.alerts.query(
+                severity=severity,
+                alert_type=alert_type,
+                source=source,
+                since=since,
+                until=until,
+                limit=limit
+            )
     
     def get_alert_summary(self) -> Dict[str, Any]:
         """
@@ -158,27 +260,21 @@ class AlertSystem:
         Returns:
             Dict con estadísticas de alertas
         """
-        summary = {
-            "total": len(self.alerts),
-            "by_severity": {},
-            "by_type": {}
-        }
-        
-        for alert in self.alerts:
-            # Contar por severidad
-            severity = alert.get("severity", "unknown")
-            summary["by_severity"][severity] = summary["by_severity"].get(severity, 0) + 1
-            
-            # Contar por tipo
-            alert_type = alert.get("type", "unknown")
-            summary["by_type"][alert_type] = summary["by_type"].get(alert_type, 0) + 1
-        
-        return summary
+        # Los contadores se mantienen al insertar y expulsar alertas
+        with self._lock:
+            return {
+                "total": len(self.alerts),
+                "by_severity": dict(self.alerts.by_severity),
+                "by_type": dict(self.alerts.by_type),
+                "suppressed": self.dedup.suppressed
+            }
     
     def clear_alerts(self):
         """Limpia todas las alertas"""
-        count = len(self.alerts)
-        self.alerts = []
+        with self._lock:
+            count = len(self.alerts)
+            self.alerts.clear()
+            self.dedup.clear()
         self.logger.info(f"Limpiadas {count} alertas", module="AlertSystem")
     
     def set_threshold(self, threshold: str):
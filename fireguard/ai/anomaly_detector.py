@@ -2,11 +2,29 @@
 Anomaly Detector - Base para detección de anomalías con IA
 """
 
+import time
+from typing import Dict, Any, List, Optional, Sequence
 import numpy as np
-from typing import Dict, Any, List, Optional
-from datetime import datetime
 from fireguard.core.logger import Logger
 from fireguard.core.config_manager import ConfigManager
+from fireguard.ai.online_stats import create_stats
+from fireguard.ai.metric_store import MetricStore
+from fireguard.ai.multivariate import MahalanobisScorer
+from fireguard.ai.seasonal import SeasonalBaseline, hour_of_week
+
+# Métricas analizadas por defecto
+DEFAULT_METRICS = ("cpu_percent", "memory_percent")
+
+# Nombres de las métricas conocidas: (clave en baseline, tipo de anomalía, descripción)
+METRIC_LABELS = {
+    "cpu_percent": ("cpu", "cpu_anomaly", "Uso de CPU anómalo"),
+    "memory_percent": ("memory", "memory_anomaly", "Uso de memoria anómalo"),
+}
+
+
+def _metric_labels(metric: str) -> tuple:
+    """Nombre en la línea base, tipo de anomalía y descripción de una métrica"""
+    return METRIC_LABELS.get(metric, (metric, f"{metric}_anomaly", f"Valor anómalo de {metric}"))
 
 
 class AnomalyDetector:
@@ -15,6 +33,14 @@ class AnomalyDetector:
     
     Preparado para integrar modelos de IA en el futuro para
     detectar comportamientos anómalos en el sistema.
+    
+    La línea base de cada métrica se mantiene con estadísticas
+    incrementales, de modo que añadir una muestra y analizar otra
+    cuestan lo mismo sea cual sea el tamaño del historial. Además de la
+    regla de 2σ por métrica, el vector de métricas registradas se
+    puntúa con la distancia de Mahalanobis. Con la línea base
+    estacional, cada métrica se compara con lo habitual a esa hora de la
+    semana y con su EWMA a corto plazo en lugar de con la media plana.
     """
     
     def __init__(self, config: Optional[ConfigManager] = None):
@@ -28,32 +54,118 @@ class AnomalyDetector:
         self.config = config or ConfigManager()
         self.enabled = self.config.get("ai.anomaly_detection", False)
         
-        # Historial de métricas para análisis
-        self.history: List[Dict[str, Any]] = []
-        self.max_history_size = 1000
+        # Historial de métricas para análisis: arrays columnares preasignados
+        self.max_history_size = int(self.config.get("ai.anomaly_config.window", 1000))
+        self.metrics: List[str] = list(self.config.get("ai.anomaly_config.metrics", DEFAULT_METRICS))
+        self.history = MetricStore(self.max_history_size, columns=self.metrics)
+        self.min_history_size = int(self.config.get("ai.anomaly_config.min_history_size", 10))
+        
+        # Estadísticas incrementales por métrica (window, ewm o cumulative)
+        self.stats_mode = self.config.get("ai.anomaly_config.stats_mode", "window")
+        self.halflife = self.config.get("ai.anomaly_config.halflife")
+        self.stats = {metric: self._new_stats() for metric in self.metrics}
+        
+        # Puntuación multivariante (media y covarianza incrementales)
+        self.scorer: Optional[MahalanobisScorer] = None
+        if self.config.get("ai.anomaly_config.multivariate", True):
+            self.scorer = MahalanobisScorer(
+                self.metrics,
+                halflife=self._covariance_halflife(),
+                probability=float(self.config.get("ai.anomaly_config.probability", 0.999)),
+                min_samples=max(self.min_history_size, 3 * len(self.metrics))
+            )
+        
+        # Línea base por hora de la semana y modelo EWMA a corto plazo
+        self.seasonal: Optional[SeasonalBaseline] = None
+        self.seasonal_threshold = float(self.config.get("ai.anomaly_config.seasonal.threshold", 3.0))
+        if self.config.get("ai.anomaly_config.seasonal.enabled", True):
+            self.seasonal = SeasonalBaseline(
+                self.metrics,
+                halflife_weeks=float(self.config.get("ai.anomaly_config.seasonal.halflife_weeks", 4)),
+                short_halflife=float(self.config.get("ai.anomaly_config.seasonal.short_halflife", 10)),
+                min_samples=float(self.config.get("ai.anomaly_config.seasonal.min_samples", 5))
+            )
         
         self.logger.info(
             f"AnomalyDetector inicializado (enabled={self.enabled})",
             module="AnomalyDetector"
         )
     
+    def _covariance_halflife(self) -> Optional[float]:
+        """
+        Vida media de la línea base multivariante según stats_mode.
+        
+        En modo window se usa el decaimiento con el mismo centro de masa
+        que la ventana (alpha = 2 / (window + 1)), para que la covarianza
+        olvide al mismo ritmo que las estadísticas por métrica.
+        """
+        if self.stats_mode == "cumulative":
+            return None
+        if self.stats_mode == "ewm":
+            return self.halflife or self.max_history_size / 10
+        alpha = 2 / (self.max_history_size + 1)
+        return float(np.log(0.5) / np.log(1 - alpha))
+    
+    def _new_stats(self):
+        """Crea el acumulador de estadísticas de una métrica"""
+        return create_stats(self.stats_mode, self.max_history_size, self.halflife)
+    
+    def register_metric(self, metric: str) -> bool:
+        """
+        Añade una métrica al análisis (p. ej. conexiones o E/S de disco).
+        
+        La línea base multivariante se reinicia para incluirla.
+        
+        Args:
+            metric: Clave de la métrica en las muestras
+            
+        Returns:
+            bool: True si la métrica es nueva
+        """
+        if metric in self.stats:
+            return False
+        self.metrics.append(metric)
+        self.stats[metric] = self._new_stats()
+        self.history.register(metric)
+        if self.scorer:
+            self.scorer.register(metric)
+        if self.seasonal:
+            self.seasonal.register(metric)
+        return True
+    
     def add_metrics(self, metrics: Dict[str, Any]):
         """
         Añade métricas al historial para análisis.
         
         Args:
-            metrics: Métricas del sistema a analizar
+            metrics: Métricas del sistema a analizar (una clave numérica
+                'timestamp' se usa como marca de tiempo epoch)
         """
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "metrics": metrics
-        }
+        timestamp = self._timestamp(metrics)
+        
+        # El almacén descarta la muestra más antigua al llenarse
+        self.history.append(
+            {k: v for k, v in metrics.items() if k != "timestamp"}, timestamp
+        )
         
-        self.history.append(entry)
+        for metric, stats in self.stats.items():
+            value = metrics.get(metric)
+            if isinstance(value, (int, float)):
+                stats.update(float(value))
         
-        # Mantener tamaño del historial
-        if len(self.history) > self.max_history_size:
-            self.history = self.history[-self.max_history_size:]
+        if self.scorer:
+            self.scorer.update(metrics)
+        
+        if self.seasonal:
+            self.seasonal.update(metrics, timestamp)
+    
+    @staticmethod
+    def _timestamp(metrics: Dict[str, Any]) -> float:
+        """Marca de tiempo de una muestra (clave numérica 'timestamp' o ahora)"""
+        timestamp = metrics.get("timestamp")
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            return float(timestamp)
+        return time.time()
     
     def detect_anomalies(self, current_metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -74,76 +186,184 @@ class AnomalyDetector:
         # En el futuro, aquí se integrarían modelos de ML
         
         # Por ahora, hacemos análisis estadístico simple
-        anomalies.extend(self._statistical_analysis(current_metrics))
+        seasonal = self._seasonal_scores(current_metrics)
+        anomalies.extend(self._statistical_analysis(current_metrics, seasonal))
+        anomalies.extend(self._multivariate_analysis(current_metrics, seasonal))
         
         return anomalies
     
-    def _statistical_analysis(self, current_metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def score_samples(self, samples: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Distancia de Mahalanobis de un lote de muestras, en una sola
+        operación matricial.
+        
+        Args:
+            samples: Muestras de métricas
+            
+        Returns:
+            Array con una distancia por muestra (vacío sin línea base)
+        """
+        if not self.scorer or not samples:
+            return np.empty(0)
+        matrix = np.array([[s.get(m, np.nan) for m in self.metrics] for s in samples], dtype=float)
+        return self.scorer.score(matrix)
+    
+    def score_window(self, last: Optional[int] = None) -> np.ndarray:
+        """
+        Distancia de Mahalanobis de las muestras del historial.
+        
+        Args:
+            last: Solo las últimas N muestras
+            
+        Returns:
+            Array con una distancia por muestra (vacío sin línea base)
+        """
+        if not self.scorer:
+            return np.empty(0)
+        rows = [self.history.columns.index(m) for m in self.metrics]
+        return self.scorer.score(self.history.window(last)[rows].T)
+    
+    def _seasonal_scores(self, current_metrics: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Puntúa las métricas actuales frente a su hora de la semana.
+        
+        Returns:
+            Puntuaciones de SeasonalBaseline.score más 'timestamp', o None
+            sin línea base estacional
+        """
+        if not self.seasonal:
+            return None
+        timestamp = self._timestamp(current_metrics)
+        scores = self.seasonal.score(current_metrics, timestamp)
+        scores["timestamp"] = timestamp
+        return scores
+    
+    def _seasonally_expected(self, current_metrics: Dict[str, Any], seasonal: Optional[Dict[str, Any]]) -> bool:
+        """Indica si todas las métricas presentes son lo habitual a esa hora"""
+        if seasonal is None:
+            return False
+        present = [i for i, metric in enumerate(self.metrics) if metric in current_metrics]
+        return bool(present) and all(
+            seasonal["ready"][i] and abs(seasonal["seasonal"][i]) <= self.seasonal_threshold
+            for i in present
+        )
+    
+    def _multivariate_analysis(
+        self,
+        current_metrics: Dict[str, Any],
+        seasonal: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Análisis conjunto de las métricas con la distancia de Mahalanobis.
+        
+        La línea base multivariante no distingue la hora: si la línea base
+        estacional explica la muestra (p. ej. una copia nocturna), no se
+        puntúa.
+        
+        Args:
+            current_metrics: Métricas actuales
+            seasonal: Puntuaciones estacionales de la muestra
+            
+        Returns:
+            Lista con la anomalía multivariante, si la hay
+        """
+        if not self.scorer or not self.scorer.ready:
+            return []
+        if self._seasonally_expected(current_metrics, seasonal):
+            return []
+        
+        distance = float(self.scorer.score(current_metrics)[0])
+        threshold = self.scorer.threshold
+        if distance <= threshold:
+            return []
+        
+        contributions = self.scorer.contributions(current_metrics)
+        top = sorted(contributions, key=contributions.get, reverse=True)[:3]
+        return [{
+            "type": "multivariate_anomaly",
+            "severity": "high" if distance > 2 * threshold else "medium",
+            "message": (
+                f"Combinación de métricas anómala (distancia {distance:.1f}, "
+                f"umbral {threshold:.1f}): {', '.join(top)}"
+            ),
+            "details": {
+                "distance": distance,
+                "threshold": threshold,
+                "contributions": contributions
+            }
+        }]
+    
+    def _statistical_analysis(
+        self,
+        current_metrics: Dict[str, Any],
+        seasonal: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Análisis estadístico básico de métricas.
         
+        Si el cubo de la hora de la semana tiene datos suficientes, un
+        valor es anómalo cuando se aleja más de seasonal_threshold
+        desviaciones tanto del cubo como del EWMA a corto plazo; si no,
+        se usa la regla de 2σ sobre la línea base plana.
+        
         Args:
             current_metrics: Métricas actuales
+            seasonal: Puntuaciones estacionales de la muestra
             
         Returns:
             Lista de anomalías detectadas
         """
         anomalies = []
         
-        if len(self.history) < 10:
-            # No hay suficiente historial para análisis
-            return anomalies
-        
-        # Analizar CPU
-        if "cpu_percent" in current_metrics:
-            cpu_values = [
-                h["metrics"].get("cpu_percent", 0) 
-                for h in self.history 
-                if "cpu_percent" in h["metrics"]
-            ]
+        for index, metric in enumerate(self.metrics):
+            if metric not in current_metrics:
+                continue
+            _, anomaly_type, label = _metric_labels(metric)
+            unit = "%" if metric.endswith("_percent") else ""
+            current = current_metrics[metric]
             
-            if cpu_values:
-                mean_cpu = np.mean(cpu_values)
-                std_cpu = np.std(cpu_values)
-                current_cpu = current_metrics["cpu_percent"]
-                
-                # Detectar si el valor actual está fuera de 2 desviaciones estándar
-                if abs(current_cpu - mean_cpu) > 2 * std_cpu:
+            if seasonal is not None and seasonal["ready"][index]:
+                z = float(seasonal["seasonal"][index])
+                short_z = float(seasonal["short"][index])
+                if min(abs(z), abs(short_z)) > self.seasonal_threshold:
+                    expected = float(seasonal["expected"][index])
+                    timestamp = seasonal["timestamp"]
+                    hour = time.strftime("%a %H:00", time.localtime(timestamp))
                     anomalies.append({
-                        "type": "cpu_anomaly",
+                        "type": anomaly_type,
                         "severity": "medium",
-                        "message": f"Uso de CPU anómalo: {current_cpu:.1f}% (media: {mean_cpu:.1f}%)",
+                        "message": f"{label}: {current:.1f}{unit} (habitual {hour}: {expected:.1f}{unit})",
                         "details": {
-                            "current": current_cpu,
-                            "mean": mean_cpu,
-                            "std_dev": std_cpu
+                            "current": current,
+                            "mean": expected,
+                            "std_dev": float(seasonal["std"][index]),
+                            "baseline": "seasonal",
+                            "hour_of_week": hour_of_week(timestamp),
+                            "zscore": z,
+                            "short_term_zscore": short_z
                         }
                     })
-        
-        # Analizar memoria
-        if "memory_percent" in current_metrics:
-            memory_values = [
-                h["metrics"].get("memory_percent", 0) 
-                for h in self.history 
-                if "memory_percent" in h["metrics"]
-            ]
+                continue
             
-            if memory_values:
-                mean_memory = np.mean(memory_values)
-                std_memory = np.std(memory_values)
-                current_memory = current_metrics["memory_percent"]
-                
-                if abs(current_memory - mean_memory) > 2 * std_memory:
-                    anomalies.append({
-                        "type": "memory_anomaly",
-                        "severity": "medium",
-                        "message": f"Uso de memoria anómalo: {current_memory:.1f}% (media: {mean_memory:.1f}%)",
-                        "details": {
-                            "current": current_memory,
-                            "mean": mean_memory,
-                            "std_dev": std_memory
-                        }
-                    })
+            stats = self.stats[metric]
+            if stats.count < self.min_history_size:
+                # No hay suficiente historial para análisis
+                continue
+            
+            mean, std = stats.mean, stats.std
+            
+            # Detectar si el valor actual está fuera de 2 desviaciones estándar
+            if abs(current - mean) > 2 * std:
+                anomalies.append({
+                    "type": anomaly_type,
+                    "severity": "medium",
+                    "message": f"{label}: {current:.1f}{unit} (media: {mean:.1f}{unit})",
+                    "details": {
+                        "current": current,
+                        "mean": mean,
+                        "std_dev": std
+                    }
+                })
         
         return anomalies
     
@@ -152,34 +372,53 @@ class AnomalyDetector:
         Obtiene la línea base de métricas del sistema.
         
         Returns:
-            Dict con métricas promedio del historial
+            Dict con media, desviación, mínimo, máximo y percentiles
+            50/95/99 del historial por métrica
         """
-        if not self.history:
-            return {}
-        
-        # Calcular promedios
-        cpu_values = [h["metrics"].get("cpu_percent", 0) for h in self.history if "cpu_percent" in h["metrics"]]
-        memory_values = [h["metrics"].get("memory_percent", 0) for h in self.history if "memory_percent" in h["metrics"]]
-        
         baseline = {}
+        for metric in self.metrics:
+            name = _metric_labels(metric)[0]
+            stats = self.stats[metric]
+            if stats.count:
+                baseline[name] = stats.to_dict()
+                for q, value in self.history.percentiles(metric, (50, 95, 99)).items():
+                    baseline[name][f"p{q}"] = value
+        return baseline
+    
+    def get_percentiles(
+        self,
+        metric: str,
+        q: Sequence[float] = (50, 90, 95, 99),
+        last: Optional[int] = None
+    ) -> Dict[float, float]:
+        """
+        Percentiles de una métrica en el historial.
         
-        if cpu_values:
-            baseline["cpu"] = {
-                "mean": np.mean(cpu_values),
-                "std": np.std(cpu_values),
-                "min": np.min(cpu_values),
-                "max": np.max(cpu_values)
-            }
-        
-        if memory_values:
-            baseline["memory"] = {
-                "mean": np.mean(memory_values),
-                "std": np.std(memory_values),
-                "min": np.min(memory_values),
-                "max": np.max(memory_values)
-            }
+        Args:
+            metric: Métrica (p. ej. 'cpu_percent')
+            q: Percentiles a calcular
+            last: Solo las últimas N muestras
+            
+        Returns:
+            Dict percentil -> valor
+        """
+        return self.history.percentiles(metric, q, last)
+    
+    def score_history(self, metric: str, last: Optional[int] = None) -> np.ndarray:
+        """
+        Puntuaciones z de las muestras del historial frente a la línea base.
         
-        return baseline
+        Args:
+            metric: Métrica (p. ej. 'cpu_percent')
+            last: Solo las últimas N muestras
+            
+        Returns:
+            Array con una puntuación por muestra (NaN si falta el valor)
+        """
+        stats = self.stats.get(metric)
+        if stats is None or not stats.count:
+            return np.empty(0)
+        return self.history.zscores(metric, stats.mean, stats.std, last)
     
     def enable(self):
         """Habilita el detector de anomalías"""
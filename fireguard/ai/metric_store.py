@@ -0,0 +1,225 @@
+"""
+Metric Store - Historial columnar de métricas
+
+Historial de capacidad fija guardado en arrays de NumPy preasignados:
+una columna por métrica más una de marcas de tiempo (epoch). Las
+muestras se escriben de forma lineal en un array algo mayor que la
+capacidad; al llegar al final, las últimas 'capacity' muestras se
+copian al principio (coste amortizado O(1)). Así las ventanas de las
+muestras más recientes son siempre un tramo contiguo y se devuelven
+como vistas, sin copiar, listas para operaciones vectorizadas.
+"""
+
+import time
+from typing import Dict, Any, List, Optional, Sequence, Union
+import numpy as np
+
+TimeValue = Union[None, float, int]
+
+
+class MetricStore:
+    """
+    Buffer circular columnar de métricas.
+    
+    Las métricas se registran como columnas al aparecer por primera
+    vez; los valores ausentes en una muestra quedan como NaN. Las vistas
+    devueltas son válidas hasta la siguiente inserción: para conservar
+    una ventana hay que copiarla.
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 1000,
+        columns: Sequence[str] = (),
+        dtype: Any = np.float32,
+        slack: Optional[int] = None
+    ):
+        """
+        Inicializa el almacén.
+        
+        Args:
+            capacity: Número máximo de muestras retenidas
+            columns: Métricas iniciales
+            dtype: Tipo de los valores (float32 basta para porcentajes)
+            slack: Muestras extra antes de compactar (por defecto la
+                mitad de la capacidad)
+        """
+        if capacity < 1:
+            raise ValueError("La capacidad del almacén de métricas debe ser positiva")
+        
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._size = capacity + max(1, slack if slack is not None else capacity // 2)
+        self._times = np.empty(self._size, dtype=np.float64)
+        self._values = np.empty((0, self._size), dtype=self.dtype)
+        self._columns: Dict[str, int] = {}
+        self._start = 0
+        self._end = 0
+        self._last_time = -np.inf
+        for name in columns:
+            self._add_column(name)
+    
+    def __len__(self) -> int:
+        return self._end - self._start
+    
+    @property
+    def columns(self) -> List[str]:
+        """Métricas registradas"""
+        return list(self._columns)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memoria ocupada por los arrays"""
+        return self._times.nbytes + self._values.nbytes
+    
+    def register(self, name: str) -> bool:
+        """
+        Registra una métrica antes de su primera muestra.
+        
+        Returns:
+            bool: True si la métrica es nueva
+        """
+        if name in self._columns:
+            return False
+        self._add_column(name)
+        return True
+    
+    def append(self, metrics: Dict[str, Any], timestamp: TimeValue = None):
+        """
+        Añade una muestra.
+        
+        Args:
+            metrics: Métricas de la muestra (se ignoran las no numéricas)
+            timestamp: Marca de tiempo epoch (por defecto time.time())
+        """
+        if self._end == self._size:
+            self._compact()
+        
+        row = self._end
+        self._values[:, row] = np.nan
+        for name, value in metrics.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                index = self._columns.get(name)
+                if index is None:
+                    index = self._add_column(name)
+                self._values[index, row] = value
+        
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        # Las marcas se guardan no decrecientes para las búsquedas binarias
+        self._last_time = max(self._last_time, timestamp)
+        self._times[row] = self._last_time
+        
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+    
+    def column(self, name: str, last: Optional[int] = None, since: TimeValue = None) -> np.ndarray:
+        """
+        Vista de los valores de una métrica.
+        
+        Args:
+            name: Métrica
+            last: Solo las últimas N muestras
+            since: Solo las muestras desde esta marca de tiempo
+        
+        Returns:
+            Vista (sin copia) en orden cronológico; vacía si la métrica
+            no existe
+        """
+        index = self._columns.get(name)
+        if index is None:
+            return np.empty(0, dtype=self.dtype)
+        start, end = self._range(last, since)
+        return self._values[index, start:end]
+    
+    def timestamps(self, last: Optional[int] = None, since: TimeValue = None) -> np.ndarray:
+        """Vista de las marcas de tiempo (epoch) de las muestras"""
+        start, end = self._range(last, since)
+        return self._times[start:end]
+    
+    def window(self, last: Optional[int] = None, since: TimeValue = None) -> np.ndarray:
+        """
+        Vista de todas las métricas de una ventana.
+        
+        Returns:
+            Array (métricas x muestras) en el orden de columns
+        """
+        start, end = self._range(last, since)
+        return self._values[:, start:end]
+    
+    def stats(self, name: str, last: Optional[int] = None, since: TimeValue = None) -> Dict[str, float]:
+        """
+        Estadísticas de una métrica en una ventana (ignorando NaN).
+        
+        Returns:
+            Dict con count, mean, std, min y max (vacío sin datos)
+        """
+        values = self.column(name, last, since)
+        valid = values[~np.isnan(values)]
+        if not valid.size:
+            return {}
+        # Acumular en float64 aunque el almacén use float32
+        return {
+            "count": int(valid.size),
+            "mean": float(valid.mean(dtype=np.float64)),
+            "std": float(valid.std(dtype=np.float64)),
+            "min": float(valid.min()),
+            "max": float(valid.max()),
+        }
+    
+    def percentiles(
+        self,
+        name: str,
+        q: Sequence[float] = (50, 90, 95, 99),
+        last: Optional[int] = None,
+        since: TimeValue = None
+    ) -> Dict[float, float]:
+        """
+        Percentiles de una métrica en una ventana (ignorando NaN).
+        
+        Returns:
+            Dict percentil -> valor (vacío sin datos)
+        """
+        values = self.column(name, last, since)
+        valid = values[~np.isnan(values)]
+        if not valid.size:
+            return {}
+        return dict(zip(q, np.percentile(valid, q).tolist()))
+    
+    def zscores(self, name: str, mean: float, std: float, last: Optional[int] = None) -> np.ndarray:
+        """
+        Puntuaciones z de las muestras de una ventana frente a una línea base.
+        
+        Returns:
+            Array de |valor - media| / desviación (NaN en valores ausentes)
+        """
+        values = self.column(name, last).astype(np.float64)
+        return np.abs(values - mean) / (std if std > 0 else np.inf)
+    
+    def clear(self):
+        """Vacía el almacén (conserva las columnas)"""
+        self._start = self._end = 0
+        self._last_time = -np.inf
+    
+    def _add_column(self, name: str) -> int:
+        """Registra una métrica nueva (NaN en las muestras anteriores)"""
+        row = np.full((1, self._size), np.nan, dtype=self.dtype)
+        self._values = np.vstack([self._values, row])
+        index = self._columns[name] = len(self._columns)
+        return index
+    
+    def _compact(self):
+        """Mueve las muestras retenidas al principio de los arrays"""
+        count = self._end - self._start
+        self._times[:count] = self._times[self._start:self._end]
+        self._values[:, :count] = self._values[:, self._start:self._end]
+        self._start, self._end = 0, count
+    
+    def _range(self, last: Optional[int], since: TimeValue) -> tuple:
+        """Tramo [inicio, fin) de una ventana"""
+        start, end = self._start, self._end
+        if last is not None:
+            start = max(start, end - int(last))
+        if since is not None:
+            start = max(start, int(np.searchsorted(self._times[start:end], float(since), "left")) + start)
+        return start, end
@@ -0,0 +1,241 @@
+"""
+Multivariate - Puntuación de anomalías multivariante
+
+Mantiene de forma incremental el vector de medias y la matriz de
+covarianza de un conjunto de métricas y puntúa muestras con la
+distancia de Mahalanobis. Una muestra es anómala cuando la combinación
+de sus valores es improbable, aunque cada métrica por separado esté
+dentro de lo normal (p. ej. muchas conexiones con la CPU en reposo).
+
+Todo el trabajo es matricial: añadir métricas cambia el tamaño de los
+arrays, no el número de operaciones en Python.
+"""
+
+import math
+from typing import Dict, Any, List, Optional, Sequence, Union
+import numpy as np
+
+# Cuantil de la normal estándar para cada probabilidad de umbral
+_NORMAL_QUANTILES = {0.99: 2.326, 0.995: 2.576, 0.999: 3.090, 0.9999: 3.719}
+
+
+def chi2_quantile(dof: int, probability: float = 0.999) -> float:
+    """
+    Cuantil aproximado de la chi-cuadrado (Wilson-Hilferty).
+    
+    Args:
+        dof: Grados de libertad (número de métricas)
+        probability: Probabilidad acumulada (0.99, 0.995, 0.999 o 0.9999)
+    
+    Returns:
+        Valor de la distancia de Mahalanobis al cuadrado para el umbral
+    """
+    z = _NORMAL_QUANTILES.get(probability)
+    if z is None:
+        raise ValueError(f"Probabilidad no soportada: {probability}")
+    k = float(dof)
+    return k * (1 - 2 / (9 * k) + z * math.sqrt(2 / (9 * k))) ** 3
+
+
+class OnlineCovariance:
+    """
+    Media y covarianza incrementales (Welford multivariante).
+    
+    Con halflife las muestras antiguas pierden peso de forma
+    exponencial, de modo que la línea base sigue cambios lentos.
+    """
+    
+    def __init__(self, dim: int, halflife: Optional[float] = None):
+        """
+        Args:
+            dim: Número de métricas
+            halflife: Vida media en muestras (None = acumulada)
+        """
+        self.dim = dim
+        self.alpha = 1 - 0.5 ** (1 / halflife) if halflife else None
+        self.count = 0
+        self.mean = np.zeros(dim)
+        self._m2 = np.zeros((dim, dim))
+    
+    @property
+    def covariance(self) -> np.ndarray:
+        """Matriz de covarianza poblacional"""
+        if self.alpha is not None:
+            return self._m2.copy()
+        return self._m2 / self.count if self.count else np.zeros((self.dim, self.dim))
+    
+    def update(self, sample: np.ndarray):
+        """Añade una muestra (vector de dim valores)"""
+        self.count += 1
+        delta = sample - self.mean
+        if self.alpha is None:
+            self.mean += delta / self.count
+            self._m2 += np.outer(delta, sample - self.mean)
+        elif self.count == 1:
+            self.mean = sample.astype(float)
+        else:
+            self.mean += self.alpha * delta
+            self._m2 = (1 - self.alpha) * (self._m2 + self.alpha * np.outer(delta, delta))
+    
+    def update_batch(self, samples: np.ndarray):
+        """
+        Añade un lote de muestras (matriz n x dim) con una sola
+        combinación de momentos (Chan et al.) en el modo acumulado.
+        """
+        if not len(samples):
+            return
+        if self.alpha is not None:
+            for sample in samples:
+                self.update(sample)
+            return
+        
+        n = len(samples)
+        batch_mean = samples.mean(axis=0)
+        centered = samples - batch_mean
+        batch_m2 = centered.T @ centered
+        
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self._m2 += batch_m2 + np.outer(delta, delta) * (self.count * n / total)
+        self.mean += delta * (n / total)
+        self.count = total
+
+
+class MahalanobisScorer:
+    """
+    Puntuación de Mahalanobis sobre un vector de métricas registradas.
+    
+    La inversa de la covarianza se recalcula solo cuando cambia la
+    línea base. Cada varianza tiene un mínimo (absoluto y relativo a la
+    media), de modo que una métrica casi constante no convierte una
+    variación mínima en una distancia enorme, y una pequeña
+    regularización evita que las métricas colineales la hagan singular.
+    """
+    
+    def __init__(
+        self,
+        metrics: Sequence[str],
+        halflife: Optional[float] = None,
+        probability: float = 0.999,
+        min_samples: int = 30,
+        regularization: float = 1e-6,
+        min_std: float = 0.5,
+        min_relative_std: float = 0.05
+    ):
+        """
+        Inicializa el puntuador.
+        
+        Args:
+            metrics: Métricas del vector, en orden
+            halflife: Vida media en muestras de la línea base (None = acumulada)
+            probability: Probabilidad del umbral de anomalía
+            min_samples: Muestras necesarias antes de puntuar
+            regularization: Fracción de la varianza media añadida a la
+                diagonal de la covarianza
+            min_std: Desviación mínima de cada métrica
+            min_relative_std: Desviación mínima relativa a la media
+        """
+        self.metrics: List[str] = list(metrics)
+        self.halflife = halflife
+        self.probability = probability
+        self.min_samples = min_samples
+        self.regularization = regularization
+        self.min_std = min_std
+        self.min_relative_std = min_relative_std
+        self._reset()
+    
+    @property
+    def ready(self) -> bool:
+        """Hay muestras suficientes para puntuar"""
+        return self.baseline.count >= self.min_samples
+    
+    @property
+    def threshold(self) -> float:
+        """Distancia a partir de la que una muestra es anómala"""
+        return math.sqrt(chi2_quantile(len(self.metrics), self.probability))
+    
+    def register(self, metric: str) -> bool:
+        """
+        Añade una métrica al vector (reinicia la línea base).
+        
+        Returns:
+            bool: True si la métrica es nueva
+        """
+        if metric in self.metrics:
+            return False
+        self.metrics.append(metric)
+        self._reset()
+        return True
+    
+    def vector(self, metrics: Dict[str, Any]) -> np.ndarray:
+        """Vector de una muestra (NaN en las métricas ausentes)"""
+        return np.array([metrics.get(m, np.nan) for m in self.metrics], dtype=float)
+    
+    def update(self, samples: Union[Dict[str, Any], np.ndarray]):
+        """
+        Actualiza la línea base con una muestra o un lote.
+        
+        Las muestras con alguna métrica ausente no se usan.
+        
+        Args:
+            samples: Dict de métricas, vector o matriz (n x métricas)
+        """
+        if isinstance(samples, dict):
+            samples = self.vector(samples)
+        samples = np.atleast_2d(np.asarray(samples, dtype=float))
+        complete = samples[~np.isnan(samples).any(axis=1)]
+        if len(complete) == 1:
+            self.baseline.update(complete[0])
+        else:
+            self.baseline.update_batch(complete)
+        self._inverse = None
+    
+    def score(self, samples: Union[Dict[str, Any], np.ndarray]) -> np.ndarray:
+        """
+        Distancia de Mahalanobis de una muestra o un lote.
+        
+        Las métricas ausentes se sustituyen por la media (no aportan
+        distancia).
+        
+        Args:
+            samples: Dict de métricas, vector o matriz (n x métricas)
+        
+        Returns:
+            Array con una distancia por muestra
+        """
+        if isinstance(samples, dict):
+            samples = self.vector(samples)
+        samples = np.atleast_2d(np.asarray(samples, dtype=float))
+        mean = self.baseline.mean
+        centered = np.where(np.isnan(samples), 0.0, samples - mean)
+        squared = np.einsum("ij,jk,ik->i", centered, self._precision(), centered)
+        return np.sqrt(np.maximum(squared, 0.0))
+    
+    def contributions(self, sample: Union[Dict[str, Any], np.ndarray]) -> Dict[str, float]:
+        """
+        Aportación de cada métrica a la distancia al cuadrado de una muestra.
+        
+        Returns:
+            Dict métrica -> aportación (suman la distancia al cuadrado)
+        """
+        if isinstance(sample, dict):
+            sample = self.vector(sample)
+        centered = np.nan_to_num(np.asarray(sample, dtype=float) - self.baseline.mean)
+        parts = centered * (self._precision() @ centered)
+        return dict(zip(self.metrics, parts.tolist()))
+    
+    def _precision(self) -> np.ndarray:
+        """Inversa regularizada de la covarianza (en caché)"""
+        if self._inverse is None:
+            covariance = self.baseline.covariance
+            diagonal = np.diag_indices_from(covariance)
+            floor = np.maximum(self.min_relative_std * np.abs(self.baseline.mean), self.min_std)
+            covariance[diagonal] = np.maximum(covariance[diagonal], floor ** 2)
+            ridge = self.regularization * float(np.trace(covariance)) / len(self.metrics)
+            covariance[diagonal] += ridge
+            self._inverse = np.linalg.pinv(covariance, hermitian=True)
+        return self._inverse
+    
+    def _reset(self):
+        self.baseline = OnlineCovariance(len(self.metrics), self.halflife)
+        self._inverse: Optional[np.ndarray] = None
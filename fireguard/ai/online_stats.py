@@ -0,0 +1,238 @@
+"""
+Online Stats - Estadísticas incrementales
+
+Media, varianza, mínimo y máximo actualizados en O(1) por muestra, sin
+guardar (o sin recorrer) el historial completo. Hay tres variantes con
+la misma interfaz (update, count, mean, variance, std, min, max):
+
+- RunningStats: acumuladas desde el inicio (algoritmo de Welford).
+- WindowedStats: sobre las últimas N muestras (Welford con retirada de
+  la muestra más antigua y recálculo periódico para acotar el error).
+- EWMStats: con decaimiento exponencial (media y varianza ponderadas
+  de West), útiles cuando la línea base debe seguir cambios lentos.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Any, Optional
+
+
+class RunningStats:
+    """Estadísticas acumuladas con el algoritmo de Welford"""
+    
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def update(self, value: float):
+        """Añade una muestra"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    @property
+    def variance(self) -> float:
+        """Varianza poblacional (como np.var)"""
+        return self._m2 / self.count if self.count else 0.0
+    
+    @property
+    def std(self) -> float:
+        """Desviación estándar poblacional (como np.std)"""
+        return math.sqrt(max(0.0, self.variance))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumen de las estadísticas"""
+        return _summary(self)
+
+
+class WindowedStats:
+    """
+    Estadísticas de las últimas size muestras.
+    
+    La media y la varianza se actualizan al entrar y salir cada muestra;
+    cada size actualizaciones se recalculan desde la ventana para que el
+    error de redondeo no se acumule (coste amortizado O(1)). El mínimo y
+    el máximo se mantienen con colas monótonas.
+    """
+    
+    __slots__ = ("size", "mean", "_m2", "_values", "_mins", "_maxs", "_seq", "_since_rebuild")
+    
+    def __init__(self, size: int = 1000):
+        if size < 1:
+            raise ValueError("El tamaño de la ventana debe ser positivo")
+        self.size = size
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._values: Deque[float] = deque()
+        # Colas monótonas de (secuencia, valor) para mínimo y máximo
+        self._mins: Deque[tuple] = deque()
+        self._maxs: Deque[tuple] = deque()
+        self._seq = 0
+        self._since_rebuild = 0
+    
+    @property
+    def count(self) -> int:
+        return len(self._values)
+    
+    def update(self, value: float):
+        """Añade una muestra, retirando la más antigua si la ventana está llena"""
+        values = self._values
+        if len(values) == self.size:
+            old = values.popleft()
+            n = len(values)
+            if n:
+                old_mean = self.mean
+                self.mean = (old_mean * (n + 1) - old) / n
+                self._m2 -= (old - old_mean) * (old - self.mean)
+            else:
+                self.mean = 0.0
+                self._m2 = 0.0
+        
+        values.append(value)
+        n = len(values)
+        delta = value - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (value - self.mean)
+        
+        seq = self._seq
+        self._seq += 1
+        first = seq - n + 1
+        mins, maxs = self._mins, self._maxs
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append((seq, value))
+        while mins[0][0] < first:
+            mins.popleft()
+        while maxs and maxs[-1][1] <= value:
+            maxs.pop()
+        maxs.append((seq, value))
+        while maxs[0][0] < first:
+            maxs.popleft()
+        
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.size:
+            self._rebuild()
+    
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else math.inf
+    
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else -math.inf
+    
+    @property
+    def variance(self) -> float:
+        """Varianza poblacional de la ventana"""
+        n = len(self._values)
+        return max(0.0, self._m2 / n) if n else 0.0
+    
+    @property
+    def std(self) -> float:
+        """Desviación estándar poblacional de la ventana"""
+        return math.sqrt(self.variance)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumen de las estadísticas"""
+        return _summary(self)
+    
+    def _rebuild(self):
+        """Recalcula media y varianza desde la ventana (en dos pasadas)"""
+        n = len(self._values)
+        self.mean = math.fsum(self._values) / n
+        self._m2 = math.fsum((v - self.mean) ** 2 for v in self._values)
+        self._since_rebuild = 0
+
+
+class EWMStats:
+    """
+    Estadísticas con decaimiento exponencial.
+    
+    Cada muestra pesa alpha y las anteriores se multiplican por
+    (1 - alpha); con halflife, alpha se calcula para que una muestra
+    pierda la mitad de su peso tras halflife muestras.
+    """
+    
+    __slots__ = ("alpha", "count", "mean", "_var", "min", "max")
+    
+    def __init__(self, alpha: Optional[float] = None, halflife: Optional[float] = None):
+        if alpha is None:
+            alpha = 1 - 0.5 ** (1 / halflife) if halflife else 0.05
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha debe estar en (0, 1]")
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self._var = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def update(self, value: float):
+        """Añade una muestra"""
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+        else:
+            delta = value - self.mean
+            increment = self.alpha * delta
+            self.mean += increment
+            self._var = (1 - self.alpha) * (self._var + delta * increment)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    @property
+    def variance(self) -> float:
+        """Varianza ponderada exponencialmente"""
+        return self._var
+    
+    @property
+    def std(self) -> float:
+        """Desviación estándar ponderada exponencialmente"""
+        return math.sqrt(max(0.0, self._var))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumen de las estadísticas"""
+        return _summary(self)
+
+
+def create_stats(mode: str = "window", window: int = 1000, halflife: Optional[float] = None):
+    """
+    Crea un acumulador de estadísticas.
+    
+    Args:
+        mode: cumulative, window o ewm
+        window: Tamaño de la ventana (modo window)
+        halflife: Vida media en muestras (modo ewm)
+    
+    Returns:
+        Acumulador con update(), mean, std, min y max
+    """
+    if mode == "window":
+        return WindowedStats(window)
+    if mode == "ewm":
+        return EWMStats(halflife=halflife or window / 10)
+    if mode == "cumulative":
+        return RunningStats()
+    raise ValueError(f"Modo de estadísticas desconocido: {mode}")
+
+
+def _summary(stats) -> Dict[str, Any]:
+    """Media, desviación, mínimo y máximo de un acumulador"""
+    return {
+        "mean": stats.mean,
+        "std": stats.std,
+        "min": stats.min,
+        "max": stats.max,
+    }
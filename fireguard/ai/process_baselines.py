@@ -0,0 +1,260 @@
+"""
+Process Baselines - Líneas base de comportamiento por proceso
+
+Aprende, para cada nombre de proceso, su consumo habitual de CPU y
+memoria, y detecta cuándo una instancia se sale de lo normal (p. ej.
+nginx usando diez veces su CPU habitual).
+
+Los datos viven en arrays de NumPy de capacidad fija indexados por
+fila; un diccionario de nombres internados da la fila de cada nombre.
+Cada escaneo se procesa en una pasada vectorizada: se puntúan todas las
+instancias vivas frente a la línea base de su nombre y después se
+actualizan las líneas base (media y varianza con decaimiento
+exponencial) con la media por nombre del escaneo. Los nombres que no se
+ven durante max_idle segundos se expulsan, y si la tabla se llena se
+reutilizan las filas de los vistos hace más tiempo.
+"""
+
+import sys
+import time
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+
+# Escala mínima (en puntos porcentuales) frente a la que se mide una
+# desviación: un proceso siempre inactivo tiene media y desviación ~0
+ABSOLUTE_FLOOR = 0.5
+
+
+class ProcessBaselines:
+    """
+    Tabla de líneas base por nombre de proceso.
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 4096,
+        metrics: Sequence[str] = ("cpu_percent", "memory_percent"),
+        halflife: float = 50.0,
+        min_samples: int = 10,
+        zscore: float = 4.0,
+        ratio: float = 3.0,
+        min_value: float = 5.0,
+        max_idle: float = 86400.0
+    ):
+        """
+        Inicializa la tabla.
+        
+        Args:
+            capacity: Número máximo de nombres con línea base
+            metrics: Métricas de cada proceso a seguir
+            halflife: Vida media de la línea base, en escaneos
+            min_samples: Escaneos necesarios antes de puntuar un nombre
+            zscore: Desviaciones sobre la media para considerar anomalía
+            ratio: Múltiplo mínimo de la media para considerar anomalía
+            min_value: Valor mínimo para considerar anomalía (evita
+                alertar por 0.1% -> 0.5%)
+            max_idle: Segundos sin ver un nombre antes de olvidarlo
+        """
+        if capacity < 1:
+            raise ValueError("La capacidad de la tabla de líneas base debe ser positiva")
+        
+        self.capacity = capacity
+        self.metrics = tuple(metrics)
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.min_samples = min_samples
+        self.zscore = zscore
+        self.ratio = ratio
+        self.min_value = min_value
+        self.max_idle = max_idle
+        
+        dim = len(self.metrics)
+        self._mean = np.zeros((capacity, dim))
+        self._var = np.zeros((capacity, dim))
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._last_seen = np.full(capacity, -np.inf)
+        self._names: List[Optional[str]] = [None] * capacity
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        
+        # Métricas
+        self.evicted = 0
+        self.last_tick_time = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+    
+    def baseline(self, name: str) -> Dict[str, Any]:
+        """
+        Línea base de un nombre de proceso.
+        
+        Returns:
+            Dict con muestras, media y desviación por métrica (vacío si
+            el nombre no se conoce)
+        """
+        row = self._rows.get(name)
+        if row is None:
+            return {}
+        return {
+            "samples": int(self._count[row]),
+            "mean": dict(zip(self.metrics, self._mean[row].tolist())),
+            "std": dict(zip(self.metrics, np.sqrt(self._var[row]).tolist())),
+        }
+    
+    def observe(self, processes: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Puntúa los procesos de un escaneo y actualiza las líneas base.
+        
+        Args:
+            processes: Procesos del escaneo (con 'name' y las métricas)
+            now: Instante del escaneo (por defecto time.time())
+        
+        Returns:
+            Lista de anomalías: proceso, métrica, valor, media,
+            desviación, puntuación z, referencia (la media, o
+            ABSOLUTE_FLOOR si es menor) y múltiplo de la referencia
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        self._expire(now)
+        
+        if not processes:
+            return []
+        
+        names = [sys.intern(p.get("name") or "?") for p in processes]
+        unique_names = list(dict.fromkeys(names))
+        name_rows = self._assign_rows(unique_names, now)
+        rows = np.fromiter((name_rows[n] for n in names), dtype=np.int64, count=len(names))
+        values = np.array(
+            [[p.get(m) or 0.0 for m in self.metrics] for p in processes], dtype=float
+        ).reshape(len(processes), len(self.metrics))
+        
+        tracked = rows >= 0
+        if not tracked.all():
+            processes = [p for p, keep in zip(processes, tracked.tolist()) if keep]
+            rows, values = rows[tracked], values[tracked]
+            if not processes:
+                return []
+        
+        anomalies = self._score(processes, rows, values)
+        self._update(rows, values, now)
+        
+        self.last_tick_time = time.perf_counter() - started
+        return anomalies
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas de la tabla.
+        
+        Returns:
+            Dict con nombres seguidos, capacidad, expulsiones y duración
+            del último escaneo
+        """
+        return {
+            "names": len(self._rows),
+            "capacity": self.capacity,
+            "evicted": self.evicted,
+            "last_tick_time": self.last_tick_time,
+        }
+    
+    def _score(self, processes: List[Dict[str, Any]], rows: np.ndarray, values: np.ndarray) -> List[Dict[str, Any]]:
+        """Compara cada instancia con la línea base de su nombre (antes de actualizarla)"""
+        mean = self._mean[rows]
+        std = np.sqrt(self._var[rows])
+        ready = (self._count[rows] >= self.min_samples)[:, None]
+        
+        # Un proceso siempre inactivo tiene desviación ~0: se usa un mínimo
+        # para que cualquier pico no dé una puntuación infinita
+        floor = np.maximum(std, np.maximum(0.1 * mean, ABSOLUTE_FLOOR))
+        z = (values - mean) / floor
+        flagged = (
+            ready
+            & (z >= self.zscore)
+            & (values >= self.ratio * mean)
+            & (values >= self.min_value)
+        )
+        
+        anomalies = []
+        for i, j in zip(*np.nonzero(flagged)):
+            m = float(mean[i, j])
+            reference = max(m, ABSOLUTE_FLOOR)
+            anomalies.append({
+                "process": processes[i],
+                "metric": self.metrics[j],
+                "value": float(values[i, j]),
+                "mean": m,
+                "std": float(std[i, j]),
+                "zscore": float(z[i, j]),
+                "reference": reference,
+                "ratio": float(values[i, j]) / reference,
+            })
+        return anomalies
+    
+    def _update(self, rows: np.ndarray, values: np.ndarray, now: float):
+        """Actualiza las líneas base con la media por nombre del escaneo"""
+        unique, inverse = np.unique(rows, return_inverse=True)
+        counts = np.bincount(inverse)
+        tick_mean = np.stack(
+            [np.bincount(inverse, weights=values[:, j]) for j in range(values.shape[1])], axis=1
+        ) / counts[:, None]
+        
+        mean = self._mean[unique]
+        var = self._var[unique]
+        first = (self._count[unique] == 0)[:, None]
+        
+        delta = tick_mean - mean
+        increment = self.alpha * delta
+        self._mean[unique] = np.where(first, tick_mean, mean + increment)
+        self._var[unique] = np.where(first, 0.0, (1 - self.alpha) * (var + delta * increment))
+        self._count[unique] += 1
+        self._last_seen[unique] = now
+    
+    def _assign_rows(self, names: List[str], now: float) -> Dict[str, int]:
+        """Obtiene la fila de cada nombre, creando las que falten"""
+        rows = self._rows
+        missing = [name for name in names if name not in rows]
+        if missing:
+            shortage = len(missing) - len(self._free)
+            if shortage > 0:
+                self._evict_oldest(shortage, keep=set(names))
+            for name in missing[:len(self._free)]:
+                row = self._free.pop()
+                rows[name] = row
+                self._names[row] = name
+                self._count[row] = 0
+                self._mean[row] = 0.0
+                self._var[row] = 0.0
+                self._last_seen[row] = now
+        
+        # Los nombres que no caben (más nombres vivos que capacidad) no se siguen
+        return {name: rows.get(name, -1) for name in names}
+    
+    def _evict_oldest(self, count: int, keep: set):
+        """Libera las filas de los nombres vistos hace más tiempo"""
+        used = np.array([row for name, row in self._rows.items() if name not in keep], dtype=np.int64)
+        if not used.size:
+            return
+        count = min(count, used.size)
+        oldest = used[np.argpartition(self._last_seen[used], count - 1)[:count]]
+        for row in oldest.tolist():
+            self._release(row)
+    
+    def _expire(self, now: float):
+        """Olvida los nombres no vistos en max_idle segundos"""
+        if not self._rows:
+            return
+        stale = np.nonzero(self._last_seen < now - self.max_idle)[0]
+        for row in stale.tolist():
+            if self._names[row] is not None:
+                self._release(row)
+    
+    def _release(self, row: int):
+        """Devuelve una fila a la lista libre"""
+        name = self._names[row]
+        del self._rows[name]
+        self._names[row] = None
+        self._last_seen[row] = -np.inf
+        self._free.append(row)
+        self.evicted += 1
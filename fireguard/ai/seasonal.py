@@ -0,0 +1,219 @@
+"""
+Seasonal - Líneas base estacionales por hora de la semana
+
+Los sistemas tienen ciclos: copias de seguridad nocturnas, trabajos por
+lotes, picos en horario laboral. Una línea base plana (media ± kσ de
+todo el historial) marca esos ciclos como anomalías una y otra vez.
+
+SeasonalBaseline guarda media y varianza de cada métrica en 168 cubos
+(hora de la semana, en hora local) dentro de arrays preasignados; cada
+muestra actualiza su cubo y se compara con él en O(1). El peso de las
+semanas anteriores decae con una vida media en semanas, de modo que los
+ciclos que cambian se reaprenden. Junto a ella se mantiene un modelo
+EWMA a corto plazo: un valor solo es anómalo si se aleja a la vez de lo
+habitual a esa hora y de lo observado en las últimas muestras (un
+trabajo que empieza tarde deja de alertar en cuanto se asienta).
+"""
+
+import time
+from typing import Dict, Any, List, Optional, Sequence, Union
+import numpy as np
+
+HOURS_PER_WEEK = 168
+SECONDS_PER_WEEK = 7 * 24 * 3600
+
+# Desviación mínima al puntuar: absoluta y relativa a la media (evita
+# puntuaciones infinitas en métricas constantes)
+MIN_STD = 0.5
+MIN_RELATIVE_STD = 0.05
+
+
+def hour_of_week(timestamp: Optional[float] = None) -> int:
+    """
+    Cubo de una marca de tiempo: 0 = lunes 00:00-00:59 (hora local).
+    
+    Args:
+        timestamp: Marca de tiempo epoch (por defecto ahora)
+    
+    Returns:
+        Hora de la semana (0-167)
+    """
+    local = time.localtime(timestamp)
+    return local.tm_wday * 24 + local.tm_hour
+
+
+class SeasonalBaseline:
+    """
+    Media y varianza por hora de la semana y EWMA a corto plazo.
+    
+    Todas las métricas se actualizan y puntúan juntas como vectores;
+    las métricas ausentes de una muestra (NaN) no se actualizan.
+    """
+    
+    def __init__(
+        self,
+        metrics: Sequence[str],
+        halflife_weeks: float = 4.0,
+        short_halflife: float = 10.0,
+        min_samples: float = 5.0
+    ):
+        """
+        Inicializa la línea base.
+        
+        Args:
+            metrics: Métricas del vector, en orden
+            halflife_weeks: Vida media del peso de cada cubo, en semanas
+            short_halflife: Vida media del modelo a corto plazo, en muestras
+            min_samples: Peso necesario en un cubo antes de usarlo
+        """
+        self.metrics: List[str] = list(metrics)
+        self.decay_rate = np.log(2) / (halflife_weeks * SECONDS_PER_WEEK)
+        self.short_alpha = 1 - 0.5 ** (1 / short_halflife)
+        self.min_samples = min_samples
+        
+        dim = len(self.metrics)
+        # Cubos: peso acumulado, media y suma de cuadrados ponderadas
+        self._weight = np.zeros((HOURS_PER_WEEK, dim))
+        self._mean = np.zeros((HOURS_PER_WEEK, dim))
+        self._m2 = np.zeros((HOURS_PER_WEEK, dim))
+        self._updated = np.full(HOURS_PER_WEEK, np.nan)
+        # Modelo a corto plazo
+        self._short_count = np.zeros(dim, dtype=np.int64)
+        self._short_mean = np.zeros(dim)
+        self._short_var = np.zeros(dim)
+    
+    def register(self, metric: str) -> bool:
+        """
+        Añade una métrica (sin historial).
+        
+        Returns:
+            bool: True si la métrica es nueva
+        """
+        if metric in self.metrics:
+            return False
+        self.metrics.append(metric)
+        self._weight = np.hstack([self._weight, np.zeros((HOURS_PER_WEEK, 1))])
+        self._mean = np.hstack([self._mean, np.zeros((HOURS_PER_WEEK, 1))])
+        self._m2 = np.hstack([self._m2, np.zeros((HOURS_PER_WEEK, 1))])
+        self._short_count = np.append(self._short_count, 0)
+        self._short_mean = np.append(self._short_mean, 0.0)
+        self._short_var = np.append(self._short_var, 0.0)
+        return True
+    
+    def vector(self, metrics: Dict[str, Any]) -> np.ndarray:
+        """Vector de una muestra (NaN en las métricas ausentes o no numéricas)"""
+        return np.array([_number(metrics.get(m)) for m in self.metrics], dtype=float)
+    
+    def update(self, sample: Union[Dict[str, Any], np.ndarray], timestamp: Optional[float] = None):
+        """
+        Añade una muestra a su cubo y al modelo a corto plazo.
+        
+        Args:
+            sample: Dict de métricas o vector
+            timestamp: Marca de tiempo epoch (por defecto time.time())
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        values = self.vector(sample) if isinstance(sample, dict) else np.asarray(sample, dtype=float)
+        present = ~np.isnan(values)
+        if not present.any():
+            return
+        
+        bucket = hour_of_week(timestamp)
+        last = self._updated[bucket]
+        if not np.isnan(last) and timestamp > last:
+            # Las semanas anteriores pierden peso; la media no cambia
+            factor = np.exp(-self.decay_rate * (timestamp - last))
+            self._weight[bucket] *= factor
+            self._m2[bucket] *= factor
+        self._updated[bucket] = timestamp if np.isnan(last) else max(last, timestamp)
+        
+        # Welford ponderado (peso 1 por muestra)
+        weight = self._weight[bucket]
+        mean = self._mean[bucket]
+        new_weight = np.where(present, weight + 1, weight)
+        delta = np.where(present, values - mean, 0.0)
+        new_mean = mean + np.divide(delta, new_weight, out=np.zeros_like(delta), where=new_weight > 0)
+        self._m2[bucket] += delta * np.where(present, values - new_mean, 0.0)
+        self._weight[bucket] = new_weight
+        self._mean[bucket] = new_mean
+        
+        # EWMA a corto plazo
+        first = present & (self._short_count == 0)
+        short_delta = np.where(present, values - self._short_mean, 0.0)
+        increment = self.short_alpha * short_delta
+        self._short_var = np.where(
+            present & ~first,
+            (1 - self.short_alpha) * (self._short_var + short_delta * increment),
+            self._short_var
+        )
+        self._short_mean = np.where(first, values, np.where(present, self._short_mean + increment, self._short_mean))
+        self._short_count += present
+    
+    def expected(self, timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Valores esperados a una hora.
+        
+        Args:
+            timestamp: Marca de tiempo epoch (por defecto ahora)
+        
+        Returns:
+            Dict con cubo, y por métrica media, desviación y peso del cubo
+        """
+        bucket = hour_of_week(timestamp)
+        weight = self._weight[bucket]
+        std = np.sqrt(np.divide(self._m2[bucket], weight, out=np.zeros_like(weight), where=weight > 0))
+        return {
+            "bucket": bucket,
+            "mean": dict(zip(self.metrics, self._mean[bucket].tolist())),
+            "std": dict(zip(self.metrics, std.tolist())),
+            "weight": dict(zip(self.metrics, weight.tolist())),
+        }
+    
+    def score(self, sample: Union[Dict[str, Any], np.ndarray], timestamp: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Puntúa una muestra frente a su cubo y al modelo a corto plazo.
+        
+        Args:
+            sample: Dict de métricas o vector
+            timestamp: Marca de tiempo epoch (por defecto ahora)
+        
+        Returns:
+            Dict de arrays por métrica: 'seasonal' y 'short' (puntuaciones
+            z), 'expected' y 'std' (del cubo) y 'ready' (cubo con peso
+            suficiente)
+        """
+        values = self.vector(sample) if isinstance(sample, dict) else np.asarray(sample, dtype=float)
+        bucket = hour_of_week(timestamp)
+        weight = self._weight[bucket]
+        mean = self._mean[bucket]
+        std = np.sqrt(np.divide(self._m2[bucket], weight, out=np.zeros_like(weight), where=weight > 0))
+        short_std = np.sqrt(np.maximum(self._short_var, 0.0))
+        return {
+            "seasonal": (values - mean) / _floor(std, mean),
+            "short": (values - self._short_mean) / _floor(short_std, self._short_mean),
+            "expected": mean,
+            "std": std,
+            "ready": (weight >= self.min_samples) & (self._short_count > 0) & ~np.isnan(values),
+        }
+    
+    def profile(self, metric: str) -> np.ndarray:
+        """
+        Media de una métrica en cada hora de la semana.
+        
+        Returns:
+            Array de 168 valores (NaN en los cubos sin datos)
+        """
+        index = self.metrics.index(metric)
+        return np.where(self._weight[:, index] > 0, self._mean[:, index], np.nan)
+
+
+def _number(value: Any) -> float:
+    """Valor numérico de una métrica (NaN si no lo es)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def _floor(std: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    """Desviación con un mínimo absoluto y relativo a la media"""
+    return np.maximum(std, np.maximum(MIN_RELATIVE_STD * np.abs(mean), MIN_STD))
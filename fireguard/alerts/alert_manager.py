@@ -6,10 +6,14 @@ clasificando, priorizando y procesando alertas de seguridad
 detectadas por el sistema FIREGUARD AI.
 """
 
+import itertools
 import logging
+import sys
+import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from enum import Enum
+from fireguard.alerts.alert_store import AlertStore
 
 
 class AlertLevel(Enum):
@@ -20,19 +24,42 @@ class AlertLevel(Enum):
     EMERGENCY = "emergency"
 
 
+# Identificadores monótonos de 64 bits: microsegundos del arranque más un
+# contador, de modo que no se repiten entre ejecuciones del proceso
+_alert_ids = itertools.count(time.time_ns() // 1000)
+
+
 class Alert:
     """
     Representa una alerta del sistema.
     
+    Registro compacto con __slots__: el origen y el tipo se internan para
+    que todas las alertas compartan la misma cadena, el nivel es el
+    miembro del enum y la marca de tiempo un único float (epoch) en
+    created_at; timestamp sigue devolviendo un datetime, como antes. El
+    diccionario solo se construye al llamar a to_dict().
+    
     Attributes:
-        id: Identificador único de la alerta
+        id: Identificador único y creciente de la alerta
         level: Nivel de severidad
         message: Mensaje descriptivo
-        timestamp: Momento de generación
+        created_at: Momento de generación (segundos desde epoch)
+        timestamp: Momento de generación como datetime local
         source: Origen de la alerta
+        type: Tipo de alerta (opcional)
+        details: Datos adicionales (se guardan por referencia, sin copiar)
     """
     
-    def __init__(self, level: AlertLevel, message: str, source: str):
+    __slots__ = ("id", "level", "message", "source", "type", "created_at", "details")
+    
+    def __init__(
+        self,
+        level: AlertLevel,
+        message: str,
+        source: str,
+        alert_type: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ):
         """
         Crea una nueva alerta.
         
@@ -40,22 +67,37 @@ class Alert:
             level: Nivel de severidad
             message: Mensaje descriptivo
             source: Origen de la alerta
+            alert_type: Tipo de alerta (opcional)
+            details: Datos adicionales (opcional)
         """
-        self.id = hash(f"{datetime.now()}{message}")
+        self.id = next(_alert_ids)
         self.level = level
         self.message = message
-        self.source = source
-        self.timestamp = datetime.now()
+        # Solo se internan cadenas: el origen puede ser None u otro objeto
+        self.source = sys.intern(source) if isinstance(source, str) else source
+        self.type = sys.intern(alert_type) if isinstance(alert_type, str) and alert_type else alert_type or None
+        self.created_at = time.time()
+        self.details = details
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Momento de generación como datetime local"""
+        return datetime.fromtimestamp(self.created_at)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convierte la alerta a diccionario."""
-        return {
+        record = {
             "id": self.id,
             "level": self.level.value,
             "message": self.message,
             "source": self.source,
             "timestamp": self.timestamp.isoformat()
         }
+        if self.type is not None:
+            record["type"] = self.type
+        if self.details is not None:
+            record["details"] = self.details
+        return record
 
 
 class AlertManager:
@@ -76,9 +118,20 @@ class AlertManager:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         self.alerts: List[Alert] = []
+        
+        # Histórico persistente en SQLite (opcional)
+        store_path = self.config.get('store_path')
+        self.store: Optional[AlertStore] = AlertStore(store_path) if store_path else None
         self.logger.info("AlertManager inicializado")
     
-    def create_alert(self, level: AlertLevel, message: str, source: str) -> Alert:
+    def create_alert(
+        self,
+        level: AlertLevel,
+        message: str,
+        source: str,
+        alert_type: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> Alert:
         """
         Crea y registra una nueva alerta.
         
@@ -86,12 +139,18 @@ class AlertManager:
             level: Nivel de severidad
             message: Mensaje descriptivo
             source: Origen de la alerta
+            alert_type: Tipo de alerta (opcional)
+            details: Datos adicionales (opcional)
             
         Returns:
             Alert: La alerta creada
         """
-        alert = Alert(level, message, source)
+        alert = Alert(level, message, source, alert_type, details)
         self.alerts.append(alert)
+        if self.store:
+            record = alert.to_dict()
+            record["severity"] = record["level"]
+            self.store.add(record)
         self.logger.log(
             self._get_log_level(level),
             f"[{source}] {message}"
@@ -112,6 +171,39 @@ class AlertManager:
             return [a for a in self.alerts if a.level == level]
         return self.alerts
     
+    def query_history(
+        self,
+        level: Optional[AlertLevel] = None,
+        source: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Consulta el histórico persistente de alertas.
+        
+        Args:
+            level: Nivel de severidad para filtrar (opcional)
+            source: Origen para filtrar (opcional)
+            since: Inicio del rango temporal (opcional)
+            until: Fin del rango temporal (opcional)
+            limit: Número máximo de alertas (opcional)
+            
+        Returns:
+            Lista de alertas como diccionarios (vacía sin histórico)
+        """
+        if not self.store:
+            return []
+        
+        self.store.flush()
+        return self.store.query(
+            severity=level.value if level else None,
+            source=source,
+            since=since,
+            until=until,
+            limit=limit
+        )
+    
     def clear_alerts(self) -> int:
         """
         Limpia todas las alertas almacenadas.
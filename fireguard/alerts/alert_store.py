@@ -0,0 +1,349 @@
+"""
+Alert Store - Almacenamiento persistente de alertas
+
+Guarda las alertas en una base de datos SQLite en modo WAL. Los
+productores solo añaden la alerta a una cola en memoria; un hilo
+escritor la vuelca en lotes, con una única transacción por intervalo de
+volcado, de modo que una avalancha de alertas no bloquea a los sensores.
+Las columnas de marca de tiempo, severidad, tipo y origen están
+indexadas para las consultas del histórico. Las alertas deduplicadas se
+guardan una sola vez por episodio: al volver a encolar el registro con
+más apariciones se actualiza la fila existente.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from fireguard.core.logger import Logger
+from fireguard.ai.alert_buffer import to_epoch, TimeBound
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    severity TEXT,
+    type TEXT,
+    source TEXT,
+    message TEXT,
+    fingerprint TEXT,
+    dedup_key TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts (severity, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_type ON alerts (type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_source ON alerts (source, timestamp);
+"""
+
+# Se crea tras migrar las bases de datos sin la columna dedup_key
+_DEDUP_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_dedup ON alerts (dedup_key)"
+
+_INSERT = (
+    "INSERT INTO alerts (timestamp, severity, type, source, message, fingerprint, dedup_key, data) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (dedup_key) DO UPDATE SET data = excluded.data"
+)
+
+
+class AlertStore:
+    """
+    Almacén de alertas en SQLite con escritura por lotes.
+    
+    add() no toca la base de datos: encola la alerta y vuelve. Las
+    consultas leen lo ya volcado; flush() fuerza el volcado pendiente.
+    Una alerta con huella (ver AlertDeduplicator) se identifica por
+    huella, primera aparición y severidad: volver a añadirla actualiza
+    su fila en lugar de duplicarla.
+    """
+    
+    def __init__(
+        self,
+        path: str = "data/alerts.db",
+        flush_interval: float = 0.5,
+        batch_size: int = 5000,
+        max_pending: int = 100000
+    ):
+        """
+        Inicializa el almacén y crea el esquema si no existe.
+        
+        Args:
+            path: Ruta del archivo SQLite
+            flush_interval: Segundos entre volcados
+            batch_size: Alertas pendientes que fuerzan un volcado anticipado
+            max_pending: Máximo de alertas en cola; al superarlo se
+                descartan las más antiguas
+        """
+        self.logger = Logger()
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executescript(_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(alerts)")}
+                if "dedup_key" not in columns:
+                    conn.execute("ALTER TABLE alerts ADD COLUMN dedup_key TEXT")
+                conn.execute(_DEDUP_INDEX)
+        finally:
+            conn.close()
+        
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._flush_requested = False
+        self._running = True
+        self._local = threading.local()
+        # Conexiones de lectura de todos los hilos, para cerrarlas en close()
+        self._readers: List[sqlite3.Connection] = []
+        
+        # Métricas
+        self.dropped = 0
+        self.batches = 0
+        self.last_batch_time = 0.0
+        
+        self._writer = threading.Thread(
+            target=self._write_loop, name="fireguard-alert-store", daemon=True
+        )
+        self._writer.start()
+    
+    def add(self, alert: Dict[str, Any]):
+        """
+        Encola una alerta para guardarla en el siguiente volcado.
+        
+        Args:
+            alert: Alerta a guardar
+        """
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+                self._written += 1  # Cuenta como procesada para flush()
+            self._pending.append(alert)
+            self._enqueued += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+    
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Vuelca inmediatamente las alertas pendientes.
+        
+        Args:
+            timeout: Espera máxima en segundos
+        
+        Returns:
+            bool: True si todas las alertas encoladas se han guardado
+        """
+        with self._cond:
+            target = self._enqueued
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+    
+    def close(self):
+        """Vuelca lo pendiente y detiene el hilo escritor"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._writer.join()
+        
+        with self._cond:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+    
+    def query(
+        self,
+        severity: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        source: Optional[str] = None,
+        since: TimeBound = None,
+        until: TimeBound = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Consulta el histórico de alertas.
+        
+        Args:
+            severity: Severidad exacta
+            alert_type: Tipo de alerta exacto
+            source: Origen exacto
+            since: Inicio del rango temporal (datetime, ISO o epoch)
+            until: Fin del rango temporal (datetime, ISO o epoch)
+            limit: Número máximo de alertas (las más recientes)
+        
+        Returns:
+            Lista de alertas en orden cronológico
+        """
+        where, params = self._where(severity, alert_type, source, since, until)
+        sql = f"SELECT data FROM alerts{where} ORDER BY timestamp DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        
+        rows = self._reader().execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+    
+    def count(self, **filters) -> int:
+        """
+        Cuenta las alertas guardadas (mismos filtros que query()).
+        
+        Returns:
+            Número de alertas
+        """
+        where, params = self._where(
+            filters.get("severity"), filters.get("alert_type"), filters.get("source"),
+            filters.get("since"), filters.get("until")
+        )
+        return self._reader().execute(f"SELECT COUNT(*) FROM alerts{where}", params).fetchone()[0]
+    
+    def summary(self, since: TimeBound = None, until: TimeBound = None) -> Dict[str, Any]:
+        """
+        Resume el histórico por severidad y tipo.
+        
+        Args:
+            since: Inicio del rango temporal
+            until: Fin del rango temporal
+        
+        Returns:
+            Dict con total, by_severity y by_type
+        """
+        where, params = self._where(None, None, None, since, until)
+        conn = self._reader()
+        
+        summary = {"total": 0, "by_severity": {}, "by_type": {}}
+        for column, key in (("severity", "by_severity"), ("type", "by_type")):
+            rows = conn.execute(
+                f"SELECT {column}, COUNT(*) FROM alerts{where} GROUP BY {column}", params
+            ).fetchall()
+            summary[key] = {value or "unknown": count for value, count in rows}
+        summary["total"] = sum(summary["by_severity"].values())
+        return summary
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del escritor.
+        
+        Returns:
+            Dict con alertas pendientes, guardadas, descartadas y lotes
+        """
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "written": self._written - self.dropped,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "last_batch_time": self.last_batch_time,
+            }
+    
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Abre una conexión con WAL y sincronización normal"""
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _reader(self) -> sqlite3.Connection:
+        """Conexión de lectura del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Solo la usa este hilo, pero close() la cierra desde otro
+            conn = self._local.conn = self._connect(check_same_thread=False)
+            with self._cond:
+                self._readers.append(conn)
+        return conn
+    
+    @staticmethod
+    def _where(severity, alert_type, source, since, until) -> tuple:
+        """Construye la cláusula WHERE de una consulta"""
+        clauses = []
+        params: List[Any] = []
+        
+        for column, value in (("severity", severity), ("type", alert_type), ("source", source)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        
+        since, until = to_epoch(since), to_epoch(until)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+    
+    @staticmethod
+    def _row(alert: Dict[str, Any]) -> tuple:
+        """Convierte una alerta en una fila de la tabla"""
+        timestamp = to_epoch(alert.get("timestamp"))
+        fingerprint = alert.get("fingerprint")
+        dedup_key = None
+        if fingerprint:
+            dedup_key = f"{fingerprint}|{alert.get('first_seen')}|{alert.get('severity')}"
+        return (
+            timestamp if timestamp is not None else time.time(),
+            alert.get("severity"),
+            alert.get("type"),
+            alert.get("source"),
+            alert.get("message"),
+            fingerprint,
+            dedup_key,
+            json.dumps(alert, default=str),
+        )
+    
+    def _write_loop(self):
+        """Bucle del hilo escritor: un volcado por intervalo o lote lleno"""
+        conn = self._connect()
+        
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: (len(self._pending) >= self.batch_size or
+                                 self._flush_requested or not self._running),
+                        self.flush_interval
+                    )
+                    batch = list(self._pending)
+                    self._pending.clear()
+                    self._flush_requested = False
+                    running = self._running
+                
+                if batch:
+                    started = time.perf_counter()
+                    # Un registro deduplicado encolado varias veces se escribe
+                    # una sola vez, con su último estado
+                    unique = list({id(a): a for a in batch}.values())
+                    try:
+                        with conn:
+                            conn.executemany(_INSERT, [self._row(a) for a in unique])
+                    except sqlite3.Error as e:
+                        self.logger.error(
+                            f"Error al guardar {len(batch)} alertas: {e}",
+                            module="AlertStore"
+                        )
+                    elapsed = time.perf_counter() - started
+                    
+                    with self._cond:
+                        self._written += len(batch)
+                        self.batches += 1
+                        self.last_batch_time = elapsed
+                        self._cond.notify_all()
+                else:
+                    with self._cond:
+                        self._cond.notify_all()
+                
+                if not running:
+                    return
+        finally:
+            conn.close()
@@ -0,0 +1,481 @@
+"""
+Delivery - Entrega asíncrona de notificaciones externas
+
+NotificationService no envía los correos ni los SMS en el hilo que
+notifica: los encola en un DeliveryPool, cuyos hilos de entrega tienen
+cada uno su propia sesión persistente con el servidor (SMTP o pasarela
+HTTP de SMS). Cada hilo toma varios mensajes de la cola de una vez y
+los envía por la misma sesión, reconectando solo cuando el servidor
+cierra la conexión o la sesión lleva demasiado tiempo inactiva.
+
+Los errores transitorios se reintentan con espera exponencial (con
+variación aleatoria) sin bloquear al hilo: el mensaje vuelve a la cola
+con la hora a partir de la que puede reenviarse. Los errores
+permanentes (destinatario rechazado, códigos 5xx) no se reintentan.
+"""
+
+import heapq
+import logging
+import random
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Dict, List, Any, Callable, Optional
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Indica si un error se debe a la conexión y no a una respuesta SMTP"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException hereda de OSError: solo cuentan los errores de socket
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPTransport:
+    """
+    Sesión SMTP persistente.
+    
+    La conexión se abre en el primer envío y se reutiliza en los
+    siguientes; si ha estado inactiva más de idle_timeout segundos se
+    comprueba con NOOP antes de usarla.
+    """
+    
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        sender: str = "fireguard@localhost",
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        use_ssl: bool = False,
+        timeout: float = 10.0,
+        idle_timeout: float = 60.0
+    ):
+        """
+        Inicializa el transporte (sin conectar).
+        
+        Args:
+            host: Servidor SMTP
+            port: Puerto del servidor
+            sender: Remitente de los correos
+            username: Usuario para autenticación (opcional)
+            password: Contraseña para autenticación
+            starttls: Usar STARTTLS tras conectar
+            use_ssl: Conectar directamente por SSL (SMTPS)
+            timeout: Timeout de red en segundos
+            idle_timeout: Inactividad tras la que se comprueba la sesión
+        """
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.connects = 0
+        self._conn: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+    
+    def send(self, recipients: List[str], subject: str, body: str):
+        """
+        Envía un correo por la sesión actual.
+        
+        Raises:
+            smtplib.SMTPException u OSError si el envío falla
+        """
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message.set_content(body)
+        
+        reused = self._conn is not None
+        conn = self._connection()
+        try:
+            conn.send_message(message, from_addr=self.sender, to_addrs=recipients)
+        except Exception as e:
+            # Las respuestas del servidor (4xx/5xx, destinatarios rechazados)
+            # no invalidan la sesión: se clasifican con is_permanent
+            if not _is_connection_error(e):
+                raise
+            self._drop()
+            if not reused:
+                raise
+            # El servidor cerró la sesión reutilizada: un intento con una nueva
+            conn = self._connection()
+            try:
+                conn.send_message(message, from_addr=self.sender, to_addrs=recipients)
+            except Exception as e:
+                if _is_connection_error(e):
+                    self._drop()
+                raise
+        self._last_used = time.monotonic()
+    
+    def close(self):
+        """Cierra la sesión"""
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._conn = None
+    
+    @staticmethod
+    def is_permanent(error: Exception) -> bool:
+        """Indica si un error no se resolverá reintentando"""
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code >= 500
+        return False
+    
+    def _connection(self) -> smtplib.SMTP:
+        """Devuelve la sesión abierta, reconectando si hace falta"""
+        if self._conn is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            try:
+                if self._conn.noop()[0] != 250:
+                    self._drop()
+            except (smtplib.SMTPException, OSError):
+                self._drop()
+        
+        if self._conn is None:
+            smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+            conn = smtp_class(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.ehlo()
+                if self.starttls and not self.use_ssl:
+                    conn.starttls()
+                    conn.ehlo()
+                if self.username:
+                    conn.login(self.username, self.password or "")
+            except Exception:
+                conn.close()
+                raise
+            self._conn = conn
+            self._last_used = time.monotonic()
+            self.connects += 1
+        
+        return self._conn
+    
+    def _drop(self):
+        """Descarta la sesión sin despedirse del servidor"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+
+class SMSTransport:
+    """
+    Envío de SMS a través de una pasarela HTTP.
+    
+    Cada destinatario es una petición POST con JSON {"to", "message"};
+    la sesión HTTP mantiene la conexión abierta entre envíos.
+    """
+    
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 10.0):
+        """
+        Inicializa el transporte.
+        
+        Args:
+            url: URL de la pasarela de SMS
+            token: Token Bearer para la pasarela (opcional)
+            timeout: Timeout de cada petición en segundos
+        """
+        import requests
+        
+        self.url = url
+        self.timeout = timeout
+        self.connects = 1
+        self._session = requests.Session()
+        if token:
+            self._session.headers["Authorization"] = f"Bearer {token}"
+    
+    def send(self, recipients: List[str], subject: str, body: str):
+        """
+        Envía el SMS a cada destinatario.
+        
+        Raises:
+            requests.RequestException si la pasarela falla
+        """
+        for recipient in recipients:
+            response = self._session.post(
+                self.url, json={"to": recipient, "message": body}, timeout=self.timeout
+            )
+            response.raise_for_status()
+    
+    def close(self):
+        """Cierra la sesión HTTP"""
+        self._session.close()
+    
+    @staticmethod
+    def is_permanent(error: Exception) -> bool:
+        """Los 4xx (salvo 429) no se resuelven reintentando"""
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        return status is not None and 400 <= status < 500 and status != 429
+
+
+class DeliveryPool:
+    """
+    Hilos de entrega con cola compartida y reintentos.
+    
+    Cada hilo crea su propio transporte con transport_factory al tomar
+    su primer lote, de modo que las sesiones no se comparten entre
+    hilos; si no se puede crear, los mensajes siguen la misma política de
+    reintentos que un envío fallido.
+    """
+    
+    def __init__(
+        self,
+        transport_factory: Callable[[], Any],
+        workers: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_queue: int = 10000,
+        batch_size: int = 10,
+        name: str = "delivery"
+    ):
+        """
+        Inicializa el pool (los hilos se arrancan con el primer envío).
+        
+        Args:
+            transport_factory: Crea un transporte con send(), close() e
+                is_permanent()
+            workers: Número de hilos de entrega
+            max_retries: Reintentos por mensaje tras el primer intento
+            backoff: Espera base antes del primer reintento (segundos)
+            max_backoff: Espera máxima entre reintentos
+            max_queue: Mensajes en cola como máximo
+            batch_size: Máximo de mensajes que un hilo envía por la misma
+                sesión cada vez que toma trabajo de la cola (se reparte la
+                cola entre los hilos)
+            name: Nombre del pool (para logs e hilos)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.transport_factory = transport_factory
+        self.workers = max(1, int(workers))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_queue = max_queue
+        self.batch_size = max(1, int(batch_size))
+        self.name = name
+        
+        # Montículo de [no_antes_de, secuencia, intentos, destinatarios, asunto, cuerpo, encolado]
+        self._heap: List[list] = []
+        self._seq = 0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._transports: List[Any] = []
+        self._running = False
+        
+        # Métricas
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self._latency_total = 0.0
+    
+    def submit(self, recipients: List[str], subject: str, body: str) -> bool:
+        """
+        Encola un mensaje para su entrega.
+        
+        Returns:
+            bool: True si se encoló, False si la cola está llena
+        """
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                self.dropped += 1
+                return False
+            
+            self._ensure_workers()
+            now = time.monotonic()
+            heapq.heappush(self._heap, [now, self._seq, 0, list(recipients), subject, body, now])
+            self._seq += 1
+            self._cond.notify()
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se entreguen (o fallen) todos los mensajes encolados.
+        
+        Returns:
+            bool: True si no queda nada pendiente
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._heap and self._in_flight == 0, timeout
+            )
+    
+    def close(self, timeout: Optional[float] = 10.0):
+        """
+        Entrega lo pendiente, detiene los hilos y cierra las sesiones.
+        
+        Los mensajes que sigan en cola al vencer el timeout se cuentan
+        como fallidos.
+        """
+        self.flush(timeout)
+        
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        
+        for thread in threads:
+            thread.join(timeout)
+        
+        with self._cond:
+            if self._heap:
+                self.logger.warning(
+                    f"{len(self._heap)} mensajes de {self.name} sin entregar al cerrar"
+                )
+                self.failed += len(self._heap)
+                self._heap.clear()
+            self._cond.notify_all()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las métricas del pool.
+        
+        Returns:
+            Dict con mensajes en cola, enviados, fallidos, reintentos,
+            descartados, conexiones abiertas y latencia media
+        """
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                "queued": len(self._heap),
+                "in_flight": self._in_flight,
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "dropped": self.dropped,
+                "connects": sum(getattr(t, "connects", 0) for t in self._transports),
+                "latency_avg": self._latency_total / self.sent if self.sent else 0.0,
+            }
+    
+    def _ensure_workers(self):
+        """Arranca los hilos de entrega (con el lock tomado)"""
+        if self._running:
+            return
+        self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work_loop, name=f"fireguard-{self.name}-{i}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+    
+    def _take(self) -> Optional[List[list]]:
+        """
+        Espera y toma hasta batch_size mensajes listos (con el lock tomado).
+        
+        Returns:
+            Lista de mensajes, o None si el pool se está cerrando
+        """
+        while self._running:
+            now = time.monotonic()
+            if self._heap and self._heap[0][0] <= now:
+                # Parte proporcional de la cola, para no dejar hilos ociosos
+                limit = min(self.batch_size, -(-len(self._heap) // self.workers))
+                batch = []
+                while self._heap and self._heap[0][0] <= now and len(batch) < limit:
+                    batch.append(heapq.heappop(self._heap))
+                self._in_flight += len(batch)
+                return batch
+            
+            # Esperar al siguiente reintento o a un mensaje nuevo
+            self._cond.wait(self._heap[0][0] - now if self._heap else None)
+        return None
+    
+    def _work_loop(self):
+        """Bucle de un hilo de entrega"""
+        transport = None
+        
+        try:
+            while True:
+                with self._cond:
+                    batch = self._take()
+                if batch is None:
+                    return
+                
+                if transport is None:
+                    transport = self._create_transport(batch)
+                if transport is not None:
+                    for item in batch:
+                        self._send(transport, item)
+                
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+        finally:
+            if transport is not None:
+                transport.close()
+    
+    def _create_transport(self, batch: List[list]) -> Optional[Any]:
+        """
+        Crea el transporte del hilo al tomar el primer lote.
+        
+        Si falla (pasarela inaccesible, configuración incorrecta...), los
+        mensajes del lote se reprograman como un envío fallido y el hilo
+        lo vuelve a intentar con el siguiente lote.
+        
+        Returns:
+            Transporte, o None si no se pudo crear
+        """
+        try:
+            transport = self.transport_factory()
+        except Exception as e:
+            self.logger.error(f"No se pudo crear el transporte de {self.name}: {e}")
+            for item in batch:
+                self._retry_or_fail(item, e, permanent=False)
+            return None
+        
+        with self._cond:
+            self._transports.append(transport)
+        return transport
+    
+    def _send(self, transport: Any, item: list):
+        """Envía un mensaje; si falla, lo reprograma o lo da por fallido"""
+        _, _, attempts, recipients, subject, body, enqueued_at = item
+        
+        try:
+            transport.send(recipients, subject, body)
+        except Exception as e:
+            self._retry_or_fail(item, e, transport.is_permanent(e))
+            return
+        
+        latency = time.monotonic() - enqueued_at
+        with self._cond:
+            self.sent += 1
+            self._latency_total += latency
+    
+    def _retry_or_fail(self, item: list, error: Exception, permanent: bool):
+        """Reprograma un mensaje con espera exponencial o lo da por fallido"""
+        attempts, subject = item[2], item[4]
+        
+        with self._cond:
+            if permanent or attempts >= self.max_retries:
+                self.failed += 1
+                self.logger.error(
+                    f"No se pudo entregar '{subject}' por {self.name} "
+                    f"tras {attempts + 1} intentos: {error}"
+                )
+                return
+            
+            delay = min(self.max_backoff, self.backoff * 2 ** attempts)
+            delay *= random.uniform(0.5, 1.0)
+            item[0] = time.monotonic() + delay
+            item[2] = attempts + 1
+            heapq.heappush(self._heap, item)
+            self.retries += 1
+            self._cond.notify()
@@ -0,0 +1,119 @@
+"""
+Notification Batching - Agrupación y limitación de notificaciones
+
+Piezas que usa NotificationService para que el coste de notificar
+dependa del número de lotes y no del número de alertas:
+
+- TokenBucket: limitador de tasa por canal.
+- NotificationBatch: notificaciones pendientes de un canal que se
+  envían juntas como un resumen (digest) al cerrar la ventana.
+"""
+
+import time
+from typing import List, Optional
+
+
+class TokenBucket:
+    """
+    Limitador de tasa de tipo token bucket.
+    
+    Se recargan rate tokens por segundo hasta un máximo de burst; cada
+    envío consume un token.
+    """
+    
+    def __init__(self, rate: float, burst: float):
+        """
+        Inicializa el limitador.
+        
+        Args:
+            rate: Tokens por segundo (0 o menos = sin límite)
+            burst: Capacidad máxima del bucket
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated = now
+    
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """
+        Consume un token si hay alguno disponible.
+        
+        Returns:
+            bool: True si se permite el envío
+        """
+        if self.rate <= 0:
+            return True
+        
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """
+        Segundos hasta que haya un token disponible.
+        
+        Returns:
+            Tiempo de espera (0 si ya hay token)
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class NotificationBatch:
+    """Notificaciones pendientes de un canal"""
+    
+    def __init__(self):
+        self.messages: List[str] = []
+        self.opened_at: Optional[float] = None
+        self.total = 0
+    
+    def __len__(self) -> int:
+        return self.total
+    
+    def add(self, message: str, max_messages: int, now: Optional[float] = None):
+        """
+        Añade una notificación al lote.
+        
+        Solo se conservan los primeros max_messages textos; del resto se
+        cuenta el número para indicarlo en el resumen.
+        """
+        if self.opened_at is None:
+            self.opened_at = time.monotonic() if now is None else now
+        if len(self.messages) < max_messages:
+            self.messages.append(message)
+        self.total += 1
+    
+    def digest(self) -> str:
+        """
+        Construye el mensaje resumen del lote.
+        
+        Returns:
+            El mensaje original si solo hay uno, o un resumen con todos
+        """
+        if self.total == 1:
+            return self.messages[0]
+        
+        lines = [f"[RESUMEN] {self.total} notificaciones:"]
+        lines.extend(f"- {message}" for message in self.messages)
+        omitted = self.total - len(self.messages)
+        if omitted > 0:
+            lines.append(f"(+{omitted} más)")
+        return "\n".join(lines)
+    
+    def reset(self):
+        """Vacía el lote"""
+        self.messages = []
+        self.opened_at = None
+        self.total = 0
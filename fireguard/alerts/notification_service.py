@@ -6,9 +6,15 @@ distribuyendo alertas a través de diferentes canales (email, SMS, etc.)
 según la configuración del usuario.
 """
 
+import atexit
 import logging
+import threading
+import time
+import weakref
 from typing import Dict, List, Any, Optional
 from enum import Enum
+from fireguard.alerts.notification_batching import TokenBucket, NotificationBatch
+from fireguard.alerts.delivery import DeliveryPool, SMTPTransport, SMSTransport
 
 
 class NotificationChannel(Enum):
@@ -19,6 +25,24 @@ class NotificationChannel(Enum):
     LOG = "log"
 
 
+# Canales locales: no esperan a la ventana de agrupación salvo que se
+# configure en batching.channels.<canal>.window
+LOCAL_CHANNELS = (NotificationChannel.CONSOLE, NotificationChannel.LOG)
+
+# Servicios vivos, para enviar lo pendiente al salir del proceso
+_live_services: "weakref.WeakSet[NotificationService]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_services():
+    """Envía los resúmenes pendientes de los servicios no cerrados"""
+    for service in list(_live_services):
+        try:
+            service.flush(timeout=5.0)
+        except Exception:
+            pass
+
+
 class NotificationService:
     """
     Servicio de envío de notificaciones.
@@ -37,7 +61,26 @@ class NotificationService:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         self.enabled_channels = self.config.get('channels', [NotificationChannel.LOG])
-        self.recipients = self.config.get('recipients', [])
+        self.recipients = self._load_recipients(self.config.get('recipients') or {})
+        
+        # Agrupación por canal: las notificaciones de una ventana se envían
+        # juntas como un resumen, limitado por un token bucket por canal
+        self.batching = self.config.get('batching', {})
+        self.bypass_priorities = set(
+            self.batching.get('bypass_priorities', ['critical', 'emergency'])
+        )
+        self._batches: Dict[NotificationChannel, NotificationBatch] = {}
+        self._buckets: Dict[NotificationChannel, TokenBucket] = {}
+        # Temporizador pendiente por canal y su instante de disparo (monotónico)
+        self._timers: Dict[NotificationChannel, threading.Timer] = {}
+        self._deadlines: Dict[NotificationChannel, float] = {}
+        self._lock = threading.RLock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        
+        # Entrega asíncrona de email y SMS (pools creados bajo demanda)
+        self.delivery = self.config.get('delivery', {})
+        self._pools: Dict[NotificationChannel, DeliveryPool] = {}
+        _live_services.add(self)
         self.logger.info("NotificationService inicializado")
     
     def send_notification(
@@ -61,17 +104,304 @@ class NotificationService:
             self.logger.warning(f"Canal {channel.value} no está habilitado")
             return False
         
+        stats = self._channel_stats(channel)
+        
+        # Las prioridades críticas no esperan a la ventana ni al limitador
+        if priority in self.bypass_priorities:
+            stats["bypassed"] += 1
+            return self._deliver(channel, message)
+        
+        with self._lock:
+            batch = self._batches.setdefault(channel, NotificationBatch())
+            batch.add(message, int(self._channel_setting(channel, 'digest_lines', 20)))
+            stats["notifications"] += 1
+            
+            window = float(self._window(channel))
+            max_batch = int(self._channel_setting(channel, 'max_batch', 100))
+            
+            if len(batch) >= max_batch or window <= 0:
+                flush_now = True
+            else:
+                flush_now = False
+                if len(batch) == 1:
+                    self._schedule(channel, window)
+        
+        if flush_now:
+            self._flush_channel(channel)
+        return True
+    
+    def flush(self, timeout: Optional[float] = 30.0) -> Dict[str, bool]:
+        """
+        Envía inmediatamente los resúmenes pendientes de todos los canales,
+        sin esperar a la ventana ni al limitador, y espera a que los
+        hilos de entrega vacíen sus colas.
+        
+        Args:
+            timeout: Espera máxima por canal de entrega asíncrona
+        
+        Returns:
+            Diccionario con resultados por canal
+        """
+        results = {}
+        for channel in list(self._batches):
+            result = self._flush_channel(channel, force=True)
+            if result is not None:
+                results[channel.value] = result
+        for pool in list(self._pools.values()):
+            pool.flush(timeout)
+        return results
+    
+    def close(self, timeout: Optional[float] = 30.0):
+        """Cancela los temporizadores, envía lo pendiente y cierra las sesiones"""
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._deadlines.clear()
+        self.flush(timeout)
+        _live_services.discard(self)
+        
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close(timeout)
+    
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Obtiene las estadísticas de envío por canal.
+        
+        Returns:
+            Dict por canal con notificaciones recibidas, lotes enviados,
+            envíos prioritarios, notificaciones pendientes y, en email y
+            SMS, las métricas de entrega
+        """
+        with self._lock:
+            stats = {
+                name: dict(stats, pending=len(self._batches.get(NotificationChannel(name), ())))
+                for name, stats in self.stats.items()
+            }
+            for channel, pool in self._pools.items():
+                stats.setdefault(channel.value, {})["delivery"] = pool.get_stats()
+            return stats
+    
+    def _channel_setting(self, channel: NotificationChannel, key: str, default: Any) -> Any:
+        """Obtiene un parámetro de agrupación del canal (o el general)"""
+        overrides = self.batching.get('channels', {}).get(channel.value, {})
+        return overrides.get(key, self.batching.get(key, default))
+    
+    def _window(self, channel: NotificationChannel) -> float:
+        """Ventana de agrupación del canal (0 por defecto en los canales locales)"""
+        if channel in LOCAL_CHANNELS:
+            overrides = self.batching.get('channels', {}).get(channel.value, {})
+            return overrides.get('window', 0.0)
+        return self._channel_setting(channel, 'window', 5.0)
+    
+    def _channel_stats(self, channel: NotificationChannel) -> Dict[str, int]:
+        """Obtiene (o crea) los contadores de un canal"""
+        stats = self.stats.get(channel.value)
+        if stats is None:
+            stats = self.stats.setdefault(channel.value, {
+                "notifications": 0,
+                "batches": 0,
+                "bypassed": 0,
+                "sent": 0,
+                "failed": 0
+            })
+        return stats
+    
+    def _bucket(self, channel: NotificationChannel) -> TokenBucket:
+        """Obtiene (o crea) el limitador de un canal"""
+        bucket = self._buckets.get(channel)
+        if bucket is None:
+            bucket = self._buckets[channel] = TokenBucket(
+                rate=float(self._channel_setting(channel, 'rate', 1.0)),
+                burst=float(self._channel_setting(channel, 'burst', 5))
+            )
+        return bucket
+    
+    def _schedule(self, channel: NotificationChannel, delay: float):
+        """
+        Programa el envío del lote de un canal (con el lock tomado).
+        
+        Si ya hay un temporizador que dispara antes (o a la vez) se
+        conserva: se crea como mucho uno por lote, no uno por notificación.
+        """
+        deadline = time.monotonic() + delay
+        timer = self._timers.get(channel)
+        if timer is not None:
+            if self._deadlines[channel] <= deadline + 0.01:
+                return
+            timer.cancel()
+        
+        timer = threading.Timer(delay, self._on_timer, args=(channel, deadline))
+        timer.daemon = True
+        self._timers[channel] = timer
+        self._deadlines[channel] = deadline
+        timer.start()
+    
+    def _on_timer(self, channel: NotificationChannel, deadline: float):
+        """Dispara el envío programado de un canal"""
+        with self._lock:
+            if self._deadlines.get(channel) != deadline:
+                return  # Reemplazado por otro temporizador
+            del self._timers[channel]
+            del self._deadlines[channel]
+        self._flush_channel(channel)
+    
+    def _flush_channel(self, channel: NotificationChannel, force: bool = False) -> Optional[bool]:
+        """
+        Envía el resumen pendiente de un canal si el limitador lo permite.
+        
+        Si no hay token disponible el lote sigue acumulando y se
+        reprograma para cuando lo haya.
+        
+        Returns:
+            Resultado del envío, o None si no se ha enviado nada
+        """
+        with self._lock:
+            batch = self._batches.get(channel)
+            if not batch:
+                return None
+            
+            bucket = self._bucket(channel)
+            if not force and not bucket.try_acquire():
+                self._schedule(channel, bucket.wait_time())
+                return None
+            
+            message = batch.digest()
+            batch.reset()
+            timer = self._timers.pop(channel, None)
+            if timer is not None:
+                timer.cancel()
+                del self._deadlines[channel]
+            self.stats[channel.value]["batches"] += 1
+        
+        return self._deliver(channel, message)
+    
+    def _deliver(self, channel: NotificationChannel, message: str) -> bool:
+        """
+        Entrega un mensaje (individual o resumen) por un canal.
+        
+        Args:
+            channel: Canal de notificación
+            message: Mensaje a enviar
+            
+        Returns:
+            bool: True si el envío fue exitoso
+        """
         self.logger.info(f"Enviando notificación por {channel.value}: {message}")
+        stats = self._channel_stats(channel)
         
-        # Implementación básica - expandir en futuras versiones
         if channel == NotificationChannel.CONSOLE:
             print(f"[NOTIFICACIÓN] {message}")
-            return True
+            sent = True
         elif channel == NotificationChannel.LOG:
             self.logger.info(f"[NOTIFICACIÓN] {message}")
-            return True
+            sent = True
+        elif channel in (NotificationChannel.EMAIL, NotificationChannel.SMS):
+            sent = self._enqueue(channel, message)
+        else:
+            sent = False
         
-        return False
+        stats["sent" if sent else "failed"] += 1
+        return sent
+    
+    @staticmethod
+    def _load_recipients(recipients: Any) -> Dict[str, List[str]]:
+        """
+        Valida los destinatarios configurados.
+        
+        Args:
+            recipients: Dict canal -> lista de destinatarios
+        
+        Returns:
+            Copia de los destinatarios por canal
+        
+        Raises:
+            ValueError: Si no es un dict de listas (p. ej. la antigua lista
+                sin canal, que no indica si son correos o teléfonos)
+        """
+        if not isinstance(recipients, dict):
+            raise ValueError(
+                "'recipients' debe ser un diccionario por canal, p. ej. "
+                "{'email': ['soc@example.com'], 'sms': ['+34600000000']}"
+            )
+        
+        loaded = {}
+        for channel, values in recipients.items():
+            if isinstance(values, str) or not isinstance(values, (list, tuple)):
+                raise ValueError(f"Los destinatarios de '{channel}' deben ser una lista")
+            loaded[getattr(channel, "value", channel)] = list(values)
+        return loaded
+    
+    def _enqueue(self, channel: NotificationChannel, message: str) -> bool:
+        """
+        Encola un mensaje en el pool de entrega del canal.
+        
+        Returns:
+            bool: True si se encoló para sus destinatarios
+        """
+        recipients = self.recipients.get(channel.value, [])
+        if not recipients:
+            self.logger.warning(f"Canal {channel.value} sin destinatarios")
+            return False
+        
+        pool = self._pool(channel)
+        if pool is None:
+            return False
+        
+        prefix = self.config.get(channel.value, {}).get('subject_prefix', '[FireGuard]')
+        subject = f"{prefix} {message.splitlines()[0][:100]}"
+        return pool.submit(recipients, subject, message)
+    
+    def _pool(self, channel: NotificationChannel) -> Optional[DeliveryPool]:
+        """Obtiene (o crea) el pool de entrega de un canal"""
+        with self._lock:
+            pool = self._pools.get(channel)
+            if pool is not None:
+                return pool
+            
+            settings = dict(self.config.get(channel.value, {}))
+            
+            def setting(key: str, default: Any) -> Any:
+                return settings.get(key, self.delivery.get(key, default))
+            
+            if channel == NotificationChannel.EMAIL:
+                def factory():
+                    return SMTPTransport(
+                        host=settings.get('host', 'localhost'),
+                        port=int(settings.get('port', 25)),
+                        sender=settings.get('sender', 'fireguard@localhost'),
+                        username=settings.get('username'),
+                        password=settings.get('password'),
+                        starttls=settings.get('starttls', False),
+                        use_ssl=settings.get('use_ssl', False),
+                        timeout=float(settings.get('timeout', 10.0)),
+                        idle_timeout=float(settings.get('idle_timeout', 60.0))
+                    )
+            else:
+                if not settings.get('url'):
+                    self.logger.error("Canal sms sin pasarela configurada ('sms.url')")
+                    return None
+                
+                def factory():
+                    return SMSTransport(
+                        settings['url'],
+                        token=settings.get('token'),
+                        timeout=float(settings.get('timeout', 10.0))
+                    )
+            
+            pool = self._pools[channel] = DeliveryPool(
+                factory,
+                workers=int(setting('workers', 4)),
+                max_retries=int(setting('max_retries', 3)),
+                backoff=float(setting('backoff', 0.5)),
+                max_backoff=float(setting('max_backoff', 30.0)),
+                max_queue=int(setting('queue_size', 10000)),
+                batch_size=int(setting('batch_size', 10)),
+                name=channel.value
+            )
+            return pool
     
     def broadcast(self, message: str, priority: str = "normal") -> Dict[str, bool]:
         """
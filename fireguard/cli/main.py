@@ -5,16 +5,20 @@ Interfaz de línea de comandos para el sistema FIREGUARD
 
 import click
 import json
+import time
 from colorama import init, Fore, Style
 from fireguard import __version__
 from fireguard.core.platform_detector import PlatformDetector
 from fireguard.core.config_manager import ConfigManager
 from fireguard.core.logger import Logger
+from fireguard.core.scheduler import SensorScheduler
 from fireguard.auth.auth_manager import AuthManager
 from fireguard.sensors.port_sensor import PortSensor
 from fireguard.sensors.process_sensor import ProcessSensor
 from fireguard.sensors.disk_sensor import DiskSensor
 from fireguard.sensors.log_sensor import LogSensor
+from fireguard.sensors.process_backends import benchmark_backends
+from fireguard.sensors.net_backends import benchmark_backends as benchmark_net_backends
 from fireguard.ai.anomaly_detector import AnomalyDetector
 from fireguard.ai.alert_system import AlertSystem
 
@@ -80,12 +84,12 @@ def scan(sensor, format):
     if sensor == 'all' or sensor == 'logs':
         sensors_to_run.append(LogSensor(config))
     
-    results = []
+    # Ejecutar los sensores en paralelo
+    scheduler = SensorScheduler(max_workers=config.get("monitoring.max_workers", 4))
+    sweep = scheduler.run_once(sensors_to_run)
+    results = sweep["results"]
     
-    for s in sensors_to_run:
-        result = s.run()
-        results.append(result)
-        
+    for result in results:
         # Añadir alertas al sistema
         if 'alerts' in result:
             alert_system.add_alerts(result['alerts'])
@@ -94,10 +98,13 @@ def scan(sensor, format):
     if format == 'json':
         click.echo(json.dumps(results, indent=2))
     else:
-        _display_scan_results(results, alert_system)
+        _display_scan_results(results, alert_system, sweep["tick"])
+    
+    # Volcar las alertas pendientes al histórico
+    alert_system.close()
 
 
-def _display_scan_results(results, alert_system):
+def _display_scan_results(results, alert_system, tick=None):
     """Muestra resultados del escaneo en formato texto"""
     for result in results:
         sensor_name = result.get('sensor', 'Unknown')
@@ -135,6 +142,12 @@ def _display_scan_results(results, alert_system):
             for sev, count in summary['by_severity'].items():
                 color = Fore.RED if sev in ['critical', 'high'] else Fore.YELLOW
                 click.echo(f"    {color}{sev}: {count}")
+    
+    # Tiempos del barrido
+    if tick and tick.get('wall_time') is not None:
+        click.echo(f"{Fore.CYAN}⏱ Barrido completado en {tick['wall_time']:.2f}s "
+                   f"(sensor más lento: {tick['slowest_sensor_time']:.2f}s, "
+                   f"suma: {tick['total_sensor_time']:.2f}s)")
 
 
 @cli.command()
@@ -169,7 +182,8 @@ def auth():
 
 @cli.command()
 @click.option('--output', '-o', type=click.Path(), help='Archivo de salida para el reporte')
-def report(output):
+@click.option('--hours', type=float, default=24, help='Horas de histórico de alertas a incluir')
+def report(output, hours):
     """Genera un reporte completo del sistema"""
     click.echo(f"{Fore.CYAN}📋 Generando reporte completo...\n")
     
@@ -192,15 +206,29 @@ def report(output):
         "sensors": []
     }
     
-    for sensor in sensors:
-        result = sensor.run()
+    scheduler = SensorScheduler(max_workers=config.get("monitoring.max_workers", 4))
+    sweep = scheduler.run_once(sensors)
+    
+    for result in sweep["results"]:
         report_data["sensors"].append(result)
         
         if 'alerts' in result:
             alert_system.add_alerts(result['alerts'])
     
+    report_data["sweep"] = sweep["tick"]
     report_data["alert_summary"] = alert_system.get_alert_summary()
     
+    # Histórico persistente de alertas (si está configurado)
+    if alert_system.store:
+        since = time.time() - hours * 3600
+        alert_system.store.flush()
+        report_data["alert_history"] = {
+            "hours": hours,
+            "summary": alert_system.store.summary(since=since),
+            "recent": alert_system.get_alerts(since=since, limit=100, history=True)
+        }
+    alert_system.close()
+    
     # Guardar o mostrar reporte
     report_json = json.dumps(report_data, indent=2)
     
@@ -212,6 +240,29 @@ def report(output):
         click.echo(report_json)
 
 
+@cli.command()
+@click.option('--iterations', '-n', type=int, default=5, help='Escaneos incrementales a medir')
+def benchmark(iterations):
+    """Compara los backends de enumeración de procesos y conexiones"""
+    click.echo(f"{Fore.CYAN}⏱ Benchmark de backends de procesos\n")
+    
+    for name, stats in benchmark_backends(iterations).items():
+        click.echo(f"{Fore.YELLOW}{name}:")
+        click.echo(f"  Procesos: {Fore.WHITE}{stats['processes']}")
+        click.echo(f"  Escaneo completo: {Fore.WHITE}{stats['full_scan'] * 1000:.1f} ms")
+        click.echo(f"  Escaneo incremental: {Fore.WHITE}{stats['incremental_scan'] * 1000:.1f} ms")
+    
+    click.echo(f"\n{Fore.CYAN}⏱ Benchmark de backends de red\n")
+    
+    for name, stats in benchmark_net_backends(iterations).items():
+        click.echo(f"{Fore.YELLOW}{name}:")
+        click.echo(f"  Sockets: {Fore.WHITE}{stats['sockets']}")
+        click.echo(f"  Primer escaneo: {Fore.WHITE}{stats['full_scan'] * 1000:.1f} ms")
+        click.echo(f"  Escaneo siguiente: {Fore.WHITE}{stats['incremental_scan'] * 1000:.1f} ms")
+    
+    click.echo()
+
+
 @cli.command()
 def config():
     """Muestra la configuración actual"""
@@ -18,17 +18,27 @@ class ConfigManager:
     desde archivos YAML o JSON.
     """
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        config_data: Optional[Dict[str, Any]] = None
+    ):
         """
         Inicializa el gestor de configuración.
         
         Args:
             config_path: Ruta al archivo de configuración
+            config_data: Configuración ya cargada (si se indica, no se lee
+                ningún archivo)
         """
         self.logger = Logger()
         self.config_path = config_path or self._get_default_config_path()
         self.config: Dict[str, Any] = {}
-        self._load_config()
+        
+        if config_data is not None:
+            self.config = config_data
+        else:
+            self._load_config()
     
     def _get_default_config_path(self) -> str:
         """Obtiene la ruta por defecto del archivo de configuración"""
@@ -91,6 +101,8 @@ class ConfigManager:
             "alerts": {
                 "enabled": True,
                 "threshold": "medium",  # low, medium, high, critical
+                # Histórico persistente (SQLite): desactivado salvo que se
+                # configure alerts.store.path
             },
             "ai": {
                 "enabled": False,  # Preparado para futuras capacidades de IA
@@ -7,7 +7,10 @@ y gestionando el ciclo de vida del antivirus.
 """
 
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from fireguard.core.config_manager import ConfigManager
+from fireguard.core.sensor_base import SensorBase
+from fireguard.core.scheduler import SensorScheduler
 
 
 class FireguardEngine:
@@ -18,18 +21,103 @@ class FireguardEngine:
     y proporciona la interfaz principal para control del sistema.
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        sensors: Optional[List[SensorBase]] = None
+    ):
         """
         Inicializa el motor de FIREGUARD AI.
         
         Args:
             config: Diccionario de configuración del sistema
+            sensors: Sensores a planificar (por defecto los habilitados en config)
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.running = False
+        self.config_manager = ConfigManager(config_data=self.config)
+        self.sensors = sensors if sensors is not None else self._build_sensors()
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+        
+        # Importación diferida: AlertSystem depende de core
+        from fireguard.ai.alert_system import AlertSystem
+        from fireguard.ai.alert_correlator import AlertCorrelator, DEFAULT_IGNORED_VALUES
+        self.alert_system = AlertSystem(self.config_manager)
+        
+        # Correlación entre sensores antes de llegar a AlertSystem
+        self.correlator = None
+        if self.config_manager.get("alerts.correlation.enabled", True):
+            get = self.config_manager.get
+            self.correlator = AlertCorrelator(
+                window=float(get("alerts.correlation.window", 60)),
+                min_sources=int(get("alerts.correlation.min_sources", 2)),
+                join_keys=get("alerts.correlation.join_keys", ["pid", "ip", "user"]),
+                ignored_values=get("alerts.correlation.ignored_values", DEFAULT_IGNORED_VALUES),
+                max_keys=int(get("alerts.correlation.max_keys", 50000)),
+                max_clusters=int(get("alerts.correlation.max_clusters", 10000))
+            )
+        
+        self.scheduler = SensorScheduler(
+            max_workers=self.config_manager.get("monitoring.max_workers", 4),
+            on_result=self._handle_sensor_result
+        )
         self.logger.info("FireguardEngine inicializado")
     
+    def _build_sensors(self) -> List[SensorBase]:
+        """
+        Crea los sensores habilitados en la configuración.
+        
+        Returns:
+            Lista de sensores
+        """
+        from fireguard.sensors import PortSensor, ProcessSensor, DiskSensor, LogSensor
+        
+        available = {
+            "ports": PortSensor,
+            "processes": ProcessSensor,
+            "disk": DiskSensor,
+            "logs": LogSensor,
+        }
+        
+        sensors = []
+        for key, sensor_class in available.items():
+            if not self.config_manager.get(f"monitoring.sensors.{key}", True):
+                continue
+            sensor = sensor_class(self.config_manager)
+            if not sensor.get_setting("enabled", True):
+                continue
+            sensors.append(sensor)
+        
+        return sensors
+    
+    def _handle_sensor_result(self, sensor: SensorBase, result: Dict[str, Any]):
+        """
+        Procesa el resultado de un sensor ejecutado por el planificador.
+        
+        Args:
+            sensor: Sensor ejecutado
+            result: Resultado de SensorBase.run()
+        """
+        self.last_results[sensor.name] = result
+        alerts = result.get("alerts")
+        if alerts and self.correlator:
+            alerts = self.correlator.process(alerts)
+        if alerts:
+            self.alert_system.add_alerts(alerts)
+    
+    def run_sweep(self, sensors: Optional[List[SensorBase]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta todos los sensores una vez, en paralelo.
+        
+        Args:
+            sensors: Sensores a ejecutar (por defecto los del motor)
+            
+        Returns:
+            Dict con resultados por sensor y métricas del barrido
+        """
+        return self.scheduler.run_once(sensors if sensors is not None else self.sensors)
+    
     def start(self) -> bool:
         """
         Inicia el motor del antivirus.
@@ -39,6 +127,9 @@ class FireguardEngine:
         """
         try:
             self.logger.info("Iniciando FIREGUARD AI Engine...")
+            for sensor in self.sensors:
+                self.scheduler.add_sensor(sensor)
+            self.scheduler.start()
             self.running = True
             self.logger.info("FIREGUARD AI Engine iniciado exitosamente")
             return True
@@ -55,6 +146,8 @@ class FireguardEngine:
         """
         try:
             self.logger.info("Deteniendo FIREGUARD AI Engine...")
+            self.scheduler.stop()
+            self.alert_system.close()
             self.running = False
             self.logger.info("FIREGUARD AI Engine detenido")
             return True
@@ -76,5 +169,8 @@ class FireguardEngine:
                 "sensors": "initialized",
                 "alerts": "initialized",
                 "auth": "initialized"
-            }
+            },
+            "scheduler": self.scheduler.get_stats(),
+            "alert_dispatch": self.alert_system.get_dispatch_stats(),
+            "correlation": self.correlator.get_stats() if self.correlator else None
         }
@@ -0,0 +1,326 @@
+"""
+Sensor Scheduler - Planificador de ejecución de sensores
+
+Ejecuta cada sensor en su propio intervalo sobre un pool acotado de
+hilos, de forma que un sensor lento nunca retrasa a los demás. Cada
+"tick" agrupa los sensores que vencen a la vez y registra su tiempo
+real de ejecución (wall time), que debe aproximarse al del sensor más
+lento y no a la suma de todos.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Callable, Optional
+from fireguard.core.logger import Logger
+from fireguard.core.sensor_base import SensorBase
+
+
+class _Tick:
+    """Agrupa las ejecuciones de sensores lanzadas en el mismo instante"""
+    
+    def __init__(self, tick_id: int, sensors: List[str]):
+        self.tick_id = tick_id
+        self.sensors = sensors
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.pending = len(sensors)
+        self.durations: Dict[str, float] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.done = threading.Event()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tick": self.tick_id,
+            "sensors": list(self.sensors),
+            "wall_time": self.finished - self.started if self.finished is not None else None,
+            "slowest_sensor_time": max(self.durations.values(), default=0.0),
+            "total_sensor_time": sum(self.durations.values()),
+            "durations": dict(self.durations),
+        }
+
+
+class SensorScheduler:
+    """
+    Planificador de sensores con intervalos independientes.
+    
+    Mantiene una cola de prioridad con el próximo vencimiento de cada
+    sensor y lanza los que vencen sobre un ThreadPoolExecutor. Un sensor
+    que todavía se está ejecutando no se vuelve a lanzar hasta que termine.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 4,
+        on_result: Optional[Callable[[SensorBase, Dict[str, Any]], None]] = None,
+        tick_history: int = 100
+    ):
+        """
+        Inicializa el planificador.
+        
+        Args:
+            max_workers: Tamaño máximo del pool de hilos
+            on_result: Callback llamado con (sensor, resultado) tras cada ejecución
+            tick_history: Número de ticks recientes a conservar en estadísticas
+        """
+        self.logger = Logger()
+        self.max_workers = max(1, int(max_workers))
+        self.on_result = on_result
+        
+        self._sensors: Dict[str, SensorBase] = {}
+        self._intervals: Dict[str, float] = {}
+        self._in_flight: Dict[str, bool] = {}
+        self._queue: List[Any] = []
+        self._seq = 0
+        self._tick_seq = 0
+        self._ticks: deque = deque(maxlen=tick_history)
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+    
+    def add_sensor(self, sensor: SensorBase, interval: Optional[float] = None):
+        """
+        Registra un sensor en el planificador.
+        
+        Args:
+            sensor: Sensor a ejecutar
+            interval: Intervalo en segundos (por defecto el del propio sensor)
+        """
+        interval = float(interval if interval is not None else sensor.get_scan_interval())
+        if interval <= 0:
+            raise ValueError(f"Intervalo inválido para {sensor.name}: {interval}")
+        
+        with self._lock:
+            self._sensors[sensor.name] = sensor
+            self._intervals[sensor.name] = interval
+            self._in_flight[sensor.name] = False
+            self._push(time.monotonic(), sensor.name)
+        
+        self._wakeup.set()
+        self.logger.info(
+            f"Sensor {sensor.name} planificado cada {interval:.1f}s",
+            module="SensorScheduler"
+        )
+    
+    def remove_sensor(self, name: str):
+        """
+        Elimina un sensor del planificador.
+        
+        Args:
+            name: Nombre del sensor
+        """
+        with self._lock:
+            self._sensors.pop(name, None)
+            self._intervals.pop(name, None)
+            self._in_flight.pop(name, None)
+    
+    def start(self):
+        """Inicia el hilo de planificación y el pool de ejecución"""
+        if self.running:
+            return
+        
+        self.running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="fireguard-sensor"
+        )
+        self._thread = threading.Thread(
+            target=self._loop,
+            name="fireguard-scheduler",
+            daemon=True
+        )
+        self._thread.start()
+        self.logger.info(
+            f"Planificador iniciado ({len(self._sensors)} sensores, "
+            f"{self.max_workers} workers)",
+            module="SensorScheduler"
+        )
+    
+    def stop(self, wait: bool = True):
+        """
+        Detiene el planificador.
+        
+        Args:
+            wait: Si True, espera a que terminen los sensores en ejecución
+        """
+        if not self.running:
+            return
+        
+        self.running = False
+        self._wakeup.set()
+        
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        
+        self.logger.info("Planificador detenido", module="SensorScheduler")
+    
+    def run_once(
+        self,
+        sensors: Optional[List[SensorBase]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta un barrido completo en paralelo y espera su resultado.
+        
+        Args:
+            sensors: Sensores a ejecutar (por defecto todos los registrados)
+            timeout: Tiempo máximo de espera en segundos
+        
+        Returns:
+            Dict con los resultados por sensor (en orden) y las métricas del tick
+        """
+        if sensors is None:
+            with self._lock:
+                sensors = list(self._sensors.values())
+        
+        if not sensors:
+            return {"results": [], "tick": None}
+        
+        executor = self._executor
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(sensors)),
+                thread_name_prefix="fireguard-sweep"
+            )
+        
+        try:
+            tick = self._dispatch(executor, sensors)
+            tick.done.wait(timeout)
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+        
+        return {
+            "results": [tick.results.get(s.name) for s in sensors],
+            "tick": tick.to_dict(),
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de los ticks recientes.
+        
+        Returns:
+            Dict con intervalos por sensor y métricas de los últimos ticks
+        """
+        with self._lock:
+            ticks = [t.to_dict() for t in self._ticks]
+            intervals = dict(self._intervals)
+            in_flight = [n for n, busy in self._in_flight.items() if busy]
+        
+        return {
+            "running": self.running,
+            "max_workers": self.max_workers,
+            "intervals": intervals,
+            "in_flight": in_flight,
+            "ticks": ticks,
+            "last_tick": ticks[-1] if ticks else None,
+        }
+    
+    def _push(self, due: float, name: str):
+        """Encola el próximo vencimiento de un sensor (requiere _lock)"""
+        self._seq += 1
+        heapq.heappush(self._queue, (due, self._seq, name))
+    
+    def _loop(self):
+        """Bucle principal: lanza los sensores vencidos y duerme hasta el siguiente"""
+        while self.running:
+            now = time.monotonic()
+            due_sensors = []
+            
+            with self._lock:
+                while self._queue and self._queue[0][0] <= now:
+                    due, _, name = heapq.heappop(self._queue)
+                    if name not in self._sensors:
+                        continue
+                    
+                    # Reprogramar desde el vencimiento teórico para no acumular deriva
+                    next_due = due + self._intervals[name]
+                    if next_due <= now:
+                        next_due = now + self._intervals[name]
+                    self._push(next_due, name)
+                    
+                    if self._in_flight[name]:
+                        self.logger.debug(
+                            f"Sensor {name} aún en ejecución, se omite este ciclo",
+                            module="SensorScheduler"
+                        )
+                        continue
+                    due_sensors.append(self._sensors[name])
+                
+                delay = self._queue[0][0] - now if self._queue else None
+            
+            if due_sensors and self._executor:
+                self._dispatch(self._executor, due_sensors)
+            
+            self._wakeup.wait(delay if delay is None else max(0.0, delay))
+            self._wakeup.clear()
+    
+    def _dispatch(self, executor: ThreadPoolExecutor, sensors: List[SensorBase]) -> _Tick:
+        """Lanza un grupo de sensores como un único tick"""
+        with self._lock:
+            self._tick_seq += 1
+            tick = _Tick(self._tick_seq, [s.name for s in sensors])
+            for sensor in sensors:
+                self._in_flight[sensor.name] = True
+        
+        for sensor in sensors:
+            future = executor.submit(self._run_sensor, sensor)
+            future.add_done_callback(
+                lambda f, s=sensor: self._on_sensor_done(tick, s, f)
+            )
+        
+        return tick
+    
+    def _run_sensor(self, sensor: SensorBase):
+        """Ejecuta un sensor midiendo su duración"""
+        started = time.monotonic()
+        result = sensor.run()
+        return result, time.monotonic() - started
+    
+    def _on_sensor_done(self, tick: _Tick, sensor: SensorBase, future: Future):
+        """Registra el fin de un sensor y cierra el tick si era el último"""
+        try:
+            result, duration = future.result()
+        except Exception as e:
+            result = {"sensor": sensor.name, "status": "error", "error": str(e)}
+            duration = time.monotonic() - tick.started
+        
+        result["duration"] = duration
+        
+        with self._lock:
+            if sensor.name in self._in_flight:
+                self._in_flight[sensor.name] = False
+            tick.durations[sensor.name] = duration
+            tick.results[sensor.name] = result
+            tick.pending -= 1
+            finished = tick.pending == 0
+            if finished:
+                tick.finished = time.monotonic()
+                self._ticks.append(tick)
+        
+        if self.on_result:
+            try:
+                self.on_result(sensor, result)
+            except Exception as e:
+                self.logger.error(
+                    f"Error procesando resultado de {sensor.name}: {e}",
+                    module="SensorScheduler"
+                )
+        
+        if finished:
+            tick.done.set()
+            self.logger.debug(
+                f"Tick {tick.tick_id} completado en "
+                f"{tick.finished - tick.started:.3f}s ({len(tick.sensors)} sensores)",
+                module="SensorScheduler"
+            )
@@ -17,6 +17,10 @@ class SensorBase(ABC):
     específicos del sistema (puertos, procesos, disco, logs, etc.)
     """
     
+    # Sección del sensor dentro de 'sensors' en la configuración
+    # (ej: 'port_monitor' -> sensors.port_monitor.scan_interval)
+    config_section: Optional[str] = None
+    
     def __init__(self, name: str, config: Optional[ConfigManager] = None):
         """
         Inicializa el sensor.
@@ -77,6 +81,10 @@ class SensorBase(ABC):
             # Analizar
             alerts = self.analyze(scan_results)
             
+            # Identificar el sensor de origen de cada alerta
+            for alert in alerts:
+                alert.setdefault("source", self.name)
+            
             result = {
                 "sensor": self.name,
                 "timestamp": self.last_scan_time.isoformat(),
@@ -103,6 +111,31 @@ class SensorBase(ABC):
                 "error": str(e)
             }
     
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        """
+        Obtiene un valor de configuración propio del sensor.
+        
+        Args:
+            key: Clave dentro de sensors.<config_section>
+            default: Valor por defecto si la clave no existe
+            
+        Returns:
+            Valor de configuración o default
+        """
+        if not self.config_section:
+            return default
+        return self.config.get(f"sensors.{self.config_section}.{key}", default)
+    
+    def get_scan_interval(self) -> float:
+        """
+        Obtiene el intervalo de escaneo del sensor en segundos.
+        
+        Usa sensors.<config_section>.scan_interval y, si no existe,
+        el intervalo global monitoring.interval.
+        """
+        default = self.config.get("monitoring.interval", 60)
+        return float(self.get_setting("scan_interval", default))
+    
     def enable(self):
         """Habilita el sensor"""
         self.enabled = True
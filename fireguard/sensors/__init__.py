@@ -8,5 +8,12 @@ de actividades sospechosas en el sistema.
 
 from .port_monitor import PortMonitor
 from .log_analyzer import LogAnalyzer
+from .port_sensor import PortSensor
+from .process_sensor import ProcessSensor
+from .disk_sensor import DiskSensor
+from .log_sensor import LogSensor
 
-__all__ = ['PortMonitor', 'LogAnalyzer']
+__all__ = [
+    'PortMonitor', 'LogAnalyzer',
+    'PortSensor', 'ProcessSensor', 'DiskSensor', 'LogSensor',
+]
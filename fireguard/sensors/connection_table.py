@@ -0,0 +1,109 @@
+"""
+Connection Table - Tabla de estado de conexiones de red
+
+Sigue cada socket entre escaneos, indexado por su 5-tupla (protocolo,
+IP y puerto locales, IP y puerto remotos), y calcula los eventos de
+apertura, cierre y cambio de estado junto con la duración de cada
+conexión, para que el análisis trabaje solo sobre lo que ha cambiado.
+"""
+
+import time
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Iterator
+
+ConnectionKey = Tuple[str, str, int, Optional[str], int]
+
+
+class ConnectionTable:
+    """
+    Tabla persistente de conexiones.
+    
+    Cada registro se crea cuando aparece el socket y se conserva mientras
+    siga presente; al desaparecer se entrega en 'closed' con su duración.
+    """
+    
+    def __init__(self):
+        """Inicializa la tabla de conexiones"""
+        self.entries: Dict[ConnectionKey, Dict[str, Any]] = {}
+    
+    def __contains__(self, key: ConnectionKey) -> bool:
+        return key in self.entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.entries.values())
+    
+    def records(self) -> List[Dict[str, Any]]:
+        """Obtiene la lista de registros actuales (sin copiarlos)"""
+        return list(self.entries.values())
+    
+    def count(self, status: str) -> int:
+        """Cuenta las conexiones en un estado"""
+        return sum(1 for entry in self.entries.values() if entry["status"] == status)
+    
+    def update(self, connections: Iterable, now: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Aplica un escaneo a la tabla y calcula los eventos.
+        
+        Args:
+            connections: Conexiones del escaneo (tuplas Connection)
+            now: Marca de tiempo del escaneo (por defecto time.time())
+        
+        Returns:
+            Dict con las listas 'opened', 'closed' y 'state_changed'
+        """
+        now = time.time() if now is None else now
+        entries = self.entries
+        seen = set()
+        opened = []
+        state_changed = []
+        
+        for conn in connections:
+            key = (conn.proto, conn.local_ip, conn.local_port, conn.remote_ip, conn.remote_port)
+            if key in seen:
+                # Varios sockets con la misma 5-tupla (p. ej. SO_REUSEPORT)
+                continue
+            seen.add(key)
+            
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = {
+                    "proto": conn.proto,
+                    "local_ip": conn.local_ip,
+                    "local_port": conn.local_port,
+                    "remote_ip": conn.remote_ip,
+                    "remote_port": conn.remote_port,
+                    "status": conn.status,
+                    "pid": conn.pid,
+                    "first_seen": now,
+                    "last_seen": now
+                }
+                opened.append(entry)
+                continue
+            
+            entry["last_seen"] = now
+            if conn.pid is not None:
+                entry["pid"] = conn.pid
+            
+            if conn.status != entry["status"]:
+                entry["previous_status"] = entry["status"]
+                entry["status"] = conn.status
+                state_changed.append(entry)
+        
+        closed = []
+        if len(seen) != len(entries):
+            for key in [k for k in entries if k not in seen]:
+                entry = entries.pop(key)
+                entry["duration"] = now - entry["first_seen"]
+                closed.append(entry)
+        
+        return {
+            "opened": opened,
+            "closed": closed,
+            "state_changed": state_changed,
+        }
+    
+    def clear(self):
+        """Vacía la tabla"""
+        self.entries.clear()
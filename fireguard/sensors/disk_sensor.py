@@ -17,6 +17,8 @@ class DiskSensor(SensorBase):
     y posibles problemas de almacenamiento.
     """
     
+    config_section = "disk_monitor"
+    
     def __init__(self, config=None):
         """Inicializa el sensor de disco"""
         super().__init__("DiskSensor", config)
@@ -7,8 +7,122 @@ y anomalías en los registros del sistema.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import mmap
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
+from fireguard.sensors.pattern_matcher import PatternMatcher
+from fireguard.sensors.log_follower import LogFollower
+from fireguard.sensors.log_sensor import SUSPICIOUS_PATTERNS
+
+# Tamaño por defecto de cada fragmento en el análisis de archivos completos
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Buscadores ya compilados en el proceso actual (uno por conjunto de patrones)
+_worker_matchers: Dict[tuple, PatternMatcher] = {}
+
+
+def _split_lines(text: str) -> List[str]:
+    """
+    Divide un texto en líneas con la misma regla que el análisis por
+    fragmentos: solo '\\n' separa líneas (no '\\r', '\\x0b', U+2028...,
+    como haría splitlines) y se quita el '\\r' final de CRLF.
+    
+    Args:
+        text: Contenido del log
+        
+    Returns:
+        Lista de líneas (sin la vacía tras un salto de línea final)
+    """
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return [line.rstrip("\r") for line in lines]
+
+
+def _chunk_boundaries(log_path: str, chunk_size: int) -> List[tuple]:
+    """
+    Divide un archivo en fragmentos de ~chunk_size bytes alineados a
+    saltos de línea.
+    
+    Args:
+        log_path: Ruta al archivo
+        chunk_size: Tamaño aproximado de cada fragmento
+        
+    Returns:
+        Lista de tuplas (inicio, fin) en bytes
+    """
+    boundaries = []
+    
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return boundaries
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < size:
+                end = mapped.find(b"\n", min(start + chunk_size, size) - 1)
+                end = size if end < 0 else end + 1
+                boundaries.append((start, end))
+                start = end
+    
+    return boundaries
+
+
+def _scan_chunk(task: tuple) -> tuple:
+    """
+    Analiza un fragmento de un archivo de log (se ejecuta en los workers).
+    
+    Solo se mapea a memoria el fragmento asignado, de modo que el consumo
+    de cada worker depende del tamaño del fragmento y no del archivo.
+    
+    Args:
+        task: Tupla (ruta, inicio, fin, patrones)
+        
+    Returns:
+        Tupla (número de líneas del fragmento, detecciones) donde cada
+        detección lleva el número de línea relativo al fragmento y el
+        offset absoluto en bytes
+    """
+    log_path, start, end, patterns = task
+    
+    matcher = _worker_matchers.get(patterns)
+    if matcher is None:
+        matcher = _worker_matchers[patterns] = PatternMatcher(patterns)
+    match = matcher.match
+    
+    # El offset de mmap debe ser múltiplo de la granularidad de asignación
+    map_start = start - start % mmap.ALLOCATIONGRANULARITY
+    with open(log_path, "rb") as f:
+        with mmap.mmap(f.fileno(), end - map_start, access=mmap.ACCESS_READ,
+                       offset=map_start) as mapped:
+            data = mapped[start - map_start:]
+    
+    # Misma regla que _split_lines(); se divide en bytes para llevar los
+    # offsets, lo que en UTF-8 da las mismas líneas que sobre el texto
+    detected = []
+    lines = data.split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+    
+    offset = start
+    for index, raw in enumerate(lines):
+        line = raw.decode("utf-8", errors="ignore").rstrip("\r")
+        pattern = match(line)
+        if pattern is not None:
+            detected.append({
+                "line": index,
+                "offset": offset,
+                "pattern": pattern,
+                "content": line[:200]
+            })
+        offset += len(raw) + 1
+    
+    return len(lines), detected
 
 
 class LogAnalyzer:
@@ -29,38 +143,164 @@ class LogAnalyzer:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         self.log_paths = self.config.get('log_paths', [])
-        self.patterns = self.config.get('suspicious_patterns', [])
+        self.patterns = self.config.get('suspicious_patterns') or list(SUSPICIOUS_PATTERNS)
+        self.matcher = PatternMatcher(self.patterns)
+        
+        # Seguimiento en tiempo real
+        self.follower: Optional[LogFollower] = None
+        self.realtime_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+        self.recent_detections: deque = deque(
+            maxlen=self.config.get('max_recent_detections', 1000)
+        )
         self.logger.info("LogAnalyzer inicializado")
     
-    def analyze_log_file(self, log_path: str) -> Dict[str, Any]:
+    def analyze_log_file(
+        self,
+        log_path: str,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Analiza un archivo de log específico.
         
+        El archivo se divide en fragmentos alineados a saltos de línea que
+        se analizan en paralelo en un pool de procesos; las detecciones se
+        devuelven en el orden del archivo con su número de línea y offset.
+        
         Args:
             log_path: Ruta al archivo de log
+            workers: Procesos del pool (por defecto config 'analysis_workers'
+                o el número de CPUs)
+            chunk_size: Bytes por fragmento (por defecto config 'chunk_size')
             
         Returns:
             Diccionario con resultados del análisis
         """
         self.logger.info(f"Analizando log: {log_path}")
-        # Implementación básica - expandir en futuras versiones
-        return {
+        started = time.perf_counter()
+        
+        result = {
             "file": log_path,
             "threats_found": 0,
-            "suspicious_entries": []
+            "suspicious_entries": [],
+            "lines": 0,
+            "bytes": 0,
+            "chunks": 0
         }
+        
+        workers = workers or self.config.get('analysis_workers') or os.cpu_count() or 1
+        chunk_size = chunk_size or self.config.get('chunk_size', DEFAULT_CHUNK_SIZE)
+        
+        try:
+            boundaries = _chunk_boundaries(log_path, chunk_size)
+        except OSError as e:
+            self.logger.error(f"No se pudo abrir el log {log_path}: {e}")
+            result["error"] = str(e)
+            return result
+        
+        patterns = tuple(self.matcher.patterns)
+        tasks = [(log_path, start, end, patterns) for start, end in boundaries]
+        workers = min(workers, len(tasks))
+        
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunks = executor.map(_scan_chunk, tasks)
+                self._merge_chunks(result, chunks)
+        else:
+            self._merge_chunks(result, map(_scan_chunk, tasks))
+        
+        result["bytes"] = boundaries[-1][1] if boundaries else 0
+        result["chunks"] = len(boundaries)
+        result["threats_found"] = len(result["suspicious_entries"])
+        result["elapsed"] = time.perf_counter() - started
+        
+        self.logger.info(
+            f"Log {log_path}: {result['lines']} líneas, "
+            f"{result['threats_found']} entradas sospechosas en {result['elapsed']:.2f}s"
+        )
+        return result
     
-    def monitor_logs_realtime(self) -> bool:
+    @staticmethod
+    def _merge_chunks(result: Dict[str, Any], chunks):
+        """Une los resultados de los fragmentos convirtiendo las líneas a absolutas"""
+        entries = result["suspicious_entries"]
+        
+        for line_count, detected in chunks:
+            first_line = result["lines"] + 1
+            for detection in detected:
+                detection["line"] += first_line
+                entries.append(detection)
+            result["lines"] += line_count
+    
+    def monitor_logs_realtime(
+        self,
+        callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> bool:
         """
         Inicia el monitoreo en tiempo real de logs.
         
+        Todos los log_paths se vigilan desde un único bucle (inotify/epoll
+        en Linux, sondeo en otras plataformas). Cada lote de líneas nuevas
+        pasa por detect_patterns y las detecciones se guardan en
+        recent_detections y se entregan al callback.
+        
+        Args:
+            callback: Función opcional que recibe la lista de detecciones
+            
         Returns:
             bool: True si el monitoreo se inició correctamente
         """
         self.logger.info("Iniciando monitoreo en tiempo real de logs...")
-        # Implementación básica - expandir en futuras versiones
+        
+        if self.follower and self.follower.running:
+            return True
+        
+        if not self.log_paths:
+            self.logger.warning("No hay log_paths configurados para monitorear")
+            return False
+        
+        self.realtime_callback = callback
+        self.follower = LogFollower(
+            self.log_paths,
+            self._process_new_lines,
+            backend=self.config.get('realtime_backend', 'auto'),
+            poll_interval=self.config.get('poll_interval', 1.0)
+        )
+        return self.follower.start()
+    
+    def stop_realtime_monitoring(self) -> bool:
+        """
+        Detiene el monitoreo en tiempo real de logs.
+        
+        Returns:
+            bool: True si el monitoreo se detuvo correctamente
+        """
+        if self.follower:
+            self.follower.stop()
+            self.follower = None
         return True
     
+    def _process_new_lines(self, log_path: str, lines: List[str]):
+        """
+        Analiza las líneas nuevas entregadas por el seguidor.
+        
+        Args:
+            log_path: Archivo de origen
+            lines: Líneas nuevas
+        """
+        detected = self.detect_patterns("\n".join(lines))
+        if not detected:
+            return
+        
+        for detection in detected:
+            detection["source"] = log_path
+        
+        self.recent_detections.extend(detected)
+        self.logger.warning(f"{len(detected)} entrada(s) sospechosa(s) en {log_path}")
+        
+        if self.realtime_callback:
+            self.realtime_callback(detected)
+    
     def detect_patterns(self, log_content: str) -> List[Dict[str, Any]]:
         """
         Detecta patrones sospechosos en el contenido del log.
@@ -72,5 +312,15 @@ class LogAnalyzer:
             Lista de patrones sospechosos detectados
         """
         detected = []
-        # Implementación básica - expandir en futuras versiones
+        match = self.matcher.match
+        
+        for line_number, line in enumerate(_split_lines(log_content), start=1):
+            pattern = match(line)
+            if pattern is not None:
+                detected.append({
+                    "line": line_number,
+                    "pattern": pattern,
+                    "content": line[:200]
+                })
+        
         return detected
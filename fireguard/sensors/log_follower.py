@@ -0,0 +1,279 @@
+"""
+Log Follower - Seguimiento de logs en tiempo real
+
+Vigila un conjunto de archivos de log desde un único hilo y entrega las
+líneas nuevas en cuanto se escriben. En Linux usa inotify sobre los
+directorios que contienen los logs y espera con epoll, de modo que los
+archivos inactivos no consumen CPU; en el resto de plataformas recae en
+un sondeo periódico con os.stat. La lectura, la rotación y el truncado
+se delegan en LogTailer.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Set
+from fireguard.core.logger import Logger
+from fireguard.sensors.log_tail import LogTailer
+
+# Constantes de inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Envoltorio mínimo de inotify mediante ctypes"""
+    
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+    
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+    
+    def read_events(self):
+        """Lee los eventos pendientes como tuplas (wd, mask, nombre)"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class LogFollower:
+    """
+    Seguidor de múltiples logs con un único bucle de eventos.
+    
+    Llama a callback(ruta, líneas) desde su propio hilo cada vez que uno
+    de los archivos recibe líneas nuevas.
+    """
+    
+    def __init__(
+        self,
+        paths: List[str],
+        callback: Callable[[str, List[str]], None],
+        tailer: Optional[LogTailer] = None,
+        backend: str = "auto",
+        poll_interval: float = 1.0,
+        rescan_interval: float = 30.0
+    ):
+        """
+        Inicializa el seguidor.
+        
+        Args:
+            paths: Archivos de log a seguir
+            callback: Función que recibe (ruta, líneas nuevas)
+            tailer: Lector incremental (por defecto uno que empieza al final)
+            backend: 'auto', 'inotify' o 'polling'
+            poll_interval: Intervalo de sondeo en segundos (modo polling)
+            rescan_interval: Con inotify, cada cuánto se revisan todos los
+                archivos por si se perdió algún evento
+        """
+        self.logger = Logger()
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.callback = callback
+        self.tailer = tailer or LogTailer(initial_lines=0)
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.mode: Optional[str] = None
+        self.running = False
+        
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._dirs: Dict[int, str] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+    
+    def start(self) -> bool:
+        """
+        Inicia el seguimiento en un hilo propio.
+        
+        Returns:
+            bool: True si el seguimiento se inició correctamente
+        """
+        if self.running:
+            return True
+        
+        # Fijar la posición inicial: final de los archivos existentes y
+        # principio de los que se creen más tarde
+        for path in self.paths:
+            if os.path.exists(path):
+                self._read(path, notify=False)
+            else:
+                self.tailer.expect(path)
+        
+        inotify = None
+        if self.backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+            try:
+                inotify = self._setup_inotify()
+            except OSError as e:
+                if self.backend == "inotify":
+                    self.logger.error(f"No se pudo iniciar inotify: {e}", module="LogFollower")
+                    return False
+                self.logger.warning(
+                    f"inotify no disponible ({e}), usando sondeo",
+                    module="LogFollower"
+                )
+        
+        self._stop_event.clear()
+        self.running = True
+        
+        if inotify is not None:
+            self.mode = "inotify"
+            self._wake_r, self._wake_w = os.pipe()
+            target = lambda: self._inotify_loop(inotify)
+        else:
+            self.mode = "polling"
+            target = self._polling_loop
+        
+        self._thread = threading.Thread(target=target, name="fireguard-log-follower", daemon=True)
+        self._thread.start()
+        self.logger.info(
+            f"Siguiendo {len(self.paths)} log(s) en modo {self.mode}",
+            module="LogFollower"
+        )
+        return True
+    
+    def stop(self):
+        """Detiene el seguimiento y cierra los archivos"""
+        if not self.running:
+            return
+        
+        self.running = False
+        self._stop_event.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
+        
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        
+        self.tailer.save_state()
+        self.tailer.close()
+        self.logger.info("Seguimiento de logs detenido", module="LogFollower")
+    
+    def _read(self, path: str, notify: bool = True):
+        """Lee las líneas nuevas de un archivo y las entrega al callback"""
+        try:
+            lines = self.tailer.read_lines(path)
+        except OSError as e:
+            self.logger.warning(f"No se pudo leer {path}: {e}", module="LogFollower")
+            return
+        
+        if lines and notify:
+            try:
+                self.callback(path, lines)
+            except Exception as e:
+                self.logger.error(
+                    f"Error procesando líneas de {path}: {e}",
+                    module="LogFollower"
+                )
+    
+    def _setup_inotify(self) -> _Inotify:
+        """Crea la instancia de inotify con un watch por directorio"""
+        inotify = _Inotify()
+        self._dirs = {}
+        self._names = {}
+        
+        try:
+            for path in self.paths:
+                directory, name = os.path.split(path)
+                self._names.setdefault(directory, set()).add(name)
+            
+            for directory in self._names:
+                wd = inotify.add_watch(directory, _WATCH_MASK)
+                self._dirs[wd] = directory
+        except OSError:
+            inotify.close()
+            raise
+        
+        return inotify
+    
+    def _inotify_loop(self, inotify: _Inotify):
+        """Bucle de eventos: epoll sobre inotify y un pipe de parada"""
+        epoll = select.epoll()
+        epoll.register(inotify.fd, select.EPOLLIN)
+        epoll.register(self._wake_r, select.EPOLLIN)
+        
+        try:
+            while not self._stop_event.is_set():
+                events = epoll.poll(self.rescan_interval)
+                
+                if not events:
+                    # Revisión periódica por si se perdió algún evento
+                    for path in self.paths:
+                        self._read(path)
+                    continue
+                
+                pending = []
+                for fd, _ in events:
+                    if fd != inotify.fd:
+                        continue
+                    for wd, mask, name in inotify.read_events():
+                        if mask & IN_Q_OVERFLOW:
+                            pending = list(self.paths)
+                            break
+                        directory = self._dirs.get(wd)
+                        if directory and name in self._names.get(directory, ()):
+                            path = os.path.join(directory, name)
+                            if path not in pending:
+                                pending.append(path)
+                
+                for path in pending:
+                    self._read(path)
+        finally:
+            epoll.close()
+            inotify.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = None
+    
+    def _polling_loop(self):
+        """Bucle de sondeo: solo se leen los archivos cuyo stat ha cambiado"""
+        signatures: Dict[str, Optional[tuple]] = {}
+        
+        while not self._stop_event.wait(self.poll_interval):
+            for path in self.paths:
+                try:
+                    stat = os.stat(path)
+                    signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError:
+                    signature = None
+                
+                if signatures.get(path, ()) != signature:
+                    signatures[path] = signature
+                    self._read(path)
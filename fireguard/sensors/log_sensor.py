@@ -9,6 +9,22 @@ from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from fireguard.core.sensor_base import SensorBase
 from fireguard.core.platform_detector import PlatformDetector
+from fireguard.sensors.log_tail import LogTailer
+from fireguard.sensors.pattern_matcher import PatternMatcher
+
+# Patrones sospechosos por defecto
+SUSPICIOUS_PATTERNS = [
+    r"failed password",
+    r"authentication failure",
+    r"invalid user",
+    r"unauthorized",
+    r"permission denied",
+    r"access denied",
+    r"error.*security",
+    r"attack",
+    r"intrusion",
+    r"malware",
+]
 
 
 class LogSensor(SensorBase):
@@ -19,6 +35,8 @@ class LogSensor(SensorBase):
     de seguridad sospechosos.
     """
     
+    config_section = "log_analyzer"
+    
     def __init__(self, config=None):
         """Inicializa el sensor de logs"""
         super().__init__("LogSensor", config)
@@ -26,21 +44,32 @@ class LogSensor(SensorBase):
         self.platform = PlatformDetector()
         
         # Patrones sospechosos en logs
-        self.suspicious_patterns = [
-            r"failed password",
-            r"authentication failure",
-            r"invalid user",
-            r"unauthorized",
-            r"permission denied",
-            r"access denied",
-            r"error.*security",
-            r"attack",
-            r"intrusion",
-            r"malware",
-        ]
+        self.suspicious_patterns = list(SUSPICIOUS_PATTERNS)
+        
+        # Patrones adicionales definidos en la configuración
+        for pattern in self.get_setting("suspicious_patterns", []) or []:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                self.logger.warning(
+                    f"Patrón inválido ignorado '{pattern}': {e}",
+                    module=self.name
+                )
+                continue
+            self.suspicious_patterns.append(pattern)
+        
+        # Todos los patrones se compilan en un único buscador
+        self._matcher = PatternMatcher(self.suspicious_patterns)
         
         # Configurar rutas de logs según la plataforma
         self.log_paths = self._get_log_paths()
+        
+        # Lector incremental: solo se leen los bytes nuevos de cada log
+        self.tailer = LogTailer(
+            state_file=self.get_setting("state_file", "data/log_positions.json"),
+            initial_lines=int(self.get_setting("initial_lines", 100)),
+            max_read_bytes=int(self.get_setting("max_read_bytes", 8 * 1024 * 1024))
+        )
     
     def _get_log_paths(self) -> List[str]:
         """
@@ -81,26 +110,18 @@ class LogSensor(SensorBase):
         
         try:
             log_entries = []
+            timestamp = datetime.now().isoformat()
             
             for log_path in self.log_paths:
-                if not os.path.exists(log_path):
-                    continue
-                
                 try:
-                    # Leer las últimas líneas del log
-                    with open(log_path, 'r', errors='ignore') as f:
-                        lines = f.readlines()
-                        
-                        # Analizar las últimas 100 líneas
-                        recent_lines = lines[-100:] if len(lines) > 100 else lines
+                    # Leer solo las líneas añadidas desde el último escaneo
+                    for line in self.tailer.read_lines(log_path):
+                        log_entries.append({
+                            "source": log_path,
+                            "content": line.strip(),
+                            "timestamp": timestamp
+                        })
                         
-                        for line in recent_lines:
-                            log_entries.append({
-                                "source": log_path,
-                                "content": line.strip(),
-                                "timestamp": datetime.now().isoformat()
-                            })
-                            
                 except PermissionError:
                     self.logger.warning(
                         f"Sin permisos para leer: {log_path}",
@@ -108,6 +129,8 @@ class LogSensor(SensorBase):
                     )
                     continue
             
+            self.tailer.save_state()
+            
             return {
                 "supported": True,
                 "log_entries": log_entries,
@@ -139,22 +162,29 @@ class LogSensor(SensorBase):
         alerts = []
         log_entries = scan_results.get("log_entries", [])
         
+        matcher = self._get_matcher()
+        
         for entry in log_entries:
-            content = entry['content'].lower()
+            # Una sola pasada por línea; solo una alerta por entrada
+            pattern = matcher.match(entry['content'])
+            if pattern is None:
+                continue
             
-            # Buscar patrones sospechosos
-            for pattern in self.suspicious_patterns:
-                if re.search(pattern, content, re.IGNORECASE):
-                    alerts.append({
-                        "severity": "medium",
-                        "type": "suspicious_log_entry",
-                        "message": f"Entrada sospechosa en log: {pattern}",
-                        "details": {
-                            "source": entry['source'],
-                            "content": entry['content'][:200],  # Limitar longitud
-                            "pattern_matched": pattern
-                        }
-                    })
-                    break  # Solo una alerta por entrada
+            alerts.append({
+                "severity": "medium",
+                "type": "suspicious_log_entry",
+                "message": f"Entrada sospechosa en log: {pattern}",
+                "details": {
+                    "source": entry['source'],
+                    "content": entry['content'][:200],  # Limitar longitud
+                    "pattern_matched": pattern
+                }
+            })
         
         return alerts
+    
+    def _get_matcher(self) -> PatternMatcher:
+        """Obtiene el buscador compilado, recompilándolo si cambiaron los patrones"""
+        if self._matcher.patterns != list(dict.fromkeys(self.suspicious_patterns)):
+            self._matcher = PatternMatcher(self.suspicious_patterns)
+        return self._matcher
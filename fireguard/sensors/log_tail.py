@@ -0,0 +1,240 @@
+"""
+Log Tail - Lectura incremental de archivos de log
+
+Lee únicamente los bytes añadidos a cada log desde la lectura anterior,
+guardando (inodo, offset) por archivo. Detecta rotaciones (cambio de
+inodo) y truncados (tamaño menor que el offset) y conserva la posición
+entre reinicios del agente en un archivo de estado JSON.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from fireguard.core.logger import Logger
+
+
+class _TailPosition:
+    """Posición de lectura de un archivo de log"""
+    
+    def __init__(self, inode: int = 0, device: int = 0, offset: int = 0):
+        self.inode = inode
+        self.device = device
+        self.offset = offset
+        self.partial = b""  # Última línea incompleta
+        self.handle = None
+    
+    def to_dict(self) -> Dict[str, int]:
+        # Se persiste el inicio de la línea incompleta para releerla al reiniciar
+        return {
+            "inode": self.inode,
+            "device": self.device,
+            "offset": self.offset - len(self.partial),
+        }
+
+
+class LogTailer:
+    """
+    Lector incremental de logs con seguimiento de offset.
+    
+    Mantiene abierto cada archivo entre lecturas para poder terminar de
+    leer un log rotado antes de pasar al archivo nuevo.
+    """
+    
+    def __init__(
+        self,
+        state_file: Optional[str] = None,
+        initial_lines: int = 100,
+        max_read_bytes: int = 8 * 1024 * 1024
+    ):
+        """
+        Inicializa el lector.
+        
+        Args:
+            state_file: Archivo JSON donde persistir las posiciones (opcional)
+            initial_lines: Líneas finales a leer de un log visto por primera vez
+            max_read_bytes: Máximo de bytes a leer por archivo en cada llamada;
+                el resto se lee en la siguiente
+        """
+        self.logger = Logger()
+        self.state_file = state_file
+        self.initial_lines = initial_lines
+        self.max_read_bytes = max_read_bytes
+        self.positions: Dict[str, _TailPosition] = {}
+        self._load_state()
+    
+    def read_lines(self, path: str) -> List[str]:
+        """
+        Lee las líneas completas añadidas al log desde la última lectura.
+        
+        Args:
+            path: Ruta al archivo de log
+        
+        Returns:
+            Lista de líneas nuevas (sin salto de línea)
+        
+        Raises:
+            PermissionError: Si no hay permisos para leer el archivo
+        """
+        position = self.positions.get(path)
+        lines: List[str] = []
+        
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # El log ha desaparecido: terminar de leer el archivo abierto
+            if position and position.handle:
+                lines = self._finish(position)
+            return lines
+        
+        if position is None:
+            position = self._first_position(path, stat)
+            self.positions[path] = position
+        elif (stat.st_ino, stat.st_dev) != (position.inode, position.device):
+            # Rotación: vaciar el archivo anterior y empezar el nuevo desde 0
+            if position.handle:
+                lines = self._finish(position)
+            if position.inode:
+                self.logger.info(f"Rotación detectada en {path}", module="LogTailer")
+            position.inode, position.device = stat.st_ino, stat.st_dev
+            position.offset = 0
+            position.partial = b""
+        elif stat.st_size < position.offset:
+            # Truncado: el archivo se ha vaciado y vuelto a escribir
+            self.logger.info(f"Truncado detectado en {path}", module="LogTailer")
+            position.offset = 0
+            position.partial = b""
+        
+        if stat.st_size > position.offset:
+            if position.handle is None:
+                position.handle = open(path, "rb")
+            position.handle.seek(position.offset)
+            data = position.handle.read(self.max_read_bytes)
+            position.offset += len(data)
+            lines.extend(self._split(position, data))
+        
+        return lines
+    
+    def expect(self, path: str):
+        """
+        Registra un log que aún no existe para leerlo desde el principio
+        en cuanto se cree.
+        
+        Args:
+            path: Ruta al archivo de log
+        """
+        if path not in self.positions:
+            self.positions[path] = _TailPosition()
+    
+    def save_state(self):
+        """Guarda las posiciones de lectura en el archivo de estado"""
+        if not self.state_file:
+            return
+        
+        # Conservar también las posiciones de logs que aún no se han leído
+        state = dict(self._saved)
+        state.update({path: pos.to_dict() for path, pos in self.positions.items()})
+        state_path = Path(self.state_file)
+        
+        try:
+            state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = state_path.with_suffix(state_path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, state_path)
+        except OSError as e:
+            self.logger.error(
+                f"Error al guardar posiciones de logs: {e}",
+                module="LogTailer"
+            )
+    
+    def close(self):
+        """Cierra todos los archivos abiertos"""
+        for position in self.positions.values():
+            self._close(position)
+    
+    def _first_position(self, path: str, stat: os.stat_result) -> _TailPosition:
+        """Calcula la posición inicial de un archivo aún sin posición en memoria"""
+        saved = self._saved.pop(path, None)
+        if saved and (saved["inode"], saved["device"]) == (stat.st_ino, stat.st_dev):
+            offset = saved["offset"] if saved["offset"] <= stat.st_size else 0
+            return _TailPosition(stat.st_ino, stat.st_dev, offset)
+        
+        if saved:
+            # Rotado mientras el agente estaba detenido: leer el nuevo completo
+            return _TailPosition(stat.st_ino, stat.st_dev, 0)
+        
+        return _TailPosition(stat.st_ino, stat.st_dev, self._tail_offset(path, stat.st_size))
+    
+    def _tail_offset(self, path: str, size: int) -> int:
+        """Obtiene el offset donde empiezan las últimas initial_lines líneas"""
+        if self.initial_lines <= 0 or size == 0:
+            return size
+        
+        block = 64 * 1024
+        offset = size
+        newlines = 0
+        
+        with open(path, "rb") as f:
+            while offset > 0:
+                start = max(0, offset - block)
+                f.seek(start)
+                data = f.read(offset - start)
+                # Ignorar el salto de línea final del archivo
+                end = len(data) - 1 if offset == size and data.endswith(b"\n") else len(data)
+                index = end
+                while True:
+                    index = data.rfind(b"\n", 0, index)
+                    if index < 0:
+                        break
+                    newlines += 1
+                    if newlines == self.initial_lines:
+                        return start + index + 1
+                offset = start
+        
+        return 0
+    
+    def _finish(self, position: _TailPosition) -> List[str]:
+        """Lee lo que quede en el archivo abierto (p. ej. tras una rotación) y lo cierra"""
+        position.handle.seek(position.offset)
+        lines = self._split(position, position.handle.read())
+        if position.partial:
+            lines.append(position.partial.decode("utf-8", errors="ignore"))
+            position.partial = b""
+        self._close(position)
+        return lines
+    
+    @staticmethod
+    def _close(position: _TailPosition):
+        """Cierra el archivo asociado a una posición"""
+        if position.handle:
+            position.handle.close()
+            position.handle = None
+    
+    @staticmethod
+    def _split(position: _TailPosition, data: bytes) -> List[str]:
+        """Separa los bytes leídos en líneas completas"""
+        if not data:
+            return []
+        
+        data = position.partial + data
+        lines = data.split(b"\n")
+        position.partial = lines.pop()
+        
+        return [line.decode("utf-8", errors="ignore").rstrip("\r") for line in lines]
+    
+    def _load_state(self):
+        """Carga las posiciones guardadas de una ejecución anterior"""
+        self._saved: Dict[str, Dict[str, Any]] = {}
+        
+        if not self.state_file or not Path(self.state_file).exists():
+            return
+        
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self._saved = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(
+                f"No se pudo cargar el estado de logs: {e}",
+                module="LogTailer"
+            )
@@ -0,0 +1,357 @@
+"""
+Net Backends - Enumeración de conexiones de red para PortSensor
+
+Cada backend devuelve la lista de sockets TCP/UDP del sistema como
+tuplas Connection:
+
+- PsutilNetBackend: multiplataforma, basado en psutil.net_connections.
+- ProcfsNetBackend: Linux, lee /proc/net/tcp, tcp6, udp y udp6
+  directamente y resuelve el proceso propietario de cada socket con un
+  índice inodo -> pid que se actualiza de forma incremental.
+"""
+
+import os
+import socket
+import sys
+import time
+from typing import Dict, Any, List, NamedTuple, Optional, Set
+import psutil
+
+
+class Connection(NamedTuple):
+    """Socket de red (mismos campos que usa PortSensor)"""
+    proto: str
+    local_ip: str
+    local_port: int
+    remote_ip: Optional[str]
+    remote_port: int
+    status: str
+    pid: Optional[int]
+    inode: int = 0
+
+
+class PsutilNetBackend:
+    """Backend basado en psutil.net_connections"""
+    
+    name = "psutil"
+    
+    @staticmethod
+    def is_available() -> bool:
+        """psutil está disponible en todas las plataformas"""
+        return True
+    
+    def collect(self) -> List[Connection]:
+        """
+        Obtiene los sockets TCP/UDP del sistema.
+        
+        Returns:
+            Lista de conexiones
+        """
+        connections = []
+        
+        for conn in psutil.net_connections(kind='inet'):
+            proto = "tcp" if conn.type == socket.SOCK_STREAM else "udp"
+            if conn.family == socket.AF_INET6:
+                proto += "6"
+            connections.append(Connection(
+                proto,
+                conn.laddr.ip,
+                conn.laddr.port,
+                conn.raddr.ip if conn.raddr else None,
+                conn.raddr.port if conn.raddr else 0,
+                conn.status,
+                conn.pid
+            ))
+        
+        return connections
+
+
+# Estados TCP de include/net/tcp_states.h (mismos nombres que psutil)
+TCP_STATES = {
+    "01": "ESTABLISHED",
+    "02": "SYN_SENT",
+    "03": "SYN_RECV",
+    "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2",
+    "06": "TIME_WAIT",
+    "07": "CLOSE",
+    "08": "CLOSE_WAIT",
+    "09": "LAST_ACK",
+    "0A": "LISTEN",
+    "0B": "CLOSING",
+    "0C": "SYN_RECV",
+}
+
+
+class SocketIndex:
+    """
+    Índice incremental inodo de socket -> pid.
+    
+    Solo se leen las tablas de descriptores (/proc/[pid]/fd) de los
+    procesos nuevos. Si aparece un socket cuyo inodo no está en el índice
+    (p. ej. una conexión aceptada por un proceso ya conocido) se releen,
+    como mucho una vez cada rescan_interval segundos, los procesos cuyo
+    número de descriptores ha cambiado. Los inodos que una relectura no
+    resuelve (p. ej. de procesos cuyos descriptores no se pueden leer sin
+    ser root) se recuerdan y no provocan más relecturas.
+    """
+    
+    def __init__(self, proc_path: str = "/proc", rescan_interval: float = 10.0):
+        """
+        Inicializa el índice.
+        
+        Args:
+            proc_path: Punto de montaje de procfs
+            rescan_interval: Mínimo de segundos entre relecturas
+        """
+        self.proc_path = proc_path
+        self.rescan_interval = rescan_interval
+        self.inodes: Dict[int, int] = {}
+        self._pid_inodes: Dict[int, Set[int]] = {}
+        # Descriptores de cada proceso en su última lectura (None si no se pueden leer)
+        self._fd_counts: Dict[int, Optional[int]] = {}
+        self._unresolved: Set[int] = set()
+        self._last_rescan = float("-inf")
+        self.rescans = 0
+    
+    def refresh(self, wanted: Set[int]):
+        """
+        Actualiza el índice.
+        
+        Args:
+            wanted: Inodos de socket que se necesitan resolver
+        """
+        pids = {int(name) for name in os.listdir(self.proc_path) if name.isdigit()}
+        
+        # Procesos terminados
+        for pid in [p for p in self._pid_inodes if p not in pids]:
+            self._fd_counts.pop(pid, None)
+            for inode in self._pid_inodes.pop(pid):
+                if self.inodes.get(inode) == pid:
+                    del self.inodes[inode]
+        
+        # Procesos nuevos
+        for pid in pids:
+            if pid not in self._pid_inodes:
+                self._scan_pid(pid)
+        
+        # Solo se recuerdan los inodos sin resolver que siguen abiertos
+        self._unresolved &= wanted
+        
+        # Sockets sin propietario conocido: relectura limitada de los
+        # procesos cuyo número de descriptores ha cambiado
+        missing = [i for i in wanted if i not in self.inodes and i not in self._unresolved]
+        if missing:
+            now = time.monotonic()
+            if now - self._last_rescan >= self.rescan_interval:
+                self._last_rescan = now
+                self.rescans += 1
+                for pid in pids:
+                    if self._fd_count(pid) != self._fd_counts.get(pid):
+                        self._scan_pid(pid)
+                self._unresolved.update(i for i in missing if i not in self.inodes)
+    
+    def _fd_count(self, pid: int) -> Optional[int]:
+        """Número de descriptores de un proceso (None si no se pueden leer)"""
+        try:
+            return len(os.listdir(f"{self.proc_path}/{pid}/fd"))
+        except OSError:
+            return None
+    
+    def _scan_pid(self, pid: int):
+        """Lee los sockets abiertos por un proceso"""
+        fd_path = f"{self.proc_path}/{pid}/fd"
+        inodes = set()
+        
+        try:
+            fds = os.listdir(fd_path)
+        except OSError:
+            # Proceso terminado o sin permisos: se recuerda vacío
+            fds = None
+        
+        for fd in fds or ():
+            try:
+                target = os.readlink(f"{fd_path}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(int(target[8:-1]))
+        self._fd_counts[pid] = None if fds is None else len(fds)
+        
+        for inode in self._pid_inodes.get(pid, ()):
+            if inode not in inodes and self.inodes.get(inode) == pid:
+                del self.inodes[inode]
+        
+        self._pid_inodes[pid] = inodes
+        for inode in inodes:
+            self.inodes[inode] = pid
+
+
+class ProcfsNetBackend:
+    """
+    Backend directo sobre /proc/net para Linux.
+    
+    Las direcciones en hexadecimal se convierten una sola vez y se
+    cachean, ya que la mayoría se repiten entre sockets y escaneos.
+    """
+    
+    name = "procfs"
+    
+    TABLES = ("tcp", "tcp6", "udp", "udp6")
+    
+    def __init__(self, proc_path: str = "/proc", rescan_interval: float = 10.0):
+        """
+        Inicializa el backend.
+        
+        Args:
+            proc_path: Punto de montaje de procfs
+            rescan_interval: Mínimo de segundos entre relecturas
+                de las tablas de descriptores
+        """
+        self.proc_path = proc_path
+        self.index = SocketIndex(proc_path, rescan_interval)
+        self._addresses: Dict[str, tuple] = {}
+    
+    @staticmethod
+    def is_available(proc_path: str = "/proc") -> bool:
+        """Verifica que /proc/net de Linux está accesible"""
+        return sys.platform.startswith("linux") and os.path.exists(
+            os.path.join(proc_path, "net", "tcp")
+        )
+    
+    def collect(self) -> List[Connection]:
+        """
+        Obtiene los sockets TCP/UDP del sistema.
+        
+        Returns:
+            Lista de conexiones
+        """
+        rows = []
+        for table in self.TABLES:
+            rows.extend(self._read_table(table))
+        
+        self.index.refresh({row[-1] for row in rows if row[-1]})
+        inodes = self.index.inodes
+        
+        return [
+            Connection(*row[:-1], inodes.get(row[-1]), row[-1])
+            for row in rows
+        ]
+    
+    def _read_table(self, table: str) -> List[tuple]:
+        """Lee una tabla de /proc/net"""
+        try:
+            with open(f"{self.proc_path}/net/{table}", "r") as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            return []
+        
+        tcp = table.startswith("tcp")
+        address = self._address
+        rows = []
+        
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 10:
+                continue
+            
+            local_ip, local_port = address(fields[1])
+            remote_ip, remote_port = address(fields[2])
+            status = TCP_STATES.get(fields[3], "NONE") if tcp else "NONE"
+            if not remote_port and status in ("LISTEN", "NONE", "CLOSE"):
+                remote_ip = None
+            
+            rows.append((table, local_ip, local_port, remote_ip, remote_port,
+                         status, int(fields[9])))
+        
+        return rows
+    
+    def _address(self, value: str) -> tuple:
+        """Convierte 'IP:PUERTO' en hexadecimal del kernel a (ip, puerto)"""
+        cached = self._addresses.get(value)
+        if cached is not None:
+            return cached
+        
+        ip_hex, port_hex = value.split(":")
+        raw = bytes.fromhex(ip_hex)
+        
+        # El kernel escribe cada palabra de 32 bits en orden del host
+        if sys.byteorder == "little":
+            raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+        
+        if len(raw) == 4:
+            ip = socket.inet_ntop(socket.AF_INET, raw)
+        else:
+            ip = socket.inet_ntop(socket.AF_INET6, raw)
+        
+        result = (ip, int(port_hex, 16))
+        if len(self._addresses) > 65536:
+            self._addresses.clear()
+        self._addresses[value] = result
+        return result
+
+
+BACKENDS = {
+    PsutilNetBackend.name: PsutilNetBackend,
+    ProcfsNetBackend.name: ProcfsNetBackend,
+}
+
+
+def create_backend(name: str = "auto"):
+    """
+    Crea un backend de enumeración de conexiones.
+    
+    Args:
+        name: 'auto', 'psutil' o 'procfs'. 'auto' usa procfs en Linux y
+            psutil en el resto; procfs no disponible recae en psutil.
+    
+    Returns:
+        Instancia del backend
+    """
+    if name == "auto":
+        name = "procfs" if ProcfsNetBackend.is_available() else "psutil"
+    
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de red desconocido: {name}")
+    
+    if name == "procfs" and not ProcfsNetBackend.is_available():
+        name = "psutil"
+    
+    return BACKENDS[name]()
+
+
+def benchmark_backends(iterations: int = 5) -> Dict[str, Dict[str, Any]]:
+    """
+    Compara el rendimiento de los backends de red disponibles.
+    
+    Args:
+        iterations: Número de enumeraciones a medir tras la primera
+    
+    Returns:
+        Dict por backend con tiempos en segundos y número de sockets
+    """
+    results = {}
+    
+    for name, backend_class in BACKENDS.items():
+        if not backend_class.is_available():
+            continue
+        
+        backend = backend_class()
+        
+        started = time.perf_counter()
+        connections = backend.collect()
+        full_time = time.perf_counter() - started
+        
+        incremental = []
+        for _ in range(max(1, iterations)):
+            started = time.perf_counter()
+            connections = backend.collect()
+            incremental.append(time.perf_counter() - started)
+        
+        results[name] = {
+            "sockets": len(connections),
+            "full_scan": full_time,
+            "incremental_scan": sum(incremental) / len(incremental),
+        }
+    
+    return results
@@ -0,0 +1,243 @@
+"""
+Pattern Matcher - Búsqueda de múltiples patrones en una sola pasada
+
+Compila un conjunto de expresiones regulares en un único buscador con
+prefiltro literal: de cada patrón se extrae el literal obligatorio más
+largo y todos esos literales se combinan en una sola expresión en forma
+de trie. Cada línea se recorre una vez con el prefiltro y solo los
+patrones cuyo literal aparece se evalúan completos, de modo que el coste
+por línea apenas crece con el número de patrones.
+"""
+
+import re
+from typing import Dict, List, Optional, Iterable
+
+# Caracteres con significado especial fuera de una clase de caracteres
+_META = set(".^$*+?{}[]\\|()")
+
+# Longitud mínima de un literal para usarlo como prefiltro
+_MIN_LITERAL = 3
+
+# Flags en línea con modo verbose: los espacios del patrón no son literales
+_VERBOSE_FLAG = re.compile(r"\(\?[a-zA-Z-]*x[a-zA-Z-]*[:)]")
+
+# Escapes con argumento y su longitud (\xhh, \uhhhh, \Uhhhhhhhh)
+_ESCAPE_ARGS = {"x": 2, "u": 4, "U": 8}
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """
+    Extrae el literal obligatorio más largo de una expresión regular.
+    
+    El análisis es conservador: si el patrón tiene alternativas en el
+    nivel superior, o no contiene un literal de al menos tres
+    caracteres fuera de grupos y clases, se devuelve None.
+    
+    Args:
+        pattern: Expresión regular
+    
+    Returns:
+        Literal en minúsculas o None
+    """
+    if _VERBOSE_FLAG.search(pattern):
+        return None
+    
+    runs = []
+    current: List[str] = []
+    depth = 0
+    i = 0
+    
+    def flush():
+        if current:
+            runs.append("".join(current))
+            current.clear()
+    
+    while i < len(pattern):
+        char = pattern[i]
+        start = i
+        
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if depth == 0 and escaped and not escaped.isalnum():
+                current.append(escaped)
+                continue
+            
+            flush()  # \d, \s, \b, ... no son literales
+            # Saltar también los argumentos del escape para no tomarlos como texto
+            if escaped in _ESCAPE_ARGS:
+                i += _ESCAPE_ARGS[escaped]
+            elif escaped == "N" and pattern[i:i + 1] == "{":
+                end = pattern.find("}", i)
+                if end < 0:
+                    return None
+                i = end + 1
+            elif escaped.isdigit():
+                # Octal (\0, \101) o referencia a grupo (\1, \12)
+                while i < len(pattern) and pattern[i].isdigit() and i - start < 4:
+                    i += 1
+            continue
+        
+        if char == "[":
+            # Saltar la clase de caracteres completa
+            flush()
+            i += 2 if pattern[i + 1:i + 2] == "]" else 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            continue
+        
+        if char == "(":
+            flush()
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth > 0:
+            pass
+        elif char == "|":
+            return None
+        elif char in "*?{":
+            # El carácter anterior es opcional o repetible un número variable de veces
+            if current:
+                current.pop()
+            flush()
+            if char == "{":
+                i = pattern.find("}", i)
+                if i < 0:
+                    return None
+        elif char == "+":
+            flush()
+        elif char in _META:
+            flush()
+        else:
+            current.append(char)
+        
+        i += 1
+    
+    flush()
+    
+    best = max(runs, key=len, default="")
+    return best.lower() if len(best) >= _MIN_LITERAL else None
+
+
+def _trie_regex(literals: Iterable[str]) -> str:
+    """
+    Construye una expresión regular en forma de trie que reconoce los
+    literales dados, prefiriendo el más largo en cada posición.
+    """
+    trie: Dict[str, dict] = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, dict]) -> str:
+        optional = "" in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        
+        if not branches:
+            return ""
+        
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            # Cuantificador voraz: se intenta primero el literal más largo
+            return "(?:" + body + ")?"
+        return body
+    
+    return build(trie)
+
+
+class PatternMatcher:
+    """
+    Buscador de múltiples patrones con prefiltro literal.
+    
+    Devuelve el primer patrón (en el orden en que se declararon) que
+    coincide con la línea, igual que recorrerlos uno a uno con re.search.
+    """
+    
+    def __init__(self, patterns: Iterable[str], flags: int = re.IGNORECASE):
+        """
+        Compila los patrones.
+        
+        Args:
+            patterns: Expresiones regulares (se eliminan duplicados)
+            flags: Flags de compilación de cada patrón
+        
+        Raises:
+            re.error: Si algún patrón no es una expresión regular válida
+        """
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self._compiled = [re.compile(p, flags) for p in self.patterns]
+        
+        # Patrones sin literal utilizable: se evalúan siempre
+        self._always: List[int] = []
+        # Literal -> índices de patrones que quedan como candidatos si aparece
+        self._candidates: Dict[str, List[int]] = {}
+        # Patrones que son un literal puro: basta con encontrar el literal
+        self._pure_literal = [False] * len(self.patterns)
+        
+        anchors: Dict[str, List[int]] = {}
+        for index, pattern in enumerate(self.patterns):
+            literal = None if flags & re.VERBOSE else required_literal(pattern)
+            if literal is None:
+                self._always.append(index)
+                continue
+            anchors.setdefault(literal, []).append(index)
+            self._pure_literal[index] = (
+                bool(flags & re.IGNORECASE) and not (flags & re.VERBOSE) and
+                not any(char in _META for char in pattern) and
+                literal == pattern.lower()
+            )
+        
+        # El trie devuelve el literal más largo en cada posición; los
+        # literales que son prefijo suyo también están presentes
+        for literal in anchors:
+            self._candidates[literal] = sorted(
+                index
+                for other, indexes in anchors.items()
+                if literal.startswith(other)
+                for index in indexes
+            )
+        
+        self._prefilter = (
+            re.compile("(?=(" + _trie_regex(anchors) + "))") if anchors else None
+        )
+    
+    def __len__(self) -> int:
+        return len(self.patterns)
+    
+    def match(self, line: str) -> Optional[str]:
+        """
+        Busca el primer patrón que coincide con la línea.
+        
+        Args:
+            line: Línea a analizar
+        
+        Returns:
+            Patrón que ha coincidido o None
+        """
+        candidates = set(self._always)
+        
+        if self._prefilter is not None:
+            for found in self._prefilter.finditer(line.lower()):
+                candidates.update(self._candidates[found.group(1)])
+        
+        for index in sorted(candidates):
+            if self._pure_literal[index] or self._compiled[index].search(line):
+                return self.patterns[index]
+        
+        return None
+    
+    def match_lines(self, lines: Iterable[str]) -> List[Optional[str]]:
+        """
+        Aplica match() a varias líneas.
+        
+        Args:
+            lines: Líneas a analizar
+        
+        Returns:
+            Patrón coincidente (o None) para cada línea
+        """
+        return [self.match(line) for line in lines]
@@ -2,9 +2,10 @@
 Port Sensor - Monitoreo de puertos abiertos en el sistema
 """
 
-import psutil
 from typing import Dict, Any, List
 from fireguard.core.sensor_base import SensorBase
+from fireguard.sensors.net_backends import create_backend
+from fireguard.sensors.connection_table import ConnectionTable
 
 
 class PortSensor(SensorBase):
@@ -15,6 +16,8 @@ class PortSensor(SensorBase):
     actividades sospechosas en la red.
     """
     
+    config_section = "port_monitor"
+    
     def __init__(self, config=None):
         """Inicializa el sensor de puertos"""
         super().__init__("PortSensor", config)
@@ -40,35 +43,53 @@ class PortSensor(SensorBase):
         
         # Puertos conocidos como peligrosos
         self.dangerous_ports = [23, 445, 3389]
+        
+        # Backend de enumeración de conexiones (procfs en Linux, psutil en el resto)
+        self.backend = create_backend(self.get_setting("backend", "auto"))
+        
+        # Modo delta: solo se reportan conexiones abiertas, cerradas o que
+        # cambian de estado; con False se reporta la lista completa
+        self.delta_mode = bool(self.get_setting("delta_mode", True))
+        self.connection_table = ConnectionTable()
     
     def scan(self) -> Dict[str, Any]:
         """
         Escanea los puertos abiertos en el sistema.
         
+        En modo delta solo se devuelven las conexiones abiertas ('opened'),
+        cerradas ('closed', con su duración) o que han cambiado de estado
+        ('state_changed') desde el escaneo anterior, más los totales.
+        
         Returns:
             Dict con información de puertos y conexiones
         """
         try:
-            connections = psutil.net_connections(kind='inet')
+            connections = self.backend.collect()
+            
+            if self.delta_mode:
+                events = self.connection_table.update(connections)
+                return {
+                    "opened": events["opened"],
+                    "closed": events["closed"],
+                    "state_changed": events["state_changed"],
+                    "total_connections": len(self.connection_table),
+                    "total_listening": self.connection_table.count('LISTEN'),
+                    "total_established": self.connection_table.count('ESTABLISHED'),
+                    "backend": self.backend.name
+                }
             
             listening_ports = []
             established_connections = []
             
             for conn in connections:
                 if conn.status == 'LISTEN':
-                    port_info = {
-                        "port": conn.laddr.port,
-                        "address": conn.laddr.ip,
-                        "pid": conn.pid,
-                        "service": self.common_ports.get(conn.laddr.port, "Unknown")
-                    }
-                    listening_ports.append(port_info)
+                    listening_ports.append(self._port_info(conn))
                 
                 elif conn.status == 'ESTABLISHED':
                     conn_info = {
-                        "local_port": conn.laddr.port,
-                        "remote_addr": conn.raddr.ip if conn.raddr else "N/A",
-                        "remote_port": conn.raddr.port if conn.raddr else 0,
+                        "local_port": conn.local_port,
+                        "remote_addr": conn.remote_ip or "N/A",
+                        "remote_port": conn.remote_port,
                         "pid": conn.pid,
                         "status": conn.status
                     }
@@ -78,7 +99,8 @@ class PortSensor(SensorBase):
                 "listening_ports": listening_ports,
                 "established_connections": established_connections,
                 "total_listening": len(listening_ports),
-                "total_established": len(established_connections)
+                "total_established": len(established_connections),
+                "backend": self.backend.name
             }
             
         except Exception as e:
@@ -89,6 +111,28 @@ class PortSensor(SensorBase):
                 "established_connections": []
             }
     
+    def _port_info(self, conn) -> Dict[str, Any]:
+        """
+        Describe un puerto en escucha.
+        
+        Args:
+            conn: Conexión (tupla Connection o registro de ConnectionTable)
+            
+        Returns:
+            Dict con puerto, dirección, pid y servicio
+        """
+        if isinstance(conn, dict):
+            port, address, pid = conn["local_port"], conn["local_ip"], conn["pid"]
+        else:
+            port, address, pid = conn.local_port, conn.local_ip, conn.pid
+        
+        return {
+            "port": port,
+            "address": address,
+            "pid": pid,
+            "service": self.common_ports.get(port, "Unknown")
+        }
+    
     def analyze(self, scan_results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Analiza los resultados del escaneo de puertos.
@@ -101,7 +145,15 @@ class PortSensor(SensorBase):
         """
         alerts = []
         
-        listening_ports = scan_results.get("listening_ports", [])
+        if "opened" in scan_results:
+            # Modo delta: solo los puertos que han empezado a escuchar
+            listening_ports = [
+                self._port_info(conn)
+                for conn in scan_results["opened"] + scan_results.get("state_changed", [])
+                if conn["status"] == 'LISTEN'
+            ]
+        else:
+            listening_ports = scan_results.get("listening_ports", [])
         
         for port_info in listening_ports:
             port = port_info["port"]
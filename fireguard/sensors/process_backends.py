@@ -0,0 +1,356 @@
+"""
+Process Backends - Enumeración de procesos para ProcessSensor
+
+Cada backend recorre los procesos del sistema y entrega a la
+ProcessTable los contadores de los procesos ya conocidos y los
+registros completos de los nuevos:
+
+- PsutilProcessBackend: multiplataforma, basado en psutil.
+- ProcfsProcessBackend: Linux, lee /proc/[pid]/stat y /proc/[pid]/status
+  directamente y cachea la resolución uid -> usuario.
+"""
+
+import os
+import sys
+import time
+from typing import Dict, Any, Tuple, Optional
+import psutil
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+ProcessKey = Tuple[int, float]
+Counters = Dict[ProcessKey, Tuple[Optional[float], Optional[float]]]
+NewRecords = Dict[ProcessKey, Dict[str, Any]]
+
+
+class PsutilProcessBackend:
+    """
+    Backend basado en psutil.
+    
+    Conserva los handles de psutil.Process entre escaneos para calcular
+    la CPU con cpu_percent(interval=None) sin bloquear.
+    """
+    
+    name = "psutil"
+    
+    def __init__(self):
+        """Inicializa el backend"""
+        self._handles: Dict[ProcessKey, psutil.Process] = {}
+    
+    @staticmethod
+    def is_available() -> bool:
+        """psutil está disponible en todas las plataformas"""
+        return True
+    
+    def prime(self):
+        """Ceba el contador de CPU de todos los procesos sin leer nada más"""
+        for proc in psutil.process_iter():
+            try:
+                proc.cpu_percent(interval=None)
+                self._handles[(proc.pid, proc.create_time())] = proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    
+    def collect(self, known) -> Tuple[Counters, NewRecords]:
+        """
+        Recorre los procesos del sistema.
+        
+        Args:
+            known: Contenedor con las claves (pid, create_time) ya conocidas
+        
+        Returns:
+            Tupla (contadores de procesos conocidos, registros de procesos nuevos)
+        """
+        counters = {}
+        new_records = {}
+        handles = {}
+        
+        for proc in psutil.process_iter():
+            try:
+                key = (proc.pid, proc.create_time())
+                
+                handle = self._handles.get(key)
+                if handle is not None:
+                    try:
+                        cpu_percent = handle.cpu_percent(interval=None)
+                    except psutil.AccessDenied:
+                        cpu_percent = None
+                else:
+                    handle = proc
+                    handle.cpu_percent(interval=None)
+                    cpu_percent = 0.0
+                
+                if key in known:
+                    # Sin permisos para leer la CPU o la memoria se conserva
+                    # el último valor: descartarlo haría que el proceso
+                    # pareciera terminado y volviera a aparecer como nuevo
+                    try:
+                        memory_percent = handle.memory_percent()
+                    except psutil.AccessDenied:
+                        memory_percent = None
+                    counters[key] = (cpu_percent, memory_percent)
+                else:
+                    info = handle.as_dict(['name', 'username', 'memory_percent'])
+                    new_records[key] = {
+                        "pid": key[0],
+                        "name": info['name'] or "",
+                        "username": info['username'],
+                        "create_time": key[1],
+                        "cpu_percent": cpu_percent or 0.0,
+                        "memory_percent": info['memory_percent'] or 0.0
+                    }
+                
+                handles[key] = handle
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        
+        # Los procesos terminados desaparecen con el diccionario anterior
+        self._handles = handles
+        return counters, new_records
+
+
+class ProcfsProcessBackend:
+    """
+    Backend directo sobre /proc para Linux.
+    
+    Lee /proc/[pid]/stat de cada proceso en una sola pasada (CPU, RSS y
+    hora de inicio) y /proc/[pid]/status solo para los procesos nuevos.
+    La CPU se calcula por diferencias de utime+stime entre escaneos.
+    """
+    
+    name = "procfs"
+    
+    def __init__(self, proc_path: str = "/proc"):
+        """
+        Inicializa el backend.
+        
+        Args:
+            proc_path: Punto de montaje de procfs
+        """
+        self.proc_path = proc_path
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._total_memory = self._read_total_memory()
+        self._boot_time = self._read_boot_time()
+        self._users: Dict[int, Optional[str]] = {}
+        # (pid, starttime) -> (tiempo de CPU en ticks, instante de lectura)
+        self._samples: Dict[Tuple[int, int], Tuple[int, float]] = {}
+    
+    @staticmethod
+    def is_available(proc_path: str = "/proc") -> bool:
+        """Verifica que procfs de Linux está montado y accesible"""
+        return sys.platform.startswith("linux") and os.path.exists(
+            os.path.join(proc_path, "self", "stat")
+        )
+    
+    def prime(self):
+        """Toma una muestra de CPU de todos los procesos"""
+        self.collect(())
+    
+    def collect(self, known) -> Tuple[Counters, NewRecords]:
+        """
+        Recorre /proc en una sola pasada.
+        
+        Args:
+            known: Contenedor con las claves (pid, create_time) ya conocidas
+        
+        Returns:
+            Tupla (contadores de procesos conocidos, registros de procesos nuevos)
+        """
+        counters = {}
+        new_records = {}
+        samples = {}
+        previous = self._samples
+        ticks = self._clock_ticks
+        memory_factor = self._page_size * 100.0 / self._total_memory
+        proc_path = self.proc_path
+        
+        for entry in os.scandir(proc_path):
+            name = entry.name
+            if not name.isdigit():
+                continue
+            
+            try:
+                with open(f"{proc_path}/{name}/stat", "rb") as f:
+                    stat = f.read()
+            except (FileNotFoundError, ProcessLookupError, PermissionError):
+                continue
+            
+            # El nombre (comm) va entre paréntesis y puede contener espacios
+            comm_start = stat.find(b"(")
+            comm_end = stat.rfind(b")")
+            fields = stat[comm_end + 2:].split()
+            
+            try:
+                pid = int(name)
+                cpu_ticks = int(fields[11]) + int(fields[12])  # utime + stime
+                starttime = int(fields[19])
+                memory_percent = int(fields[21]) * memory_factor  # rss en páginas
+            except (IndexError, ValueError):
+                continue
+            
+            now = time.monotonic()
+            sample_key = (pid, starttime)
+            samples[sample_key] = (cpu_ticks, now)
+            
+            last = previous.get(sample_key)
+            if last is not None and now > last[1]:
+                cpu_percent = (cpu_ticks - last[0]) / ticks / (now - last[1]) * 100
+                cpu_percent = round(cpu_percent, 1)
+            else:
+                cpu_percent = 0.0
+            
+            key = (pid, round(self._boot_time + starttime / ticks, 2))
+            
+            if key in known:
+                counters[key] = (cpu_percent, memory_percent)
+                continue
+            
+            comm = stat[comm_start + 1:comm_end].decode("utf-8", "replace")
+            new_records[key] = {
+                "pid": pid,
+                "name": self._full_name(pid, comm),
+                "username": self._read_username(pid),
+                "create_time": key[1],
+                "cpu_percent": cpu_percent,
+                "memory_percent": memory_percent
+            }
+        
+        self._samples = samples
+        return counters, new_records
+    
+    def _full_name(self, pid: int, comm: str) -> str:
+        """
+        Obtiene el nombre completo del proceso.
+        
+        El kernel trunca comm a 15 caracteres; igual que psutil, en ese
+        caso se usa el ejecutable de la línea de comandos si coincide.
+        """
+        if len(comm) < 15:
+            return comm
+        
+        try:
+            with open(f"{self.proc_path}/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().split(b"\0", 1)[0]
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            return comm
+        
+        exe_name = os.path.basename(cmdline.decode("utf-8", "replace"))
+        return exe_name if exe_name.startswith(comm) else comm
+    
+    def _read_username(self, pid: int) -> Optional[str]:
+        """Obtiene el usuario real del proceso a partir de /proc/[pid]/status"""
+        try:
+            with open(f"{self.proc_path}/{pid}/status", "rb") as f:
+                for line in f:
+                    if line.startswith(b"Uid:"):
+                        uid = int(line.split()[1])
+                        break
+                else:
+                    return None
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            return None
+        
+        if uid not in self._users:
+            self._users[uid] = self._resolve_uid(uid)
+        return self._users[uid]
+    
+    @staticmethod
+    def _resolve_uid(uid: int) -> str:
+        """Resuelve un uid a nombre de usuario (o el uid si no existe)"""
+        if pwd is None:
+            return str(uid)
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except KeyError:
+            return str(uid)
+    
+    def _read_total_memory(self) -> int:
+        """Lee la memoria física total (bytes) de /proc/meminfo"""
+        with open(f"{self.proc_path}/meminfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"MemTotal:"):
+                    return int(line.split()[1]) * 1024
+        return psutil.virtual_memory().total
+    
+    def _read_boot_time(self) -> float:
+        """Lee la hora de arranque del sistema de /proc/stat"""
+        with open(f"{self.proc_path}/stat", "rb") as f:
+            for line in f:
+                if line.startswith(b"btime"):
+                    return float(line.split()[1])
+        return psutil.boot_time()
+
+
+BACKENDS = {
+    PsutilProcessBackend.name: PsutilProcessBackend,
+    ProcfsProcessBackend.name: ProcfsProcessBackend,
+}
+
+
+def create_backend(name: str = "auto"):
+    """
+    Crea un backend de enumeración de procesos.
+    
+    Args:
+        name: 'auto', 'psutil' o 'procfs'. 'auto' usa procfs en Linux y
+            psutil en el resto; procfs no disponible recae en psutil.
+    
+    Returns:
+        Instancia del backend
+    """
+    if name == "auto":
+        name = "procfs" if ProcfsProcessBackend.is_available() else "psutil"
+    
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de procesos desconocido: {name}")
+    
+    if name == "procfs" and not ProcfsProcessBackend.is_available():
+        name = "psutil"
+    
+    return BACKENDS[name]()
+
+
+def benchmark_backends(iterations: int = 5) -> Dict[str, Dict[str, Any]]:
+    """
+    Compara el rendimiento de los backends disponibles.
+    
+    Para cada backend mide una enumeración completa (todos los procesos
+    son nuevos) y varias enumeraciones incrementales sobre la misma tabla.
+    
+    Args:
+        iterations: Número de enumeraciones incrementales a medir
+    
+    Returns:
+        Dict por backend con tiempos en segundos y número de procesos
+    """
+    results = {}
+    
+    for name, backend_class in BACKENDS.items():
+        if not backend_class.is_available():
+            continue
+        
+        backend = backend_class()
+        
+        started = time.perf_counter()
+        counters, new_records = backend.collect(())
+        full_time = time.perf_counter() - started
+        
+        known = set(new_records)
+        incremental = []
+        for _ in range(max(1, iterations)):
+            started = time.perf_counter()
+            counters, new_records = backend.collect(known)
+            incremental.append(time.perf_counter() - started)
+            known = set(counters) | set(new_records)
+        
+        results[name] = {
+            "processes": len(known),
+            "full_scan": full_time,
+            "incremental_scan": sum(incremental) / len(incremental),
+        }
+    
+    return results
@@ -2,9 +2,13 @@
 Process Sensor - Monitoreo de procesos en ejecución
 """
 
+import time
 import psutil
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from fireguard.core.sensor_base import SensorBase
+from fireguard.sensors.process_table import ProcessTable
+from fireguard.sensors.process_backends import create_backend
+from fireguard.ai.process_baselines import ProcessBaselines
 
 
 class ProcessSensor(SensorBase):
@@ -15,6 +19,8 @@ class ProcessSensor(SensorBase):
     posibles amenazas de seguridad.
     """
     
+    config_section = "process_monitor"
+    
     def __init__(self, config=None):
         """Inicializa el sensor de procesos"""
         super().__init__("ProcessSensor", config)
@@ -28,6 +34,40 @@ class ProcessSensor(SensorBase):
         # Umbrales de uso de recursos
         self.cpu_threshold = 80.0  # Porcentaje
         self.memory_threshold = 80.0  # Porcentaje
+        
+        # Muestreo de CPU: 'delta' (no bloqueante, por diferencias entre
+        # escaneos) o 'blocking' (psutil.cpu_percent(interval=1))
+        self.cpu_sampling = self.get_setting("cpu_sampling", "delta")
+        # Espera inicial para tener una primera muestra útil en modo 'delta'
+        self.cpu_warmup = float(self.get_setting("cpu_warmup", 0.1))
+        
+        # Tabla incremental de procesos indexada por (pid, create_time)
+        self.process_table = ProcessTable(
+            change_threshold=float(self.get_setting("change_threshold", 1.0)),
+            thresholds={
+                "cpu_percent": self.cpu_threshold,
+                "memory_percent": self.memory_threshold,
+            }
+        )
+        
+        # Backend de enumeración: 'auto' (procfs en Linux), 'psutil' o 'procfs'
+        self.backend = create_backend(self.get_setting("backend", "auto"))
+        # Tiempos de CPU del sistema en el escaneo anterior
+        self._last_cpu_times: Optional[Any] = None
+        
+        # Líneas base de CPU y memoria por nombre de proceso
+        baselines = self.get_setting("baselines", {}) or {}
+        self.baselines: Optional[ProcessBaselines] = None
+        if baselines.get("enabled", True):
+            self.baselines = ProcessBaselines(
+                capacity=int(baselines.get("capacity", 4096)),
+                halflife=float(baselines.get("halflife", 50)),
+                min_samples=int(baselines.get("min_samples", 10)),
+                zscore=float(baselines.get("zscore", 4.0)),
+                ratio=float(baselines.get("ratio", 3.0)),
+                min_value=float(baselines.get("min_value", 5.0)),
+                max_idle=float(baselines.get("max_idle", 86400))
+            )
     
     def scan(self) -> Dict[str, Any]:
         """
@@ -37,31 +77,50 @@ class ProcessSensor(SensorBase):
             Dict con información de procesos
         """
         try:
-            processes = []
-            
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent']):
-                try:
-                    proc_info = proc.info
-                    processes.append({
-                        "pid": proc_info['pid'],
-                        "name": proc_info['name'],
-                        "username": proc_info['username'],
-                        "cpu_percent": proc_info['cpu_percent'] or 0.0,
-                        "memory_percent": proc_info['memory_percent'] or 0.0
-                    })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
             # Información general del sistema
             cpu_count = psutil.cpu_count()
             memory_info = psutil.virtual_memory()
             
+            if self.cpu_sampling == "blocking":
+                processes = self._scan_processes_blocking()
+                return {
+                    "processes": processes,
+                    "total_processes": len(processes),
+                    "system_cpu_percent": psutil.cpu_percent(interval=1),
+                    "system_memory_percent": memory_info.percent,
+                    "cpu_count": cpu_count,
+                    "baseline_anomalies": self._observe_baselines(processes)
+                }
+            
+            primed = False
+            if self._last_cpu_times is None and self.cpu_warmup > 0:
+                # Primer escaneo: cebar contadores y esperar una muestra corta
+                self.backend.prime()
+                self._system_cpu_percent()
+                time.sleep(self.cpu_warmup)
+                primed = True
+            
+            deltas = self._scan_processes_delta()
+            processes = self.process_table.records()
+            
+            # Los procesos nuevos reportan 0.0 de CPU hasta tener una muestra
+            # previa: no entran en las líneas base hasta el siguiente escaneo
+            sampled = processes
+            if deltas["spawned"] and not primed:
+                spawned = {id(p) for p in deltas["spawned"]}
+                sampled = [p for p in processes if id(p) not in spawned]
+            
             return {
                 "processes": processes,
-                "total_processes": len(processes),
-                "system_cpu_percent": psutil.cpu_percent(interval=1),
+                "total_processes": len(self.process_table),
+                "backend": self.backend.name,
+                "spawned": deltas["spawned"],
+                "exited": deltas["exited"],
+                "changed": deltas["changed"],
+                "system_cpu_percent": self._system_cpu_percent(),
                 "system_memory_percent": memory_info.percent,
-                "cpu_count": cpu_count
+                "cpu_count": cpu_count,
+                "baseline_anomalies": self._observe_baselines(sampled)
             }
             
         except Exception as e:
@@ -72,6 +131,77 @@ class ProcessSensor(SensorBase):
                 "total_processes": 0
             }
     
+    def _scan_processes_blocking(self) -> List[Dict[str, Any]]:
+        """
+        Enumera procesos con los valores de CPU que devuelve process_iter.
+        
+        Returns:
+            Lista de procesos
+        """
+        processes = []
+        
+        for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent']):
+            try:
+                proc_info = proc.info
+                processes.append({
+                    "pid": proc_info['pid'],
+                    "name": proc_info['name'],
+                    "username": proc_info['username'],
+                    "cpu_percent": proc_info['cpu_percent'] or 0.0,
+                    "memory_percent": proc_info['memory_percent'] or 0.0
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        
+        return processes
+    
+    def _scan_processes_delta(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Actualiza la tabla de procesos de forma incremental.
+        
+        El backend solo examina por completo (nombre, usuario) los procesos
+        nuevos; de los ya conocidos relee únicamente los contadores. La CPU
+        se calcula por diferencias con el escaneo anterior, sin bloquear; un
+        proceso sin muestra previa reporta 0.0 hasta el siguiente escaneo.
+        
+        Returns:
+            Dict con los procesos 'spawned', 'exited' y 'changed'
+        """
+        counters, new_records = self.backend.collect(self.process_table)
+        return self.process_table.update(counters, new_records)
+    
+    def _system_cpu_percent(self) -> float:
+        """
+        Calcula el uso de CPU del sistema desde el escaneo anterior.
+        
+        Returns:
+            Porcentaje de CPU (0.0 si no hay muestra previa)
+        """
+        current = psutil.cpu_times()
+        previous, self._last_cpu_times = self._last_cpu_times, current
+        
+        if previous is None:
+            return 0.0
+        
+        busy_now, total_now = self._cpu_busy_total(current)
+        busy_prev, total_prev = self._cpu_busy_total(previous)
+        total_delta = total_now - total_prev
+        
+        if total_delta <= 0:
+            return 0.0
+        
+        percent = (busy_now - busy_prev) / total_delta * 100
+        return round(min(100.0, max(0.0, percent)), 1)
+    
+    @staticmethod
+    def _cpu_busy_total(cpu_times) -> tuple:
+        """Obtiene (tiempo ocupado, tiempo total) de psutil.cpu_times()"""
+        total = sum(cpu_times)
+        # En Linux guest/guest_nice ya están incluidos en user/nice
+        total -= getattr(cpu_times, 'guest', 0) + getattr(cpu_times, 'guest_nice', 0)
+        idle = cpu_times.idle + getattr(cpu_times, 'iowait', 0)
+        return total - idle, total
+    
     def analyze(self, scan_results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Analiza los resultados del escaneo de procesos.
@@ -84,27 +214,49 @@ class ProcessSensor(SensorBase):
         """
         alerts = []
         
-        processes = scan_results.get("processes", [])
+        if "spawned" in scan_results:
+            # Modo incremental: nombres solo en procesos nuevos, umbrales
+            # solo en procesos nuevos, con contadores modificados o que
+            # acaban de cruzar un umbral
+            name_candidates = scan_results["spawned"]
+            usage_candidates = name_candidates + scan_results.get("changed", [])
+        else:
+            name_candidates = usage_candidates = scan_results.get("processes", [])
+        
+        # Los registros de la tabla incremental se actualizan en cada escaneo:
+        # las alertas de un mismo proceso comparten una única copia (en modo
+        # 'blocking' los registros son del escaneo y se usan tal cual)
+        snapshots: Dict[int, Dict[str, Any]] = {}
+        live = "spawned" in scan_results
         
-        for proc in processes:
+        def details(proc: Dict[str, Any]) -> Dict[str, Any]:
+            if not live:
+                return proc
+            snapshot = snapshots.get(id(proc))
+            if snapshot is None:
+                snapshot = snapshots[id(proc)] = dict(proc)
+            return snapshot
+        
+        for proc in name_candidates:
             # Detectar nombres sospechosos
-            proc_name_lower = proc['name'].lower()
+            proc_name_lower = (proc['name'] or "").lower()
             for suspicious in self.suspicious_names:
                 if suspicious in proc_name_lower:
                     alerts.append({
                         "severity": "critical",
                         "type": "suspicious_process",
                         "message": f"Proceso sospechoso detectado: {proc['name']}",
-                        "details": proc
+                        "details": details(proc)
                     })
-            
+        
+        for proc in usage_candidates:
             # Detectar alto uso de CPU
             if proc['cpu_percent'] > self.cpu_threshold:
                 alerts.append({
                     "severity": "medium",
                     "type": "high_cpu_usage",
                     "message": f"Proceso con uso elevado de CPU: {proc['name']} ({proc['cpu_percent']:.1f}%)",
-                    "details": proc
+                    "details": details(proc)
                 })
             
             # Detectar alto uso de memoria
@@ -113,9 +265,13 @@ class ProcessSensor(SensorBase):
                     "severity": "medium",
                     "type": "high_memory_usage",
                     "message": f"Proceso con uso elevado de memoria: {proc['name']} ({proc['memory_percent']:.1f}%)",
-                    "details": proc
+                    "details": details(proc)
                 })
         
+        # Las líneas base se actualizan en scan(): analizar dos veces el
+        # mismo escaneo no lo cuenta dos veces
+        alerts.extend(self._baseline_alerts(scan_results.get("baseline_anomalies", [])))
+        
         # Detectar uso elevado del sistema
         system_cpu = scan_results.get("system_cpu_percent", 0)
         if system_cpu > 90:
@@ -136,3 +292,62 @@ class ProcessSensor(SensorBase):
             })
         
         return alerts
+    
+    def _observe_baselines(self, processes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Compara los procesos con la línea base de su nombre y la actualiza.
+        
+        Args:
+            processes: Procesos del escaneo con muestra de CPU
+        
+        Returns:
+            Anomalías de ProcessBaselines.observe (vacío sin líneas base)
+        """
+        if self.baselines is None:
+            return []
+        return self.baselines.observe(processes)
+    
+    def _baseline_alerts(self, anomalies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Convierte las anomalías de las líneas base en alertas.
+        
+        Args:
+            anomalies: Anomalías detectadas en scan()
+        
+        Returns:
+            Alertas de procesos que se desvían de su comportamiento habitual
+        """
+        alerts = []
+        labels = {"cpu_percent": "CPU", "memory_percent": "memoria"}
+        
+        for anomaly in anomalies:
+            proc = anomaly["process"]
+            label = labels.get(anomaly["metric"], anomaly["metric"])
+            ratio = anomaly["ratio"]
+            if anomaly["mean"] >= anomaly["reference"]:
+                comparison = f"{ratio:.1f}x su media de {anomaly['mean']:.1f}%"
+            else:
+                # Proceso habitualmente inactivo: se compara con el mínimo absoluto
+                comparison = (
+                    f"{ratio:.1f}x el mínimo de {anomaly['reference']:.1f}%; "
+                    f"su media es {anomaly['mean']:.1f}%"
+                )
+            details = dict(proc)
+            details.update({
+                "metric": anomaly["metric"],
+                "baseline_mean": round(anomaly["mean"], 2),
+                "baseline_std": round(anomaly["std"], 2),
+                "zscore": round(anomaly["zscore"], 2),
+                "ratio": round(ratio, 1),
+            })
+            alerts.append({
+                "severity": "high" if ratio >= 10 else "medium",
+                "type": "process_baseline_anomaly",
+                "message": (
+                    f"Uso de {label} inusual para {proc['name']}: {anomaly['value']:.1f}% "
+                    f"({comparison})"
+                ),
+                "details": details
+            })
+        
+        return alerts
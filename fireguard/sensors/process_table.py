@@ -0,0 +1,117 @@
+"""
+Process Table - Tabla incremental de procesos
+
+Mantiene el estado de los procesos entre escaneos, indexado por
+(pid, create_time) para distinguir PIDs reutilizados, y calcula los
+cambios (procesos nuevos, terminados y con contadores modificados o
+que cruzan un umbral de alerta) para que el análisis trabaje solo sobre
+lo que ha cambiado.
+"""
+
+from typing import Dict, Any, List, Tuple, Iterator, Optional
+
+ProcessKey = Tuple[int, float]
+
+
+class ProcessTable:
+    """
+    Tabla persistente de procesos.
+    
+    Los registros se crean una sola vez, cuando aparece el proceso, y en
+    los escaneos siguientes solo se actualizan sus contadores (CPU y
+    memoria) en el mismo diccionario.
+    """
+    
+    def __init__(
+        self,
+        change_threshold: float = 1.0,
+        thresholds: Optional[Dict[str, float]] = None
+    ):
+        """
+        Inicializa la tabla de procesos.
+        
+        Args:
+            change_threshold: Variación mínima (en puntos porcentuales) de
+                CPU o memoria para considerar que un proceso ha cambiado
+            thresholds: Umbrales de alerta por contador ('cpu_percent',
+                'memory_percent'); un proceso que pasa de no superarlo a
+                superarlo cuenta como modificado aunque suba poco a poco
+        """
+        self.change_threshold = change_threshold
+        self.thresholds = dict(thresholds or {})
+        self.entries: Dict[ProcessKey, Dict[str, Any]] = {}
+    
+    def __contains__(self, key: ProcessKey) -> bool:
+        return key in self.entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.entries.values())
+    
+    def records(self) -> List[Dict[str, Any]]:
+        """Obtiene la lista de registros actuales (sin copiarlos)"""
+        return list(self.entries.values())
+    
+    def update(
+        self,
+        counters: Dict[ProcessKey, Tuple[Optional[float], Optional[float]]],
+        new_records: Dict[ProcessKey, Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Aplica un escaneo a la tabla y calcula los cambios.
+        
+        Args:
+            counters: (cpu_percent, memory_percent) de los procesos ya
+                conocidos; None conserva el último valor leído
+            new_records: Registros completos de los procesos nuevos
+        
+        Returns:
+            Dict con las listas 'spawned', 'exited' y 'changed'
+        """
+        changed = []
+        threshold = self.change_threshold
+        cpu_limit = self.thresholds.get("cpu_percent", float("inf"))
+        memory_limit = self.thresholds.get("memory_percent", float("inf"))
+        
+        for key, (cpu_percent, memory_percent) in counters.items():
+            entry = self.entries.get(key)
+            if entry is None:
+                continue
+            
+            last_cpu = entry["cpu_percent"]
+            last_memory = entry["memory_percent"]
+            if cpu_percent is None:
+                cpu_percent = last_cpu
+            if memory_percent is None:
+                memory_percent = last_memory
+            
+            if (abs(cpu_percent - last_cpu) >= threshold or
+                    abs(memory_percent - last_memory) >= threshold or
+                    last_cpu <= cpu_limit < cpu_percent or
+                    last_memory <= memory_limit < memory_percent):
+                changed.append(entry)
+            
+            entry["cpu_percent"] = cpu_percent
+            entry["memory_percent"] = memory_percent
+        
+        exited = []
+        if len(counters) != len(self.entries):
+            for key in [k for k in self.entries if k not in counters]:
+                exited.append(self.entries.pop(key))
+        
+        spawned = []
+        for key, record in new_records.items():
+            self.entries[key] = record
+            spawned.append(record)
+        
+        return {
+            "spawned": spawned,
+            "exited": exited,
+            "changed": changed,
+        }
+    
+    def clear(self):
+        """Vacía la tabla"""
+        self.entries.clear()
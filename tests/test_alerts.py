@@ -0,0 +1,757 @@
+"""
+Tests del sistema de alertas
+"""
+
+import smtplib
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from fireguard.core.config_manager import ConfigManager
+from fireguard.ai.alert_system import AlertSystem
+from fireguard.ai.alert_buffer import AlertBuffer
+from fireguard.ai.alert_dedup import AlertDeduplicator
+from fireguard.ai.alert_dispatcher import AlertDispatcher
+from fireguard.ai.alert_correlator import AlertCorrelator
+from fireguard.alerts.alert_store import AlertStore
+from fireguard.alerts import AlertManager, AlertLevel, NotificationService, NotificationChannel
+from fireguard.alerts.notification_batching import TokenBucket
+from fireguard.alerts.delivery import DeliveryPool
+
+
+def _alert(i, severity="high", alert_type="test_alert"):
+    return {"severity": severity, "type": alert_type, "message": f"alerta {i}"}
+
+
+def test_alert_buffer_evicts_oldest_and_keeps_counters():
+    """El buffer circular descarta la alerta más antigua y ajusta los contadores"""
+    buffer = AlertBuffer(3)
+    evicted = [buffer.append(_alert(i, "critical" if i == 0 else "high")) for i in range(5)]
+    
+    assert evicted[:3] == [None, None, None]
+    assert [a["message"] for a in evicted[3:]] == ["alerta 0", "alerta 1"]
+    assert [a["message"] for a in buffer] == ["alerta 2", "alerta 3", "alerta 4"]
+    assert [a["message"] for a in buffer.last(2)] == ["alerta 3", "alerta 4"]
+    assert buffer.by_severity == {"high": 3}
+    assert buffer.by_type == {"test_alert": 3}
+    
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.by_severity == {}
+    
+    with pytest.raises(ValueError):
+        AlertBuffer(0)
+
+
+def test_alert_system_summary_matches_retained_alerts():
+    """El resumen se corresponde con las alertas retenidas tras expulsiones"""
+    alert_system = AlertSystem(ConfigManager(config_data={
+        "alerts": {"threshold": "low", "max_alerts": 50}
+    }))
+    
+    for i in range(120):
+        alert_system.add_alert(_alert(i, ["low", "medium", "high"][i % 3], f"type_{i % 4}"))
+    
+    alerts = alert_system.get_alerts()
+    assert len(alerts) == 50
+    assert alerts[0]["message"] == "alerta 70"
+    
+    expected_severity = {}
+    expected_type = {}
+    for alert in alerts:
+        expected_severity[alert["severity"]] = expected_severity.get(alert["severity"], 0) + 1
+        expected_type[alert["type"]] = expected_type.get(alert["type"], 0) + 1
+    
+    summary = alert_system.get_alert_summary()
+    assert summary == {"total": 50, "by_severity": expected_severity, "by_type": expected_type,
+                       "suppressed": 0}
+    assert [a["message"] for a in alert_system.get_alerts(limit=2)] == ["alerta 118", "alerta 119"]
+    assert all(a["severity"] == "low" for a in alert_system.get_alerts(severity="low"))
+
+
+def test_alert_system_indexed_queries():
+    """Las consultas por tipo, origen y rango temporal usan índices coherentes"""
+    alert_system = AlertSystem(ConfigManager(config_data={
+        "alerts": {"threshold": "low", "max_alerts": 100}
+    }))
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    
+    for i in range(250):
+        alert = _alert(i, "critical" if i % 5 == 0 else "medium",
+                       "suspicious_process" if i % 2 == 0 else "unusual_port")
+        alert["source"] = "ProcessSensor" if i % 3 == 0 else "PortSensor"
+        alert["timestamp"] = (base + timedelta(minutes=i)).isoformat()
+        alert_system.add_alert(alert)
+    
+    retained = alert_system.get_alerts()
+    assert len(retained) == 100
+    
+    def naive(**filters):
+        since = filters.pop("since", None)
+        return [
+            a for a in retained
+            if all(a[field] == value for field, value in filters.items())
+            and (since is None or a["timestamp"] >= since.isoformat())
+        ]
+    
+    since = base + timedelta(minutes=230)
+    assert alert_system.get_alerts(severity="critical", alert_type="suspicious_process",
+                                   since=since) == naive(severity="critical",
+                                                         type="suspicious_process",
+                                                         since=since)
+    assert alert_system.get_alerts(source="ProcessSensor") == naive(source="ProcessSensor")
+    assert alert_system.get_alerts(alert_type="unusual_port", limit=3) == \
+        naive(type="unusual_port")[-3:]
+    
+    window = alert_system.get_alerts(since=base + timedelta(minutes=200),
+                                     until=base + timedelta(minutes=209))
+    assert [a["message"] for a in window] == [f"alerta {i}" for i in range(200, 210)]
+    
+    # Alertas expulsadas ya no aparecen en los índices
+    assert alert_system.get_alerts(until=base + timedelta(minutes=149)) == []
+    assert alert_system.get_alerts(alert_type="missing") == []
+
+
+def test_alert_system_folds_repeated_alerts():
+    """Las alertas repetidas se pliegan y solo notifican la primera vez o al escalar"""
+    alert_system = AlertSystem(ConfigManager(config_data={
+        "alerts": {"threshold": "low", "suppression_window": 60}
+    }))
+    notified = []
+    alert_system.register_callback(notified.append)
+    
+    def port_alert(severity="high", cpu=0.0):
+        return {
+            "severity": severity,
+            "type": "dangerous_port",
+            "source": "PortSensor",
+            "message": "Puerto peligroso abierto: 23 (Telnet)",
+            "details": {"port": 23, "address": "0.0.0.0", "cpu_percent": cpu},
+        }
+    
+    for i in range(100):
+        alert_system.add_alert(port_alert(cpu=float(i)))
+    alert_system.add_alert(port_alert(severity="critical"))
+    alert_system.add_alert({**port_alert(), "details": {"port": 445, "address": "0.0.0.0"}})
+    assert alert_system.flush(timeout=5)
+    
+    # La entrega es por severidad: solo se comprueba qué se notificó
+    assert sorted(a["severity"] for a in notified) == ["critical", "high", "high"]
+    first, escalated, other = alert_system.get_alerts()
+    assert first["occurrences"] == 100
+    assert first["first_seen"] <= first["last_seen"]
+    assert escalated["occurrences"] == 101 and escalated["escalated_from"] == "high"
+    assert escalated["fingerprint"] == first["fingerprint"] != other["fingerprint"]
+    assert alert_system.get_alert_summary()["suppressed"] == 99
+
+
+def test_alert_dedup_window_expires():
+    """Tras la ventana de supresión la condición vuelve a alertar"""
+    dedup = AlertDeduplicator(window=10)
+    alert = {"severity": "medium", "type": "unusual_port", "details": {"port": 31337}}
+    
+    assert dedup.fold(dict(alert), now=100.0) is True
+    assert dedup.fold(dict(alert), now=105.0) is False
+    assert dedup.fold(dict(alert), now=114.0) is False  # Ventana deslizante
+    assert dedup.fold(dict(alert), now=125.0) is True
+    assert len(dedup) == 1
+    
+    assert AlertDeduplicator(window=0).fold(dict(alert)) is True
+
+
+def test_alert_dedup_caps_records():
+    """Una avalancha de alertas distintas no hace crecer la tabla sin límite"""
+    dedup = AlertDeduplicator(window=300, max_records=100)
+    for i in range(1000):
+        assert dedup.fold({"type": "log_pattern", "message": f"línea {i}"}, now=100.0 + i * 0.01)
+    
+    assert len(dedup) == 100 and dedup.evicted == 900
+    assert dedup.fold({"type": "log_pattern", "message": "línea 999"}, now=111.0) is False
+    assert dedup.fold({"type": "log_pattern", "message": "línea 0"}, now=111.0) is True
+    
+    # CPU y memoria del mismo proceso son condiciones distintas
+    cpu = {"type": "process_baseline_anomaly", "details": {"pid": 7, "name": "nginx", "metric": "cpu_percent"}}
+    memory = {"type": "process_baseline_anomaly", "details": {"pid": 7, "name": "nginx", "metric": "memory_percent"}}
+    assert dedup.fingerprint(cpu) != dedup.fingerprint(memory)
+
+
+def test_alert_dispatcher_isolates_slow_callbacks():
+    """Un callback lento no bloquea al productor ni a los demás callbacks"""
+    release = threading.Event()
+    fast = []
+    
+    def slow_callback(alert):
+        release.wait(5)
+    
+    def failing_callback(alert):
+        raise RuntimeError("fallo de prueba")
+    
+    dispatcher = AlertDispatcher(max_queue=100, timeout=0.05)
+    dispatcher.register(slow_callback)
+    dispatcher.register(failing_callback)
+    dispatcher.register(fast.append)
+    
+    started = time.perf_counter()
+    for i in range(3):
+        assert dispatcher.submit(_alert(i))
+    assert time.perf_counter() - started < 0.05
+    
+    assert dispatcher.flush(timeout=5)
+    release.set()
+    stats = dispatcher.get_stats()
+    dispatcher.close()
+    
+    assert [a["message"] for a in fast] == ["alerta 0", "alerta 1", "alerta 2"]
+    assert stats["dispatched"] == 3 and stats["queue_depth"] == 0
+    assert stats["callbacks"]["test_alert_dispatcher_isolates_slow_callbacks.<locals>.failing_callback"]["errors"] == 3
+    slow = stats["callbacks"]["test_alert_dispatcher_isolates_slow_callbacks.<locals>.slow_callback"]
+    assert slow["timeouts"] >= 1 and slow["timeouts"] + slow["skipped"] == 3
+    assert stats["latency_max"] >= 0.05
+
+
+def test_alert_dispatcher_slow_callback_does_not_pace_others():
+    """Un callback lento pero dentro del timeout no retrasa a los demás"""
+    release = threading.Event()
+    slow = []
+    fast = []
+    
+    def slow_callback(alert):
+        release.wait(5)
+        slow.append(alert)
+    
+    dispatcher = AlertDispatcher(max_queue=100, timeout=10, backlog=3)
+    dispatcher.register(slow_callback)
+    dispatcher.register(fast.append)
+    
+    for i in range(6):
+        dispatcher.submit(_alert(i))
+    
+    deadline = time.monotonic() + 5
+    while len(fast) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(fast) == 6 and not slow
+    
+    release.set()
+    assert dispatcher.flush(timeout=5)
+    stats = dispatcher.get_stats()
+    dispatcher.close()
+    
+    # El lento ejecuta la primera y guarda 3 en su cola; el resto se omite
+    name = "test_alert_dispatcher_slow_callback_does_not_pace_others.<locals>.slow_callback"
+    assert [a["message"] for a in slow] == ["alerta 0", "alerta 1", "alerta 2", "alerta 3"]
+    assert stats["callbacks"][name]["skipped"] == 2
+    assert stats["dispatched"] == 6
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("drop_oldest", ["alerta 4", "alerta 2", "alerta 3"]),
+    ("drop_lowest", ["alerta 0", "alerta 4", "alerta 2"]),
+])
+def test_alert_dispatcher_overflow_policies(policy, expected):
+    """Con la cola llena se descarta según la política configurada"""
+    gate = threading.Event()
+    received = []
+    
+    dispatcher = AlertDispatcher(max_queue=3, timeout=5, overflow=policy)
+    dispatcher.register(lambda alert: (gate.wait(5), received.append(alert)))
+    
+    # La primera alerta ocupa al despachador; las siguientes llenan la cola
+    dispatcher.submit(_alert("bloqueo"))
+    while dispatcher.get_stats()["queue_depth"]:
+        time.sleep(0.01)
+    
+    severities = ["critical", "low", "high", "low", "critical"]
+    for i, severity in enumerate(severities):
+        dispatcher.submit(_alert(i, severity))
+    
+    gate.set()
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    
+    assert [a["message"] for a in received[1:]] == expected
+    assert dispatcher.get_stats()["dropped"] == 2
+
+
+def test_alert_dispatcher_orders_by_severity_with_aging():
+    """Las alertas críticas adelantan a las de menor severidad, que envejecen"""
+    gate = threading.Event()
+    received = []
+    
+    dispatcher = AlertDispatcher(max_queue=1000, timeout=5, aging=60)
+    dispatcher.register(lambda alert: (gate.wait(5), received.append(alert["message"])))
+    dispatcher.submit(_alert("bloqueo"))
+    while dispatcher.get_stats()["queue_depth"]:
+        time.sleep(0.01)
+    
+    for i in range(200):
+        dispatcher.submit(_alert(i, "medium", "unusual_port"))
+    dispatcher.submit(_alert("crítica", "critical", "suspicious_process"))
+    gate.set()
+    assert dispatcher.flush(timeout=5)
+    
+    assert received[1] == "alerta crítica"
+    latency = dispatcher.get_stats()["latency_by_severity"]
+    assert latency["critical"]["count"] == 1 and latency["medium"]["count"] == 200
+    assert latency["critical"]["max"] < latency["medium"]["max"]
+    dispatcher.close()
+    
+    # Con envejecimiento rápido la alerta antigua de baja severidad no espera
+    gate.clear()
+    received.clear()
+    dispatcher = AlertDispatcher(timeout=5, aging=0.01)
+    dispatcher.register(lambda alert: (gate.wait(5), received.append(alert["message"])))
+    dispatcher.submit(_alert("bloqueo"))
+    while dispatcher.get_stats()["queue_depth"]:
+        time.sleep(0.01)
+    dispatcher.submit(_alert("antigua", "low"))
+    time.sleep(0.1)
+    dispatcher.submit(_alert("nueva", "critical"))
+    gate.set()
+    assert dispatcher.flush(timeout=5)
+    assert received[1:] == ["alerta antigua", "alerta nueva"]
+    dispatcher.close()
+
+
+def test_alert_store_batches_and_queries(tmp_path):
+    """El histórico en SQLite absorbe una avalancha de alertas sin bloquear"""
+    store = AlertStore(str(tmp_path / "alerts.db"), flush_interval=0.05)
+    base = datetime(2024, 1, 1).timestamp()
+    
+    started = time.perf_counter()
+    for i in range(20000):
+        alert = _alert(i, "critical" if i % 10 == 0 else "medium", f"type_{i % 3}")
+        alert["source"] = "PortSensor"
+        alert["timestamp"] = base + i
+        store.add(alert)
+    enqueue_time = time.perf_counter() - started
+    
+    assert enqueue_time < 1.0  # Los productores no esperan a SQLite
+    assert store.flush(timeout=30)
+    
+    assert store.count() == 20000
+    assert store.get_stats()["batches"] < 20000
+    critical = store.query(severity="critical", since=base + 19000)
+    assert [a["message"] for a in critical] == [f"alerta {i}" for i in range(19000, 20000, 10)]
+    assert [a["message"] for a in store.query(alert_type="type_1", limit=2)] == [
+        "alerta 19996", "alerta 19999"
+    ]
+    assert store.summary(until=base + 9)["by_severity"] == {"critical": 1, "medium": 9}
+    store.close()
+    
+    # Los datos sobreviven a un reinicio
+    reopened = AlertStore(str(tmp_path / "alerts.db"))
+    assert reopened.count(severity="critical") == 2000
+    reopened.close()
+
+
+def test_alert_system_and_manager_history(tmp_path):
+    """AlertSystem y AlertManager consultan el histórico persistente"""
+    db_path = str(tmp_path / "alerts.db")
+    alert_system = AlertSystem(ConfigManager(config_data={
+        "alerts": {"threshold": "low", "max_alerts": 5, "store": {"path": db_path}}
+    }))
+    for i in range(20):
+        alert_system.add_alert(_alert(i))
+    
+    assert len(alert_system.get_alerts()) == 5
+    history = alert_system.get_alerts(history=True)
+    assert [a["message"] for a in history] == [f"alerta {i}" for i in range(20)]
+    alert_system.close()
+    
+    manager = AlertManager({"store_path": db_path})
+    manager.create_alert(AlertLevel.CRITICAL, "Intrusión detectada", "LogSensor")
+    records = manager.query_history(level=AlertLevel.CRITICAL)
+    assert [(r["message"], r["source"]) for r in records] == [("Intrusión detectada", "LogSensor")]
+    manager.store.close()
+
+
+def test_alert_store_upserts_folded_repeats(tmp_path):
+    """Las repeticiones plegadas tras un volcado actualizan la fila guardada"""
+    db_path = str(tmp_path / "alerts.db")
+    alert_system = AlertSystem(ConfigManager(config_data={
+        "alerts": {"threshold": "low", "store": {"path": db_path}}
+    }))
+    store = alert_system.store
+    
+    alert_system.add_alert(_alert("repetida"))
+    assert store.flush()
+    for _ in range(2):
+        alert_system.add_alert(_alert("repetida"))
+    
+    # Lecturas desde otro hilo: close() también cierra su conexión
+    reader = threading.Thread(target=lambda: store.flush() and store.count())
+    reader.start()
+    reader.join()
+    
+    history = alert_system.get_alerts(history=True)
+    assert [(a["message"], a["occurrences"]) for a in history] == [("alerta repetida", 3)]
+    assert len(store._readers) == 2
+    alert_system.close()
+    assert store._readers == []
+
+
+def test_notification_service_batches_into_digests(capsys):
+    """Las notificaciones de una ventana se envían como un único resumen"""
+    service = NotificationService({
+        "channels": [NotificationChannel.CONSOLE],
+        "batching": {
+            "max_batch": 50, "digest_lines": 3, "rate": 0,
+            "channels": {"console": {"window": 60}}
+        }
+    })
+    for i in range(120):
+        assert service.send_notification(f"alerta {i}", NotificationChannel.CONSOLE)
+    
+    # Dos lotes llenos enviados; el resto espera a la ventana
+    stats = service.get_stats()["console"]
+    assert (stats["batches"], stats["sent"], stats["pending"]) == (2, 2, 20)
+    
+    # Las prioridades críticas no esperan
+    service.send_notification("intrusión", NotificationChannel.CONSOLE, priority="critical")
+    assert service.get_stats()["console"]["bypassed"] == 1
+    
+    service.close()
+    output = capsys.readouterr().out
+    assert output.count("[RESUMEN]") == 3
+    assert "[RESUMEN] 50 notificaciones:\n- alerta 0\n- alerta 1\n- alerta 2\n(+47 más)" in output
+    assert "[NOTIFICACIÓN] intrusión" in output
+    assert service.get_stats()["console"]["pending"] == 0
+
+
+def test_notification_rate_limit_defers_flush():
+    """Sin tokens disponibles el lote sigue acumulando hasta que se recarga"""
+    bucket = TokenBucket(rate=2.0, burst=1)
+    assert bucket.try_acquire(now=100.0)
+    assert not bucket.try_acquire(now=100.1)
+    assert bucket.wait_time(now=100.1) == pytest.approx(0.4)
+    assert bucket.try_acquire(now=100.5)
+    
+    service = NotificationService({
+        "channels": [NotificationChannel.LOG],
+        "batching": {"window": 0, "channels": {"log": {"rate": 20, "burst": 1}}}
+    })
+    for i in range(10):
+        service.send_notification(f"alerta {i}", NotificationChannel.LOG)
+    
+    # El primero sale al instante; el resto se agrupa en el siguiente envío
+    assert service.get_stats()["log"]["batches"] == 1
+    deadline = time.monotonic() + 2
+    while service.get_stats()["log"]["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = service.get_stats()["log"]
+    assert (stats["batches"], stats["pending"]) == (2, 0)
+    service.close()
+    
+    # Con el lote lleno y sin tokens no se crea un temporizador por notificación
+    service = NotificationService({
+        "channels": [NotificationChannel.LOG],
+        "batching": {"max_batch": 1, "rate": 0.5, "burst": 1}
+    })
+    threads = threading.active_count()
+    for i in range(2000):
+        service.send_notification(f"alerta {i}", NotificationChannel.LOG)
+        assert threading.active_count() <= threads + 1
+    assert service.get_stats()["log"]["pending"] == 1999
+    service.close()
+    assert service.get_stats()["log"]["pending"] == 0
+
+
+def test_alert_records_are_compact_with_monotonic_ids():
+    """Las alertas del AlertManager usan slots, ids crecientes y cadenas internadas"""
+    manager = AlertManager()
+    source = "".join(["Port", "Sensor"])
+    alerts = [
+        manager.create_alert(AlertLevel.WARNING, f"alerta {i}", source, "open_port", {"port": i})
+        for i in range(1000)
+    ]
+    
+    ids = [a.id for a in alerts]
+    assert ids == sorted(set(ids)) and ids[0] < 2 ** 63
+    assert not hasattr(alerts[0], "__dict__")
+    assert alerts[0].source is alerts[-1].source
+    
+    record = alerts[5].to_dict()
+    assert record["level"] == "warning" and record["type"] == "open_port"
+    assert record["details"] == {"port": 5}
+    assert datetime.fromisoformat(record["timestamp"]) == alerts[5].timestamp
+    assert alerts[5].timestamp == datetime.fromtimestamp(alerts[5].created_at)
+    
+    # Orígenes que no son cadenas se aceptan como antes
+    assert manager.create_alert(AlertLevel.INFO, "sin origen", None).source is None
+
+
+def test_alert_correlator_emits_one_incident_per_cluster():
+    """Las alertas de varios sensores con PID o IP común forman un único incidente"""
+    correlator = AlertCorrelator(window=60)
+    port = {"severity": "high", "type": "unusual_port", "source": "PortSensor",
+            "details": {"port": 4444, "pid": 4321, "remote_addr": "N/A"}}
+    process = {"severity": "high", "type": "suspicious_process", "source": "ProcessSensor",
+               "details": {"pid": 4321, "name": "nc", "username": "www-data"}}
+    auth = [
+        {"severity": "medium", "type": "suspicious_log_entry", "source": "LogSensor",
+         "details": {"content": f"Failed password for invalid user www-data from 203.0.113.9 port {p}"}}
+        for p in range(50)
+    ]
+    unrelated = {"severity": "high", "type": "disk_critical", "source": "DiskSensor",
+                 "details": {"mountpoint": "/"}}
+    
+    assert correlator.process([port], now=1000) == [port]
+    output = correlator.process([process, unrelated] + auth, now=1001)
+    
+    incidents = [a for a in output if a["type"] == "correlated_incident"]
+    assert len(incidents) == 1
+    assert output[:3] == [process, incidents[0], unrelated]
+    assert len(output) == 3  # Las alertas de log se pliegan en el incidente
+    
+    details = incidents[0]["details"]
+    assert details["alert_count"] == 52
+    assert details["sources"] == ["LogSensor", "PortSensor", "ProcessSensor"]
+    assert "ip=203.0.113.9" in details["keys"]
+    assert incidents[0]["severity"] == "critical"
+    
+    # Tras la ventana el grupo se cierra y la memoria se libera
+    assert correlator.process([dict(auth[0])], now=1100) == [auth[0]]
+    assert correlator.get_stats()["open_clusters"] == 1
+
+
+def test_alert_correlator_memory_is_bounded():
+    """Los índices no superan sus límites aunque lleguen miles de alertas distintas"""
+    correlator = AlertCorrelator(window=3600, max_keys=500, max_clusters=200)
+    alerts = [
+        {"severity": "low", "type": "t", "source": "S",
+         "details": {"pid": i, "remote_addr": f"10.0.{i // 256}.{i % 256}"}}
+        for i in range(1, 20001)
+    ]
+    
+    started = time.perf_counter()
+    assert len(correlator.process(alerts, now=0)) == len(alerts)
+    assert time.perf_counter() - started < 5
+    
+    stats = correlator.get_stats()
+    assert stats["open_clusters"] <= 200 and stats["indexed_keys"] <= 500
+
+
+def test_alert_correlator_log_keys_ignore_empty_fields():
+    """Los campos vacíos de PAM y las frases con 'for' no aportan usuarios falsos"""
+    correlator = AlertCorrelator()
+    
+    def keys(content):
+        return correlator.extract_keys({"details": {"content": content}})
+    
+    pam = "pam_unix(sshd:auth): authentication failure; logname= uid=0 ruser= rhost={} user={}"
+    assert keys(pam.format("203.0.113.9", "bob")) == [("ip", "203.0.113.9"), ("user", "bob")]
+    assert keys("postgres: permission denied for connection") == []
+    assert keys("Failed password for alice from 198.51.100.7 port 22") == [("ip", "198.51.100.7"), ("user", "alice")]
+    
+    # Fallos de IP y usuario distintos no forman un incidente
+    alerts = [
+        {"severity": "medium", "type": "suspicious_log_entry", "source": source,
+         "details": {"content": pam.format(ip, user)}}
+        for source, ip, user in [("LogSensor", "203.0.113.9", "bob"), ("AuthSensor", "198.51.100.7", "eve")]
+    ]
+    assert all(a["type"] != "correlated_incident" for a in correlator.process(alerts, now=0))
+
+
+class _SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo para pruebas"""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, fail_first=0, drop_every=0):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.fail_first = fail_first  # Respuestas 451 a los primeros DATA
+        self.drop_every = drop_every  # Cerrar la conexión cada N mensajes
+        self.lock = threading.Lock()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        received = 0
+        self.wfile.write(b"220 stand-in ESMTP\r\n")
+        
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.wfile.write(b"250-stand-in\r\n250 PIPELINING\r\n")
+            elif command == b"DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                data = b"".join(iter(self.rfile.readline, b".\r\n"))
+                with server.lock:
+                    failed = server.fail_first > 0
+                    if failed:
+                        server.fail_first -= 1
+                    else:
+                        server.messages.append(data)
+                if failed:
+                    self.wfile.write(b"451 try again\r\n")
+                    continue
+                self.wfile.write(b"250 queued\r\n")
+                received += 1
+                if server.drop_every and received % server.drop_every == 0:
+                    return
+            elif command == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            elif command == b"RCPT" and b"blocked" in line:
+                self.wfile.write(b"550 no such user\r\n")
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+    
+    def start(**kwargs):
+        server = _SMTPStandIn(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_notification_service_validates_recipients():
+    """Los destinatarios van por canal; la antigua lista se rechaza con claridad"""
+    with pytest.raises(ValueError, match="diccionario por canal"):
+        NotificationService({"recipients": ["soc@example.com"]})
+    with pytest.raises(ValueError, match="'email'"):
+        NotificationService({"recipients": {"email": "soc@example.com"}})
+    
+    service = NotificationService({"recipients": {NotificationChannel.EMAIL: ["soc@example.com"]}})
+    assert service.recipients == {"email": ["soc@example.com"]}
+    service.close()
+
+
+def test_notification_service_email_reuses_sessions(smtp_server):
+    """Los correos se entregan por sesiones SMTP persistentes de los hilos de entrega"""
+    server = smtp_server()
+    service = NotificationService({
+        "channels": [NotificationChannel.EMAIL],
+        "batching": {"window": 0, "rate": 0},
+        "email": {"host": "127.0.0.1", "port": server.server_address[1]},
+        "delivery": {"workers": 2}
+    })
+    assert service.add_recipient(NotificationChannel.EMAIL, "soc@example.com")
+    
+    for i in range(300):
+        assert service.send_notification(f"alerta {i}", NotificationChannel.EMAIL)
+    service.flush()
+    
+    delivery = service.get_stats()["email"]["delivery"]
+    assert (delivery["sent"], delivery["failed"]) == (300, 0)
+    assert server.connections <= 2
+    assert sum(b"alerta 299" in m for m in server.messages) == 1
+    service.close()
+
+
+def test_delivery_pool_retries_and_reconnects(smtp_server):
+    """Los errores transitorios se reintentan y las desconexiones reabren la sesión"""
+    server = smtp_server(fail_first=2, drop_every=10)
+    from fireguard.alerts.delivery import SMTPTransport
+    
+    pool = DeliveryPool(
+        lambda: SMTPTransport("127.0.0.1", server.server_address[1]),
+        workers=1, backoff=0.01
+    )
+    for i in range(30):
+        pool.submit(["soc@example.com"], f"alerta {i}", "cuerpo")
+    assert pool.flush(timeout=10)
+    
+    stats = pool.get_stats()
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (30, 0, 2)
+    assert stats["connects"] == server.connections >= 3
+    pool.close()
+    
+    # Los rechazos permanentes no se reintentan
+    rejecting = DeliveryPool(lambda: _Rejecting(), workers=1, backoff=0.01)
+    rejecting.submit(["x"], "asunto", "cuerpo")
+    rejecting.flush(timeout=5)
+    assert (rejecting.get_stats()["failed"], rejecting.get_stats()["retries"]) == (1, 0)
+    rejecting.close()
+
+
+def test_delivery_pool_survives_transport_factory_errors():
+    """Si no se puede crear el transporte, los mensajes se reintentan y se cuentan"""
+    attempts = []
+    
+    def unreachable():
+        attempts.append(1)
+        raise ConnectionRefusedError("pasarela inaccesible")
+    
+    pool = DeliveryPool(unreachable, workers=2, max_retries=2, backoff=0.01)
+    for i in range(3):
+        pool.submit(["soc@example.com"], f"alerta {i}", "cuerpo")
+    assert pool.flush(timeout=5)
+    
+    stats = pool.get_stats()
+    assert (stats["sent"], stats["failed"]) == (0, 3)
+    assert stats["retries"] == 6 and len(attempts) >= 3
+    pool.close()
+    
+    # La pasarela vuelve: el hilo crea el transporte en el siguiente lote
+    flaky = iter([ConnectionRefusedError("caída")])
+    
+    def recovering():
+        error = next(flaky, None)
+        if error is not None:
+            raise error
+        return _Recording()
+    
+    pool = DeliveryPool(recovering, workers=1, backoff=0.01)
+    pool.submit(["soc@example.com"], "alerta", "cuerpo")
+    assert pool.flush(timeout=5)
+    assert (pool.get_stats()["sent"], pool.get_stats()["retries"]) == (1, 1)
+    pool.close()
+
+
+def test_smtp_transport_keeps_session_on_smtp_errors(smtp_server):
+    """Una respuesta 5xx no cierra la sesión ni repite el envío"""
+    server = smtp_server()
+    from fireguard.alerts.delivery import SMTPTransport
+    
+    transport = SMTPTransport("127.0.0.1", server.server_address[1])
+    transport.send(["soc@example.com"], "uno", "cuerpo")
+    with pytest.raises(smtplib.SMTPRecipientsRefused) as error:
+        transport.send(["blocked@example.com"], "dos", "cuerpo")
+    assert transport.is_permanent(error.value)
+    transport.send(["soc@example.com"], "tres", "cuerpo")
+    
+    assert transport.connects == server.connections == 1
+    assert len(server.messages) == 2
+    transport.close()
+
+
+class _Recording:
+    connects = 1
+    
+    def send(self, recipients, subject, body):
+        pass
+    
+    def close(self):
+        pass
+    
+    @staticmethod
+    def is_permanent(error):
+        return False
+
+
+class _Rejecting:
+    def send(self, recipients, subject, body):
+        raise ValueError("rechazado")
+    
+    def close(self):
+        pass
+    
+    @staticmethod
+    def is_permanent(error):
+        return True
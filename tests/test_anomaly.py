@@ -0,0 +1,287 @@
+"""
+Tests de detección de anomalías
+"""
+
+import time
+import numpy as np
+import pytest
+from fireguard.core.config_manager import ConfigManager
+from fireguard.ai.anomaly_detector import AnomalyDetector
+from fireguard.ai.online_stats import RunningStats, WindowedStats, EWMStats
+from fireguard.ai.metric_store import MetricStore
+from fireguard.ai.multivariate import MahalanobisScorer
+from fireguard.ai.process_baselines import ProcessBaselines
+from fireguard.ai.seasonal import SeasonalBaseline, hour_of_week
+
+
+def _detector(**anomaly_config):
+    return AnomalyDetector(ConfigManager(config_data={
+        "ai": {"anomaly_detection": True, "anomaly_config": anomaly_config}
+    }))
+
+
+def test_online_stats_match_numpy():
+    """Las estadísticas incrementales coinciden con el cálculo completo"""
+    rng = np.random.default_rng(7)
+    values = rng.normal(1e6, 3.0, 5000)  # Media grande: pone a prueba la estabilidad
+    
+    running = RunningStats()
+    windowed = WindowedStats(300)
+    for value in values:
+        running.update(value)
+        windowed.update(value)
+    
+    assert running.mean == pytest.approx(values.mean())
+    assert running.std == pytest.approx(values.std(), rel=1e-6)
+    assert (running.min, running.max) == (values.min(), values.max())
+    
+    tail = values[-300:]
+    assert windowed.count == 300
+    assert windowed.mean == pytest.approx(tail.mean())
+    assert windowed.std == pytest.approx(tail.std(), rel=1e-6)
+    assert (windowed.min, windowed.max) == (tail.min(), tail.max())
+    
+    # La media exponencial sigue un cambio de nivel
+    ewm = EWMStats(halflife=10)
+    for value in [10.0] * 200 + [50.0] * 100:
+        ewm.update(value)
+    assert ewm.mean == pytest.approx(50.0, abs=0.05)
+
+
+def test_anomaly_detector_uses_incremental_baseline():
+    """La detección no recorre el historial y su coste no crece con él"""
+    detector = _detector(window=500)
+    for i in range(2000):
+        detector.add_metrics({"cpu_percent": 20.0 + (i % 5), "memory_percent": 40.0})
+    
+    assert len(detector.history) == 500
+    baseline = detector.get_baseline()
+    assert baseline["cpu"]["mean"] == pytest.approx(22.0)
+    assert baseline["cpu"]["std"] == pytest.approx(np.std([20, 21, 22, 23, 24]))
+    
+    anomalies = detector.detect_anomalies({"cpu_percent": 95.0, "memory_percent": 40.0})
+    assert [a["type"] for a in anomalies] == ["cpu_anomaly", "multivariate_anomaly"]
+    assert detector.detect_anomalies({"cpu_percent": 22.0}) == []
+    
+    started = time.perf_counter()
+    for _ in range(1000):
+        detector.detect_anomalies({"cpu_percent": 22.0, "memory_percent": 40.0})
+    assert time.perf_counter() - started < 0.5
+    
+    # Sin historial suficiente no se analiza
+    assert _detector().detect_anomalies({"cpu_percent": 99.0}) == []
+
+
+def test_metric_store_windows_are_zero_copy_views():
+    """El almacén columnar retiene las últimas N muestras y devuelve vistas"""
+    store = MetricStore(capacity=100, columns=["cpu_percent"])
+    for i in range(1000):
+        metrics = {"cpu_percent": float(i)}
+        if i % 2:
+            metrics["connections"] = i
+        store.append(metrics, timestamp=1000 + i)
+    
+    assert len(store) == 100
+    cpu = store.column("cpu_percent")
+    assert np.array_equal(cpu, np.arange(900, 1000, dtype=np.float32))
+    assert np.shares_memory(cpu, store.window())
+    assert np.isnan(store.column("connections")[0]) and store.column("connections")[1] == 901
+    
+    assert np.array_equal(store.column("cpu_percent", last=3), [997, 998, 999])
+    assert store.timestamps(since=1990)[0] == 1990
+    assert store.stats("connections")["count"] == 50
+    assert store.percentiles("cpu_percent", (50,))[50] == pytest.approx(949.5)
+    
+    # Un millón de muestras de dos métricas ocupa unos pocos megabytes
+    assert MetricStore(1_000_000, columns=["cpu_percent", "memory_percent"]).nbytes < 30 * 2 ** 20
+
+
+def test_anomaly_detector_history_percentiles_and_scores():
+    """El detector guarda el historial en el almacén columnar"""
+    detector = _detector(window=50)
+    for i in range(60):
+        detector.add_metrics({"cpu_percent": float(i % 10), "timestamp": 5000.0 + i})
+    
+    assert len(detector.history) == 50
+    assert detector.history.timestamps()[-1] == 5059.0
+    assert "timestamp" not in detector.history.columns
+    assert detector.get_baseline()["cpu"]["p50"] == pytest.approx(4.5)
+    assert detector.get_percentiles("cpu_percent", (99,))[99] == pytest.approx(9.0)
+    
+    scores = detector.score_history("cpu_percent", last=10)
+    assert scores.shape == (10,) and scores.max() == pytest.approx(4.5 / np.std(np.arange(10)))
+
+
+def test_mahalanobis_scorer_matches_batch_computation():
+    """La línea base incremental coincide con la covarianza del lote completo"""
+    rng = np.random.default_rng(3)
+    samples = rng.multivariate_normal([50, 30, 200], [[25, 20, 0], [20, 25, 0], [0, 0, 400]], 2000)
+    
+    scorer = MahalanobisScorer(["cpu_percent", "memory_percent", "connections"])
+    for sample in samples[:500]:
+        scorer.update(sample)
+    scorer.update(samples[500:])  # Lote: una sola combinación de momentos
+    
+    assert np.allclose(scorer.baseline.mean, samples.mean(axis=0))
+    assert np.allclose(scorer.baseline.covariance, np.cov(samples.T, bias=True))
+    
+    inverse = np.linalg.inv(np.cov(samples.T, bias=True))
+    centered = samples[:10] - samples.mean(axis=0)
+    expected = np.sqrt(np.einsum("ij,jk,ik->i", centered, inverse, centered))
+    assert np.allclose(scorer.score(samples[:10]), expected, rtol=1e-4)
+    
+    # CPU y memoria correlacionadas: subir una sin la otra es anómalo
+    # aunque cada valor por separado esté dentro de 2σ
+    odd = {"cpu_percent": 58.0, "memory_percent": 22.0, "connections": 200.0}
+    assert scorer.score(odd)[0] > scorer.threshold
+    assert max(scorer.contributions(odd), key=scorer.contributions(odd).get) != "connections"
+
+
+def test_anomaly_detector_scores_registered_metrics():
+    """Las métricas registradas entran en el vector y los lotes se puntúan juntos"""
+    detector = _detector(window=1000, metrics=["cpu_percent", "memory_percent"])
+    assert detector.register_metric("connections")
+    assert not detector.register_metric("connections")
+    
+    rng = np.random.default_rng(5)
+    for cpu in rng.normal(30, 3, 500):
+        detector.add_metrics({"cpu_percent": cpu, "memory_percent": 40 + cpu / 3,
+                              "connections": 100 + 2 * cpu})
+    
+    normal = {"cpu_percent": 30.0, "memory_percent": 50.0, "connections": 160.0}
+    burst = {"cpu_percent": 30.0, "memory_percent": 50.0, "connections": 400.0}
+    scores = detector.score_samples([normal, burst])
+    assert scores[0] < detector.scorer.threshold < scores[1]
+    assert detector.score_window().shape == (500,)
+    
+    types = [a["type"] for a in detector.detect_anomalies(burst)]
+    assert types == ["connections_anomaly", "multivariate_anomaly"]
+    assert detector.detect_anomalies(normal) == []
+    
+    # Una métrica registrada sin muestras aún tiene su columna en el historial
+    assert detector.register_metric("disk_io")
+    assert detector.score_window(last=10).shape == (10,)
+    assert np.isnan(detector.history.column("disk_io")).all()
+
+
+def test_mahalanobis_scorer_floors_near_constant_metrics():
+    """Una métrica casi constante no convierte una variación mínima en anomalía"""
+    rng = np.random.default_rng(11)
+    scorer = MahalanobisScorer(["cpu_percent", "memory_percent"])
+    for cpu in rng.normal(30, 3, 200):
+        scorer.update({"cpu_percent": cpu, "memory_percent": 42.0})
+    
+    assert scorer.score({"cpu_percent": 30.0, "memory_percent": 42.1})[0] < scorer.threshold
+    assert scorer.score({"cpu_percent": 30.0, "memory_percent": 60.0})[0] > scorer.threshold
+
+
+def test_anomaly_detector_covariance_follows_window():
+    """En modo window la línea base multivariante olvida como la ventana"""
+    detector = _detector(window=200, metrics=["cpu_percent", "memory_percent"])
+    rng = np.random.default_rng(2)
+    for cpu in rng.normal(20, 2, 2000):
+        detector.add_metrics({"cpu_percent": cpu, "memory_percent": 40 + cpu / 2})
+    for cpu in rng.normal(60, 2, 1000):
+        detector.add_metrics({"cpu_percent": cpu, "memory_percent": 40 + cpu / 2})
+    
+    assert detector.scorer.baseline.mean[0] == pytest.approx(60, abs=1)
+    assert detector.score_samples([{"cpu_percent": 60.0, "memory_percent": 70.0}])[0] < detector.scorer.threshold
+
+
+def _processes(count, names, cpu=1.0):
+    return [
+        {"pid": pid, "name": names[pid % len(names)], "cpu_percent": cpu, "memory_percent": 0.5}
+        for pid in range(count)
+    ]
+
+
+def test_process_baselines_flag_deviation_per_name():
+    """Cada nombre se compara con su propia línea base"""
+    baselines = ProcessBaselines(min_samples=5, halflife=10)
+    names = [f"proc{i}" for i in range(1000)]
+    for tick in range(10):
+        processes = _processes(20000, names)
+        assert baselines.observe(processes, now=tick) == []
+    
+    assert len(baselines) == 1000
+    assert baselines.baseline("proc7")["mean"]["cpu_percent"] == pytest.approx(1.0)
+    
+    processes = _processes(20000, names)
+    processes[7]["cpu_percent"] = 25.0
+    anomalies = baselines.observe(processes, now=10)
+    assert [(a["process"]["pid"], a["metric"]) for a in anomalies] == [(7, "cpu_percent")]
+    assert anomalies[0]["ratio"] == pytest.approx(25.0)
+    # Un tick de 20k procesos es una sola pasada vectorizada
+    assert baselines.get_stats()["last_tick_time"] < 1.0
+
+
+def test_process_baselines_memory_is_bounded():
+    """Los nombres inactivos expiran y la tabla no supera su capacidad"""
+    baselines = ProcessBaselines(capacity=100, max_idle=60)
+    baselines.observe(_processes(50, ["a", "b"]), now=0)
+    baselines.observe(_processes(50, ["c"]), now=100)
+    assert "a" not in baselines and "c" in baselines
+    
+    for tick in range(5):
+        names = [f"t{tick}-{i}" for i in range(80)]
+        baselines.observe(_processes(80, names), now=200 + tick)
+        assert len(baselines) <= 100
+        assert all(name in baselines for name in names)
+    
+    # Más nombres vivos que capacidad: se siguen los que caben
+    baselines.observe(_processes(300, [f"x{i}" for i in range(300)]), now=300)
+    assert len(baselines) == 100
+    assert baselines.get_stats()["evicted"] > 0
+
+
+def _nightly_backup_week(detector, weeks=3):
+    """Muestras cada 10 minutos con una copia de seguridad diaria de 02:00 a 03:00"""
+    rng = np.random.default_rng(5)
+    monday = time.mktime((2026, 1, 5, 0, 0, 0, 0, 0, -1))
+    for step in range(weeks * 7 * 24 * 6):
+        timestamp = monday + step * 600
+        backup = time.localtime(timestamp).tm_hour == 2
+        detector.add_metrics({
+            "cpu_percent": (90.0 if backup else 10.0) + rng.normal(0, 1),
+            "memory_percent": 40.0 + rng.normal(0, 1),
+            "timestamp": timestamp,
+        })
+    return monday + weeks * 7 * 24 * 3600
+
+
+def test_seasonal_baseline_buckets_by_hour_of_week():
+    """Cada hora de la semana tiene su propia media"""
+    monday = time.mktime((2026, 1, 5, 0, 0, 0, 0, 0, -1))
+    assert hour_of_week(monday) == 0
+    assert hour_of_week(monday + 26 * 3600 + 59 * 60) == 26
+    
+    baseline = SeasonalBaseline(["cpu_percent"], min_samples=2)
+    for week in range(4):
+        baseline.update({"cpu_percent": 80.0}, monday + week * 604800 + 2 * 3600)
+        baseline.update({"cpu_percent": 5.0}, monday + week * 604800 + 14 * 3600)
+    
+    profile = baseline.profile("cpu_percent")
+    assert profile.shape == (168,)
+    assert profile[2] == pytest.approx(80.0) and profile[14] == pytest.approx(5.0)
+    assert np.isnan(profile[3])
+    assert baseline.score({"cpu_percent": 80.0}, monday + 2 * 3600)["seasonal"][0] == pytest.approx(0.0)
+
+
+def test_anomaly_detector_seasonal_baseline_ignores_nightly_jobs():
+    """La copia nocturna no es anómala; el mismo uso a media tarde sí"""
+    detector = _detector()  # Configuración por defecto (con análisis multivariante)
+    start = _nightly_backup_week(detector)
+    
+    # Primer tramo de la copia: el EWMA aún no la ha visto, pero es lo habitual a esa hora
+    assert detector.detect_anomalies({"cpu_percent": 90.0, "memory_percent": 40.0, "timestamp": start + 2 * 3600}) == []
+    anomalies = detector.detect_anomalies({"cpu_percent": 90.0, "memory_percent": 40.0, "timestamp": start + 14 * 3600})
+    assert [a["type"] for a in anomalies] == ["cpu_anomaly", "multivariate_anomaly"]
+    assert anomalies[0]["details"]["baseline"] == "seasonal"
+    assert anomalies[0]["details"]["mean"] == pytest.approx(10.0, abs=0.5)
+    
+    # La línea base plana marca la copia como anómala
+    flat = _detector(metrics=["cpu_percent", "memory_percent"], multivariate=False, seasonal={"enabled": False})
+    start = _nightly_backup_week(flat)
+    flagged = flat.detect_anomalies({"cpu_percent": 90.0, "memory_percent": 40.0, "timestamp": start + 2 * 3600})
+    assert [a["type"] for a in flagged] == ["cpu_anomaly"]
+
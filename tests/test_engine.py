@@ -0,0 +1,88 @@
+"""
+Tests del motor y del planificador de sensores
+"""
+
+import time
+import pytest
+from fireguard.core.config_manager import ConfigManager
+from fireguard.core.sensor_base import SensorBase
+from fireguard.core.scheduler import SensorScheduler
+from fireguard.core.engine import FireguardEngine
+
+
+class SleepySensor(SensorBase):
+    """Sensor de prueba que tarda un tiempo fijo en escanear"""
+    
+    def __init__(self, name, delay, config=None):
+        super().__init__(name, config)
+        self.delay = delay
+        self.runs = 0
+    
+    def scan(self):
+        self.runs += 1
+        time.sleep(self.delay)
+        return {"delay": self.delay}
+    
+    def analyze(self, scan_results):
+        return [{"severity": "high", "type": "test_alert", "message": self.name}]
+
+
+def test_sweep_takes_slowest_sensor_time():
+    """Un barrido dura lo que el sensor más lento, no la suma"""
+    config = ConfigManager(config_data={})
+    sensors = [
+        SleepySensor("Fast", 0.05, config),
+        SleepySensor("Medium", 0.1, config),
+        SleepySensor("Slow", 0.3, config),
+    ]
+    
+    sweep = SensorScheduler(max_workers=4).run_once(sensors)
+    tick = sweep["tick"]
+    
+    assert [r["sensor"] for r in sweep["results"]] == ["Fast", "Medium", "Slow"]
+    assert all(r["status"] == "success" for r in sweep["results"])
+    assert tick["total_sensor_time"] >= 0.45
+    assert tick["wall_time"] < tick["total_sensor_time"]
+    assert tick["wall_time"] == pytest.approx(tick["slowest_sensor_time"], abs=0.1)
+
+
+def test_scheduler_per_sensor_intervals():
+    """Cada sensor se ejecuta con su propio intervalo"""
+    config = ConfigManager(config_data={
+        "monitoring": {"interval": 0.05},
+        "sensors": {"port_monitor": {"scan_interval": 0.2}},
+    })
+    fast = SleepySensor("Fast", 0.0, config)
+    slow = SleepySensor("Slow", 0.0, config)
+    slow.config_section = "port_monitor"
+    
+    assert fast.get_scan_interval() == 0.05
+    assert slow.get_scan_interval() == 0.2
+    
+    scheduler = SensorScheduler(max_workers=2)
+    scheduler.add_sensor(fast)
+    scheduler.add_sensor(slow)
+    scheduler.start()
+    time.sleep(0.5)
+    scheduler.stop()
+    
+    assert fast.runs > slow.runs >= 2
+    assert scheduler.get_stats()["last_tick"] is not None
+
+
+def test_engine_schedules_sensors():
+    """El motor ejecuta sus sensores y centraliza las alertas"""
+    config = {"monitoring": {"interval": 0.05}}
+    sensor = SleepySensor("Engine", 0.0, ConfigManager(config_data=config))
+    engine = FireguardEngine(config, sensors=[sensor])
+    
+    assert engine.start() is True
+    time.sleep(0.2)
+    assert engine.stop() is True
+    
+    assert sensor.runs >= 2
+    assert "Engine" in engine.last_results
+    # Las alertas repetidas del sensor se pliegan en un único registro
+    assert engine.alert_system.get_alert_summary()["total"] == 1
+    assert engine.alert_system.get_alerts()[0]["occurrences"] >= 2
+    assert engine.status()["scheduler"]["intervals"]["Engine"] == 0.05
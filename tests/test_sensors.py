@@ -0,0 +1,524 @@
+"""
+Tests de los sensores de FIREGUARD AI
+"""
+
+import os
+import re
+import queue
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from fireguard.core.config_manager import ConfigManager
+from fireguard.sensors import ProcessSensor, LogSensor, PortSensor
+from fireguard.sensors.process_table import ProcessTable
+from fireguard.sensors.process_backends import PsutilProcessBackend, ProcfsProcessBackend
+from fireguard.sensors.net_backends import PsutilNetBackend, ProcfsNetBackend, SocketIndex, Connection
+from fireguard.sensors.connection_table import ConnectionTable
+from fireguard.sensors.log_tail import LogTailer
+from fireguard.sensors.pattern_matcher import PatternMatcher, required_literal
+from fireguard.sensors.log_follower import LogFollower
+from fireguard.sensors.log_analyzer import LogAnalyzer
+
+
+def _burn_cpu(seconds):
+    """Mantiene la CPU ocupada durante el tiempo indicado"""
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+def test_process_sensor_non_blocking_cpu():
+    """El muestreo por diferencias no bloquea y detecta el uso de CPU"""
+    config = ConfigManager(config_data={
+        "sensors": {"process_monitor": {"cpu_warmup": 0}}
+    })
+    sensor = ProcessSensor(config)
+    
+    started = time.monotonic()
+    first = sensor.scan()
+    assert time.monotonic() - started < 0.9
+    assert first["system_cpu_percent"] == 0.0
+    
+    _burn_cpu(0.3)
+    
+    started = time.monotonic()
+    second = sensor.scan()
+    assert time.monotonic() - started < 0.9
+    
+    me = [p for p in second["processes"] if p["pid"] == os.getpid()][0]
+    assert me["cpu_percent"] > 0.0
+    assert second["system_cpu_percent"] > 0.0
+
+
+def test_process_table_deltas():
+    """La tabla de procesos emite procesos nuevos, terminados y modificados"""
+    table = ProcessTable(change_threshold=1.0)
+    
+    first = table.update({}, {
+        (1, 10.0): {"pid": 1, "name": "init", "cpu_percent": 0.0, "memory_percent": 1.0},
+        (2, 20.0): {"pid": 2, "name": "nginx", "cpu_percent": 5.0, "memory_percent": 2.0},
+    })
+    assert [p["pid"] for p in first["spawned"]] == [1, 2]
+    assert first["exited"] == [] and first["changed"] == []
+    
+    # PID 2 reutilizado por otro proceso (create_time distinto)
+    second = table.update({(1, 10.0): (0.5, 1.0)}, {
+        (2, 30.0): {"pid": 2, "name": "xmrig", "cpu_percent": 0.0, "memory_percent": 0.1},
+    })
+    assert [p["name"] for p in second["spawned"]] == ["xmrig"]
+    assert [p["name"] for p in second["exited"]] == ["nginx"]
+    assert second["changed"] == []
+    
+    third = table.update({(1, 10.0): (50.0, 1.0), (2, 30.0): (0.1, 0.1)}, {})
+    assert [p["pid"] for p in third["changed"]] == [1]
+    assert table.entries[(1, 10.0)]["cpu_percent"] == 50.0
+    assert len(table) == 2
+
+
+def test_process_table_threshold_crossings():
+    """Cruzar un umbral a pasos pequeños marca el proceso; None conserva el valor"""
+    table = ProcessTable(change_threshold=1.0, thresholds={"cpu_percent": 80.0})
+    table.update({}, {(1, 10.0): {"pid": 1, "name": "job", "cpu_percent": 79.2, "memory_percent": 3.0}})
+    
+    assert table.update({(1, 10.0): (79.8, 3.0)}, {})["changed"] == []
+    assert [p["pid"] for p in table.update({(1, 10.0): (80.4, 3.0)}, {})["changed"]] == [1]
+    assert table.update({(1, 10.0): (80.9, 3.0)}, {})["changed"] == []
+    
+    # Sin permisos para leer la memoria: el proceso sigue vivo con su último valor
+    deltas = table.update({(1, 10.0): (80.9, None)}, {})
+    assert deltas["exited"] == [] and deltas["changed"] == []
+    assert table.entries[(1, 10.0)]["memory_percent"] == 3.0
+
+
+def test_psutil_backend_keeps_processes_on_access_denied(monkeypatch):
+    """Un AccessDenied al leer la memoria no hace que el proceso parezca nuevo"""
+    import psutil
+    
+    sensor = ProcessSensor(ConfigManager(config_data={
+        "sensors": {"process_monitor": {"backend": "psutil", "cpu_warmup": 0}}
+    }))
+    sensor.scan()
+    
+    def denied(self):
+        raise psutil.AccessDenied(self.pid)
+    monkeypatch.setattr(psutil.Process, "memory_percent", denied)
+    
+    second = sensor.scan()
+    assert os.getpid() not in [p["pid"] for p in second["exited"] + second["spawned"]]
+    assert os.getpid() in [p["pid"] for p in second["processes"]]
+
+
+def test_process_sensor_alerts_share_one_snapshot_per_process():
+    """Las alertas de un proceso comparten sus detalles, copiados de la tabla"""
+    sensor = ProcessSensor(ConfigManager(config_data={
+        "sensors": {"process_monitor": {"cpu_warmup": 0, "baselines": {"enabled": False}}}
+    }))
+    proc = {"pid": 9, "name": "xmrig", "cpu_percent": 95.0, "memory_percent": 90.0}
+    alerts = sensor.analyze({"spawned": [proc], "changed": []})
+    
+    assert [a["type"] for a in alerts] == ["suspicious_process", "high_cpu_usage", "high_memory_usage"]
+    assert all(a["details"] is alerts[0]["details"] for a in alerts)
+    proc["cpu_percent"] = 0.0
+    assert alerts[0]["details"]["cpu_percent"] == 95.0
+
+
+def test_process_sensor_incremental_scan():
+    """Solo los procesos nuevos pasan por las comprobaciones de nombre"""
+    config = ConfigManager(config_data={
+        "sensors": {"process_monitor": {"cpu_warmup": 0}}
+    })
+    sensor = ProcessSensor(config)
+    sensor.suspicious_names = ["sleep"]
+    
+    first = sensor.scan()
+    assert len(first["spawned"]) == first["total_processes"]
+    
+    child = subprocess.Popen(["sleep", "5"])
+    try:
+        second = sensor.scan()
+        assert child.pid in [p["pid"] for p in second["spawned"]]
+        alerts = sensor.analyze(second)
+        assert child.pid in [a["details"]["pid"] for a in alerts if a["type"] == "suspicious_process"]
+        
+        # Un proceso ya conocido no se vuelve a analizar por nombre
+        third = sensor.scan()
+        assert child.pid not in [p["pid"] for p in third["spawned"]]
+        alerts = sensor.analyze(third)
+        assert child.pid not in [a["details"]["pid"] for a in alerts if a["type"] == "suspicious_process"]
+    finally:
+        child.kill()
+        child.wait()
+    
+    fourth = sensor.scan()
+    assert child.pid in [p["pid"] for p in fourth["exited"]]
+
+
+def test_process_sensor_baselines_skip_unsampled_and_idle_ratio():
+    """Sin muestra de CPU no se aprende; analizar dos veces no cuenta doble"""
+    sensor = ProcessSensor(ConfigManager(config_data={
+        "sensors": {"process_monitor": {"cpu_warmup": 0}}
+    }))
+    
+    first = sensor.scan()
+    assert first["baseline_anomalies"] == [] and len(sensor.baselines) == 0
+    
+    second = sensor.scan()
+    me = [p for p in second["processes"] if p["pid"] == os.getpid()][0]
+    samples = sensor.baselines.baseline(me["name"])["samples"]
+    assert samples >= 1
+    sensor.analyze(second)
+    sensor.analyze(second)
+    assert sensor.baselines.baseline(me["name"])["samples"] == samples
+    
+    # Proceso siempre inactivo: se compara con el mínimo absoluto, no con 0
+    for tick in range(10):
+        sensor.baselines.observe([{"name": "idle", "cpu_percent": 0.0, "memory_percent": 1.0}], now=tick)
+    anomalies = sensor.baselines.observe([{"name": "idle", "cpu_percent": 6.0, "memory_percent": 1.0}], now=10)
+    alert = sensor.analyze({"baseline_anomalies": anomalies})[0]
+    assert alert["details"]["ratio"] == 12.0
+    assert "inf" not in alert["message"] and "mínimo de 0.5%" in alert["message"]
+
+
+@pytest.mark.skipif(not ProcfsProcessBackend.is_available(), reason="Requiere /proc de Linux")
+def test_procfs_backend_matches_psutil():
+    """El backend procfs devuelve los mismos registros que psutil"""
+    _, psutil_records = PsutilProcessBackend().collect(())
+    _, procfs_records = ProcfsProcessBackend().collect(())
+    
+    by_pid = {key[0]: record for key, record in psutil_records.items()}
+    me = [r for r in procfs_records.values() if r["pid"] == os.getpid()][0]
+    expected = by_pid[os.getpid()]
+    
+    assert me["name"] == expected["name"]
+    assert me["username"] == expected["username"]
+    assert me["create_time"] == pytest.approx(expected["create_time"], abs=0.05)
+    assert me["memory_percent"] == pytest.approx(expected["memory_percent"], abs=0.5)
+    
+    sensor = ProcessSensor(ConfigManager(config_data={
+        "sensors": {"process_monitor": {"backend": "procfs", "cpu_warmup": 0}}
+    }))
+    assert sensor.scan()["backend"] == "procfs"
+
+
+def test_log_tailer_offsets(tmp_path):
+    """El lector de logs solo entrega líneas nuevas y sobrevive a reinicios"""
+    log_file = tmp_path / "auth.log"
+    state_file = tmp_path / "positions.json"
+    log_file.write_text("old 1\nold 2\nold 3\n")
+    
+    tailer = LogTailer(state_file=str(state_file), initial_lines=2)
+    assert tailer.read_lines(str(log_file)) == ["old 2", "old 3"]
+    assert tailer.read_lines(str(log_file)) == []
+    
+    # Una ráfaga de más de 100 líneas no se pierde
+    with open(log_file, "a") as f:
+        f.write("".join(f"burst {i}\n" for i in range(500)))
+        f.write("partial")
+    lines = tailer.read_lines(str(log_file))
+    assert len(lines) == 500 and lines[-1] == "burst 499"
+    
+    tailer.save_state()
+    tailer.close()
+    
+    # Tras reiniciar se continúa desde la línea incompleta
+    with open(log_file, "a") as f:
+        f.write(" line\nnew\n")
+    tailer = LogTailer(state_file=str(state_file))
+    assert tailer.read_lines(str(log_file)) == ["partial line", "new"]
+    
+    # Truncado
+    log_file.write_text("after truncate\n")
+    assert tailer.read_lines(str(log_file)) == ["after truncate"]
+    
+    # Rotación: se termina el archivo antiguo y se lee el nuevo desde el inicio
+    with open(log_file, "a") as f:
+        f.write("before rotate\n")
+    os.rename(log_file, tmp_path / "auth.log.1")
+    log_file.write_text("rotated 1\n")
+    assert tailer.read_lines(str(log_file)) == ["before rotate", "rotated 1"]
+    tailer.close()
+
+
+def test_pattern_matcher_matches_naive_search():
+    """El buscador combinado devuelve el mismo patrón que re.search en orden"""
+    patterns = [
+        r"failed password", r"authentication failure", r"invalid user",
+        r"unauthorized", r"permission denied", r"access denied",
+        r"error.*security", r"attack", r"intrusion", r"malware",
+        r"denied", r"port \d+ scan", r"(root|admin) login", r"sudo: +\w+",
+    ]
+    lines = [
+        "Failed password for root from 10.0.0.1",
+        "PAM: Authentication FAILURE for bob",
+        "nginx: Access Denied to /admin",
+        "kernel: ERROR in module security policy",
+        "user alice logged in",
+        "possible port 22 scan detected",
+        "admin login from console",
+        "sudo:   carol : TTY=pts/0",
+        "xunauthorizedx request",
+        "",
+    ]
+    
+    matcher = PatternMatcher(patterns)
+    for line in lines:
+        expected = next((p for p in patterns if re.search(p, line, re.IGNORECASE)), None)
+        assert matcher.match(line) == expected, line
+    
+    assert required_literal(r"error.*security") == "security"
+    assert required_literal(r"failed passwords?") == "failed password"
+    assert required_literal(r"(root|admin) login") == " login"
+    assert required_literal(r"root|admin") is None
+    
+    # Los argumentos de los escapes y los patrones verbose no dan literales falsos
+    escaped = [r"\x41BCD", r"user\x20root", r"\101ttack", r"(?x) brute \s force", r"\N{DIGIT ONE}23go"]
+    matcher = PatternMatcher(escaped)
+    for line in ["ABCD", "user root", "Attack", "brute force", "123go"]:
+        expected = next((p for p in escaped if re.search(p, line, re.IGNORECASE)), None)
+        assert expected is not None and matcher.match(line) == expected, line
+    assert required_literal(r"(?x) brute \s force") is None
+
+
+def test_log_sensor_configured_patterns(tmp_path):
+    """LogSensor añade los patrones de la configuración al buscador"""
+    config = ConfigManager(config_data={
+        "sensors": {"log_analyzer": {
+            "suspicious_patterns": ["reverse shell", "([invalid"],
+            "state_file": str(tmp_path / "positions.json"),
+        }}
+    })
+    sensor = LogSensor(config)
+    
+    assert "reverse shell" in sensor.suspicious_patterns
+    assert "([invalid" not in sensor.suspicious_patterns
+    
+    alerts = sensor.analyze({"supported": True, "log_entries": [
+        {"source": "test", "content": "Possible REVERSE SHELL spawned"},
+        {"source": "test", "content": "all good"},
+    ]})
+    assert [a["details"]["pattern_matched"] for a in alerts] == ["reverse shell"]
+
+
+@pytest.mark.parametrize("backend", ["inotify", "polling"])
+def test_log_follower_delivers_new_lines(tmp_path, backend):
+    """El seguidor entrega las líneas nuevas, también tras rotar o recrear el log"""
+    if backend == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify solo está disponible en Linux")
+    
+    log_file = tmp_path / "auth.log"
+    log_file.write_text("old line\n")
+    missing = tmp_path / "later.log"
+    received = queue.Queue()
+    
+    follower = LogFollower(
+        [str(log_file), str(missing)],
+        lambda path, lines: received.put((os.path.basename(path), lines)),
+        backend=backend,
+        poll_interval=0.05
+    )
+    assert follower.start()
+    assert follower.mode == backend
+    
+    def next_lines():
+        return received.get(timeout=5)
+    
+    try:
+        started = time.perf_counter()
+        with open(log_file, "a") as f:
+            f.write("new line\n")
+        assert next_lines() == ("auth.log", ["new line"])
+        if backend == "inotify":
+            assert time.perf_counter() - started < 1.0
+        
+        # Rotación: el archivo nuevo se lee desde el principio
+        os.rename(log_file, tmp_path / "auth.log.1")
+        log_file.write_text("after rotate\n")
+        assert next_lines() == ("auth.log", ["after rotate"])
+        
+        # Un log que no existía al arrancar se lee completo al crearse
+        missing.write_text("created\n")
+        assert next_lines() == ("later.log", ["created"])
+    finally:
+        follower.stop()
+
+
+def test_log_analyzer_realtime_detections(tmp_path):
+    """LogAnalyzer analiza las líneas nuevas y entrega las detecciones"""
+    log_file = tmp_path / "secure.log"
+    log_file.write_text("Failed password for root\n")
+    detections = queue.Queue()
+    
+    analyzer = LogAnalyzer({"log_paths": [str(log_file)], "poll_interval": 0.05})
+    assert analyzer.monitor_logs_realtime(detections.put)
+    try:
+        with open(log_file, "a") as f:
+            f.write("session opened\nInvalid user admin from 10.0.0.5\n")
+        detected = detections.get(timeout=5)
+    finally:
+        analyzer.stop_realtime_monitoring()
+    
+    assert [d["pattern"] for d in detected] == ["invalid user"]
+    assert detected[0]["source"] == str(log_file)
+    assert list(analyzer.recent_detections) == detected
+
+
+def test_log_analyzer_parallel_file_analysis(tmp_path):
+    """El análisis por fragmentos en paralelo coincide con el secuencial"""
+    log_file = tmp_path / "archive.log"
+    lines = []
+    for i in range(3000):
+        if i % 97 == 0:
+            lines.append(f"sshd[{i}]: Failed password for root from 10.0.0.{i % 255}")
+        elif i % 131 == 0:
+            lines.append(f"kernel: possible intrusion ñ attempt {i}\r")
+        else:
+            lines.append(f"cron[{i}]: job finished normally")
+    data = ("\n".join(lines)).encode("utf-8")  # Sin salto de línea final
+    log_file.write_bytes(data)
+    
+    analyzer = LogAnalyzer()
+    parallel = analyzer.analyze_log_file(str(log_file), workers=3, chunk_size=4096)
+    sequential = analyzer.analyze_log_file(str(log_file), workers=1, chunk_size=1 << 30)
+    
+    assert parallel["chunks"] > 3 and sequential["chunks"] == 1
+    assert parallel["lines"] == sequential["lines"] == 3000
+    assert parallel["suspicious_entries"] == sequential["suspicious_entries"]
+    
+    expected = [n for n, line in enumerate(lines, start=1) if n - 1 in range(0, 3000, 97)
+                or "intrusion" in line]
+    assert [e["line"] for e in parallel["suspicious_entries"]] == expected
+    for entry in parallel["suspicious_entries"]:
+        raw = data[entry["offset"]:].split(b"\n", 1)[0]
+        assert raw.decode("utf-8").rstrip("\r") == entry["content"]
+    
+    missing = analyzer.analyze_log_file(str(tmp_path / "missing.log"))
+    assert missing["threats_found"] == 0 and "error" in missing
+
+
+def test_log_analyzer_chunked_and_in_process_split_lines_alike(tmp_path):
+    """Los '\\r' sueltos y otros separadores de splitlines no parten líneas en ningún camino"""
+    content = (
+        "progress 10%\rprogress 100%\r\n"
+        "sshd: Failed password for root\r\n"
+        "form\x0cfeed\u2028kernel: possible intrusion attempt\n"
+        "cron: ok\x85sshd: Failed password for admin\n"
+    )
+    log_file = tmp_path / "cr.log"
+    log_file.write_bytes(content.encode("utf-8"))
+    
+    analyzer = LogAnalyzer()
+    in_process = analyzer.detect_patterns(content)
+    chunked = analyzer.analyze_log_file(str(log_file), workers=2, chunk_size=16)
+    
+    assert chunked["lines"] == 4
+    assert [(e["line"], e["content"]) for e in in_process] == [
+        (e["line"], e["content"]) for e in chunked["suspicious_entries"]
+    ]
+    assert [e["line"] for e in in_process] == [2, 3, 4]
+
+
+@pytest.mark.skipif(not ProcfsNetBackend.is_available(), reason="Requiere /proc/net de Linux")
+def test_procfs_net_backend_matches_psutil():
+    """El parser de /proc/net devuelve los mismos sockets y pids que psutil"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    udp = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    udp.bind(("::1", 0))
+    port = server.getsockname()[1]
+    udp_port = udp.getsockname()[1]
+    
+    backend = ProcfsNetBackend(rescan_interval=0)
+    sockets = []
+    try:
+        backend.collect()
+        
+        # Sockets nuevos de un proceso ya indexado
+        sockets.append(socket.create_connection(server.getsockname()))
+        sockets.append(server.accept()[0])
+        
+        procfs = {conn[:7] for conn in backend.collect()}
+        psutil_conns = {conn[:7] for conn in PsutilNetBackend().collect()}
+    finally:
+        for sock in sockets + [server, udp]:
+            sock.close()
+    
+    assert procfs == psutil_conns
+    
+    pid = os.getpid()
+    assert ("tcp", "127.0.0.1", port, None, 0, "LISTEN", pid) in procfs
+    assert ("udp6", "::1", udp_port, None, 0, "NONE", pid) in procfs
+    established = [c for c in procfs if c[5] == "ESTABLISHED" and c[4] == port]
+    assert established and all(c[6] == pid for c in established)
+
+
+def test_socket_index_rescans_only_changed_processes(tmp_path):
+    """Los inodos sin resolver no provocan relecturas repetidas"""
+    def open_socket(pid, fd, inode):
+        fd_dir = tmp_path / str(pid) / "fd"
+        fd_dir.mkdir(parents=True, exist_ok=True)
+        os.symlink(f"socket:[{inode}]", fd_dir / str(fd))
+    
+    open_socket(100, 3, 1001)
+    open_socket(200, 3, 2001)
+    (tmp_path / "300").mkdir()  # Descriptores ilegibles (sin directorio fd)
+    
+    index = SocketIndex(str(tmp_path), rescan_interval=0)
+    index.refresh({1001, 2001})
+    assert index.inodes == {1001: 100, 2001: 200}
+    
+    # Conexión aceptada por un proceso conocido: solo se relee ese proceso
+    open_socket(200, 4, 2002)
+    scanned = []
+    original = index._scan_pid
+    index._scan_pid = lambda pid: scanned.append(pid) or original(pid)
+    index.refresh({1001, 2001, 2002})
+    assert index.inodes[2002] == 200 and scanned == [200]
+    
+    # Un socket de un proceso ilegible se recuerda y no se vuelve a buscar
+    index.refresh({1001, 2001, 2002, 3001})
+    assert index.rescans == 2
+    for _ in range(5):
+        index.refresh({1001, 2001, 2002, 3001})
+    assert index.rescans == 2 and 3001 not in index.inodes
+
+
+def test_connection_table_events():
+    """La tabla de conexiones emite aperturas, cierres y cambios de estado"""
+    table = ConnectionTable()
+    listen = Connection("tcp", "0.0.0.0", 8443, None, 0, "LISTEN", 10)
+    client = Connection("tcp", "10.0.0.2", 8443, "10.0.0.9", 51000, "ESTABLISHED", 10)
+    
+    events = table.update([listen, client], now=100.0)
+    assert len(events["opened"]) == 2 and not events["closed"]
+    
+    events = table.update([listen, client._replace(status="CLOSE_WAIT")], now=105.0)
+    assert not events["opened"] and not events["closed"]
+    assert [(e["status"], e["previous_status"]) for e in events["state_changed"]] == [
+        ("CLOSE_WAIT", "ESTABLISHED")
+    ]
+    
+    events = table.update([listen], now=110.0)
+    assert [(e["remote_port"], e["duration"]) for e in events["closed"]] == [(51000, 10.0)]
+    assert len(table) == 1 and table.count("LISTEN") == 1
+
+
+def test_port_sensor_delta_mode_alerts_once():
+    """En modo delta un puerto inusual solo genera alerta al abrirse"""
+    sensor = PortSensor(ConfigManager(config_data={}))
+    connections = [Connection("tcp", "0.0.0.0", 31337, None, 0, "LISTEN", 42)]
+    sensor.backend.collect = lambda: connections
+    
+    first = sensor.scan()
+    assert first["total_listening"] == 1
+    assert [a["type"] for a in sensor.analyze(first)] == ["unusual_port"]
+    
+    second = sensor.scan()
+    assert second["opened"] == [] and sensor.analyze(second) == []
+    
+    connections = []
+    third = sensor.scan()
+    assert [c["local_port"] for c in third["closed"]] == [31337]
+    assert third["total_listening"] == 0